@@ -0,0 +1,129 @@
+import asyncio
+from ipaddress import IPv4Address
+
+from Utils import *
+
+client_id_list: list[int] = []
+
+
+async def server_update_handler(reader: asyncio.StreamReader) -> None:
+    global client_id_list
+
+    Logger.log("Task started")
+
+    while True:
+        try:
+            indicator_int = await IndicatorInt.read_from_stream(reader)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            Logger.log(f"Received error '{e}'")
+            break
+
+        if indicator_int != ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.value:
+            Logger.log(f"Incorrect indicator int {hex(indicator_int)}")
+            break
+
+        Logger.log("Reading the number of client ids from the stream")
+        try:
+            connected_client_ids_len, = await ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.read_from_stream(reader)
+
+            connected_client_ids_bytes = await reader.readexactly(
+                connected_client_ids_len * ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.array_item_size_in_bytes
+            )
+        except (OSError, asyncio.IncompleteReadError) as e:
+            Logger.log(f"Received error '{e}'")
+            break
+
+        client_id_list = ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.unpack_array(connected_client_ids_bytes).tolist()
+
+        Logger.log(f"Client id list is now {client_id_list}")
+
+    Logger.log("Task exiting")
+
+
+async def connect(ip: IPv4Address, port: int) \
+        -> tuple[asyncio.StreamReader, asyncio.StreamWriter, int] | None:
+    Logger.log(f"Attempting connection to server at address {ip}:{port}")
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(str(ip), port), 2)
+    except (TimeoutError, asyncio.TimeoutError):
+        Logger.log("Connection attempt timed out")
+        return None
+    Logger.log("Connection successful")
+
+    Logger.log("Sending new connection request")
+    writer.write(
+        ClientMessageInfo.NEW_CONNECTION_REQUEST.create_bytes()
+    )
+
+    Logger.log("Reading indicator int")
+    try:
+        await writer.drain()
+        indicator_int = await IndicatorInt.read_from_stream(reader)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        Logger.log(f"Received error '{e}', closing stream")
+        writer.close()
+        return None
+
+    if indicator_int != ServerMessageInfo.CLIENT_ID.value:
+        Logger.log(f"Incorrect indicator int {hex(indicator_int)}, closing stream")
+        writer.close()
+        return None
+
+    Logger.log("Reading client id")
+    try:
+        client_id, = await ServerMessageInfo.CLIENT_ID.read_from_stream(reader)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        Logger.log(f"Received error '{e}', closing stream")
+        writer.close()
+        return None
+
+    Logger.log(f"Received client id {client_id}")
+
+    return reader, writer, client_id
+
+
+async def main(ip: IPv4Address, port: int) -> None:
+    """
+    Runs the asyncio client until cancelled.
+    Speaks the same wire format as Client.main, so either can be used with either server.
+
+    :param ip: The ip of the server.
+    :param port: The port of the server.
+    """
+
+    result = await connect(ip, port)
+
+    if result is None:
+        Logger.log("Error connecting to server")
+        return
+
+    reader, writer, client_id = result
+
+    Logger.log("Starting server update handler task")
+    try:
+        await server_update_handler(reader)
+    except asyncio.CancelledError:
+        pass
+
+    Logger.log("Notifying server of disconnect")
+    try:
+        writer.write(
+            ClientMessageInfo.WILL_DISCONNECT.create_bytes()
+        )
+        await writer.drain()
+    except OSError as e:
+        Logger.log(f"Received error '{e}'")
+
+    # Cleanup
+    Logger.log("Closing client stream")
+    writer.close()
+
+    Logger.log("All done")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(get_my_ip(), 8889))
+        # asyncio.run(main("localhost", 8889))
+    except KeyboardInterrupt:
+        pass
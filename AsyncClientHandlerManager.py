@@ -0,0 +1,157 @@
+import asyncio
+
+from UpdaterTask import UpdaterTask
+from UpdaterTaskTypes import UpdaterTaskTypes
+from Utils import *
+
+
+class AsyncClientHandlerManager:
+    """
+    The asyncio counterpart to ClientHandlerManager.
+
+    Each client is handled by a task on the event loop rather than a thread.
+    Must only be used from the thread running the event loop.
+    """
+
+    def __init__(self):
+        self.client_id_to_writer: dict[int, asyncio.StreamWriter] = {}
+        """A dictionary of all the 'alive' client ids to the stream used to write to them."""
+
+        self.client_id_to_task: dict[int, asyncio.Task] = {}
+        """A dictionary of all the 'alive' client ids to the task reading from them."""
+
+        self.updater_tasks: asyncio.Queue[UpdaterTask] = asyncio.Queue()
+        """A queue of tasks for which contain information pertaining how to update clients."""
+
+        self.updater_task: asyncio.Task | None = None
+
+    def handle_client(self, client_id: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Sets up and starts a task to handle the given client.
+
+        :param client_id: The id of the client to be handled.
+        :param reader: The stream to read from the client.
+        :param writer: The stream to write to the client.
+        """
+
+        client_address = writer.get_extra_info("peername")
+        Logger.log(f"Handling client with id {client_id} at address {client_address[0]}:{client_address[1]}")
+
+        self.client_id_to_writer[client_id] = writer
+        self.client_id_to_task[client_id] = asyncio.create_task(self._client_handler(client_id, reader))
+
+        self.updater_tasks.put_nowait(UpdaterTask(UpdaterTaskTypes.NUM_CLIENTS_CHANGED))
+
+    def remove_client(self, client_id: int) -> None:
+        """
+        Removes the client with the given `client id` if it exists.
+        Cancels the task for that client and closes the stream.
+
+        :param client_id: The id of the client to remove.
+        """
+
+        if client_id not in self.client_id_to_writer:
+            return
+
+        self.client_id_to_task.pop(client_id).cancel()
+        self.client_id_to_writer.pop(client_id).close()
+
+        self.updater_tasks.put_nowait(UpdaterTask(UpdaterTaskTypes.NUM_CLIENTS_CHANGED))
+
+    async def _client_handler(self, client_id: int, reader: asyncio.StreamReader) -> None:
+        """
+        Handles any messages being sent to the server from the client.
+        """
+
+        while True:
+            try:
+                indicator_int = await IndicatorInt.read_from_stream(reader)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                Logger.log(f"Client id {client_id} received error '{e}'")
+                break
+
+            if indicator_int == ClientMessageInfo.WILL_DISCONNECT.value:
+                Logger.log(f"Client id {client_id} will disconnect")
+                break
+
+            else:
+                Logger.log(f"Client id {client_id} received unknown/unhandled indicator int {hex(indicator_int)}")
+                break
+
+        del self.client_id_to_task[client_id]
+        self.client_id_to_writer.pop(client_id).close()
+
+        self.updater_tasks.put_nowait(UpdaterTask(UpdaterTaskTypes.NUM_CLIENTS_CHANGED))
+
+    async def __handle_num_clients_changed(self) -> None:
+        """
+        Updates each client with the new list of client ids.
+        """
+
+        client_id_tuple = tuple(self.client_id_to_writer.keys())
+
+        Logger.log("Creating message to send")
+        bytes_to_send = ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.create_bytes_with_array(client_id_tuple)
+
+        Logger.log("Sending bytes")
+        for client_id in client_id_tuple:
+            writer = self.client_id_to_writer.get(client_id)
+            if writer is None:
+                continue
+
+            writer.write(bytes_to_send)
+
+        # Draining separately so one slow client does not delay writing to the rest
+        for client_id in client_id_tuple:
+            writer = self.client_id_to_writer.get(client_id)
+            if writer is None:
+                continue
+
+            try:
+                await writer.drain()
+            except OSError as e:
+                Logger.log(f"Sending to client id {client_id} caused error '{e}'")
+                self.remove_client(client_id)
+
+    async def updater(self) -> None:
+
+        Logger.log("Task started")
+
+        while True:
+            task = await self.updater_tasks.get()
+
+            if task.task == UpdaterTaskTypes.NUM_CLIENTS_CHANGED:
+                Logger.log("Handling NUM_CLIENTS_CHANGED")
+                await self.__handle_num_clients_changed()
+
+            else:
+                Logger.log(f"Encountered unknown task '{task.task}'")
+
+    def start(self) -> None:
+        if self.updater_task is not None:
+            return
+
+        Logger.log("Starting updater task")
+
+        self.updater_task = asyncio.create_task(self.updater())
+
+    async def stop(self) -> None:
+        if self.updater_task is None:
+            return
+
+        Logger.log("Stopping updater task")
+
+        self.updater_task.cancel()
+        try:
+            await self.updater_task
+        except asyncio.CancelledError:
+            pass
+        self.updater_task = None
+
+    async def shutdown(self) -> None:
+        Logger.log("Shutting down")
+
+        await self.stop()
+
+        for client_id in tuple(self.client_id_to_writer.keys()):
+            self.remove_client(client_id)
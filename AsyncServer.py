@@ -0,0 +1,111 @@
+import asyncio
+import itertools
+from functools import partial
+from ipaddress import IPv4Address
+from typing import Iterator
+
+from AsyncClientHandlerManager import AsyncClientHandlerManager
+from Utils import *
+
+
+async def accept_new_clients(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                             client_ids: Iterator[int],
+                             client_handler_manager: AsyncClientHandlerManager) -> None:
+    """
+    Called by the event loop for each new connection.
+    Performs the handshake then hands the client over to the client handler manager.
+    Clients requesting features are accepted without any, as this server only speaks the specification.
+
+    :param reader: The stream to read from the new client.
+    :param writer: The stream to write to the new client.
+    :param client_ids: Where the id for the new client is taken from.
+    :param client_handler_manager: The manager to hand the new client to.
+    """
+
+    client_address = writer.get_extra_info("peername")
+    Logger.log(f"Client under address {client_address[0]}:{client_address[1]} requested connection")
+
+    Logger.log("Reading indicator int from stream")
+    try:
+        indicator_int = await IndicatorInt.read_from_stream(reader)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        Logger.log(f"Received error '{e}', closing stream")
+        writer.close()
+        return
+
+    if indicator_int == ClientMessageInfo.NEW_CONNECTION_REQUEST_WITH_FEATURES.value:
+        Logger.log("Reading requested features from stream")
+        try:
+            requested_features, = await ClientMessageInfo.NEW_CONNECTION_REQUEST_WITH_FEATURES.read_from_stream(reader)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            Logger.log(f"Received error '{e}', closing stream")
+            writer.close()
+            return
+
+        Logger.log(f"Client requested features {Features(requested_features)!r}, accepting none")
+
+    elif indicator_int != ClientMessageInfo.NEW_CONNECTION_REQUEST.value:
+        Logger.log(f"Incorrect indicator int {indicator_int}, closing stream")
+        writer.close()
+        return
+
+    Logger.log("Correct indicator int")
+
+    client_id = next(client_ids)
+
+    Logger.log(f"Sending client id {client_id} to client")
+    bytes_to_send = ServerMessageInfo.CLIENT_ID.create_bytes(client_id)
+    if indicator_int == ClientMessageInfo.NEW_CONNECTION_REQUEST_WITH_FEATURES.value:
+        bytes_to_send += ServerMessageInfo.ACCEPTED_FEATURES.create_bytes(Features.NONE)
+    writer.write(bytes_to_send)
+    try:
+        await writer.drain()
+    except OSError as e:
+        Logger.log(f"Received error '{e}'")
+
+    client_handler_manager.handle_client(client_id, reader, writer)
+
+
+async def main(ip: IPv4Address, port: int) -> None:
+    """
+    Runs the asyncio server until cancelled.
+    Speaks the same wire format as Server.main, so either can be used with either client.
+
+    :param ip: The ip to bind to.
+    :param port: The port to bind to.
+    """
+
+    # Setting up the client handler manager
+    client_handler_manager = AsyncClientHandlerManager()
+    client_handler_manager.start()
+
+    Logger.log(f"Binding server to {ip}:{port}")
+    server = await asyncio.start_server(
+        partial(
+            accept_new_clients,
+            client_ids=itertools.count(1), client_handler_manager=client_handler_manager
+        ),
+        str(ip), port
+    )
+
+    Logger.log("Listening for client connections")
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+
+    # Cleanup
+    Logger.log("Shutting down client handler manager")
+    await client_handler_manager.shutdown()
+
+    Logger.log("All done")
+
+
+if __name__ == "__main__":
+    # A different port to Server.py so both can be run side by side
+    try:
+        asyncio.run(main(get_my_ip(), 8889))
+        # asyncio.run(main("localhost", 8889))
+    except KeyboardInterrupt:
+        pass
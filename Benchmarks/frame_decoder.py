@@ -0,0 +1,100 @@
+"""
+Compares the number of recv system calls and time taken to read client id list messages.
+
+The per field reads used previously are compared against the FrameDecoder.
+
+Run from the repository root with `python -m Benchmarks.frame_decoder`.
+"""
+
+import socket
+import struct
+import threading
+import time
+
+from Utils import *
+
+
+class CountingSocket:
+    """
+    Wraps a socket, counting the number of calls made to read from it.
+    """
+
+    def __init__(self, soc: socket.socket):
+        self.socket: socket.socket = soc
+        self.num_recv_calls: int = 0
+
+    def recv(self, n: int) -> bytes:
+        self.num_recv_calls += 1
+        return self.socket.recv(n)
+
+    def recv_into(self, buffer) -> int:
+        self.num_recv_calls += 1
+        return self.socket.recv_into(buffer)
+
+
+def create_message(num_client_ids: int) -> bytes:
+    return ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.create_bytes(num_client_ids) \
+        + struct.pack("<" + "I" * num_client_ids, *range(1, num_client_ids + 1))
+
+
+def send_messages(soc: socket.socket, message: bytes, num_messages: int) -> None:
+    soc.sendall(message * num_messages)
+
+
+def read_per_field(soc: CountingSocket, num_messages: int) -> None:
+    """
+    Reads the messages the same way the client did before the FrameDecoder, exact reads for each field.
+    """
+
+    for _ in range(num_messages):
+        IndicatorInt.read_from_socket(soc)
+
+        num_client_ids, = struct.unpack(
+            ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.format_string,
+            read_n_bytes_from_soc(soc, ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.size_in_bytes)
+        )
+
+        format_str = "<" + "I" * num_client_ids
+        struct.unpack(format_str, read_n_bytes_from_soc(soc, struct.calcsize(format_str)))
+
+
+def read_with_decoder(soc: CountingSocket, num_messages: int) -> None:
+    decoder = FrameDecoder(ServerMessageInfo)
+
+    for _ in range(num_messages):
+        frame = decoder.read_frame(soc)
+        frame.message_info.unpack_array(frame.array_bytes)
+
+
+def run(name: str, reader, num_messages: int, num_client_ids: int) -> None:
+    reading_socket, writing_socket = socket.socketpair()
+    counting_socket = CountingSocket(reading_socket)
+
+    message = create_message(num_client_ids)
+
+    sender = threading.Thread(target=send_messages, args=(writing_socket, message, num_messages))
+
+    start = time.perf_counter()
+    sender.start()
+    reader(counting_socket, num_messages)
+    elapsed = time.perf_counter() - start
+    sender.join()
+
+    reading_socket.close()
+    writing_socket.close()
+
+    print(f"{name:>10}: {counting_socket.num_recv_calls:>8} recv calls, "
+          f"{elapsed * 1000:8.1f} ms, {num_messages / elapsed:10.0f} messages/s")
+
+
+def main() -> None:
+    num_messages = 20000
+
+    for num_client_ids in (1, 16, 128):
+        print(f"{num_messages} messages of {num_client_ids} client ids")
+        run("per field", read_per_field, num_messages, num_client_ids)
+        run("decoder", read_with_decoder, num_messages, num_client_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares the size of maze maps sent as MAP_DATA against COMPRESSED_MAP_DATA, and the time taken to compress them once
+on the server and decompress them on the client, for zlib and lzma.
+
+Run from the repository root with `python -m Benchmarks.map_compression`, optionally followed by the maze sizes.
+"""
+
+import lzma
+import sys
+import time
+import zlib
+
+from MapDataReceiver import MapDataReceiver
+from MapGenerator import generate_map_using_maze
+from MapGenerator.MazeGenerator import HeapMazeGenerator
+
+CHUNK_SIZE = 64 * 1024
+
+
+def report(name: str, raw_size: int, compressed: bytes, compress_time: float, decompress_time: float) -> None:
+    print(f"{name:>12}: {len(compressed):9} bytes, {raw_size / len(compressed):6.1f}x smaller, "
+          f"compress {compress_time * 1000:8.2f} ms, decompress {decompress_time * 1000:8.2f} ms")
+
+
+def main() -> None:
+    maze_sizes = [int(arg) for arg in sys.argv[1:]] or [20, 40, 60]
+
+    for maze_size in maze_sizes:
+        map_data = generate_map_using_maze(HeapMazeGenerator()(maze_size, maze_size, seed=0))
+        raw_size = len(map_data.buffer)
+
+        print(f"{maze_size}x{maze_size} maze, {map_data.width}x{map_data.height} map, {raw_size} bytes of map data")
+
+        for level in (1, 6, 9):
+            start = time.perf_counter()
+            compressed = zlib.compress(map_data.buffer, level)
+            compress_time = time.perf_counter() - start
+
+            # Decompressing a chunk at a time as the client does
+            start = time.perf_counter()
+            receiver = MapDataReceiver(map_data.width, map_data.height, len(compressed))
+            for offset in range(0, len(compressed), CHUNK_SIZE):
+                receiver.feed(compressed[offset:offset + CHUNK_SIZE])
+            decompress_time = time.perf_counter() - start
+
+            assert receiver.crc32 == map_data.crc32(), "Checksums differ"
+
+            report(f"zlib {level}", raw_size, compressed, compress_time, decompress_time)
+
+        start = time.perf_counter()
+        compressed = lzma.compress(map_data.buffer)
+        compress_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        lzma.decompress(compressed)
+        decompress_time = time.perf_counter() - start
+
+        report("lzma", raw_size, compressed, compress_time, decompress_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compares saving and loading .mapdata files using the string round trips used previously against the bit-packed MapData.
+
+Run from the repository root with `python -m Benchmarks.map_data`, optionally followed by the width and height.
+"""
+
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+from MapGenerator import MapData
+
+
+def old_save_raw(data: list[list[int]], width: int, height: int, filename: str) -> None:
+    """The implementation of MapData.save_raw before the bit-packed storage, with the padding fixed."""
+
+    extension = "0" * ((8 - width % 8) % 8)
+    rows = ["".join([str(_value) for _value in _row]) + extension for _row in data]
+
+    with open(filename, "wb") as f:
+        f.write(struct.pack("<II", width, height))
+
+        for row in rows:
+            f.write(bytes([int(row[n:n + 8], 2) for n in range(0, len(row), 8)]))
+
+
+def old_from_raw(filename: str) -> list[list[int]]:
+    """The implementation of MapData.from_raw before the bit-packed storage."""
+
+    with open(filename, "rb") as f:
+        width, height = struct.unpack("<II", f.read(8))
+
+        data = [[0 for _ in range(width)] for _ in range(height)]
+        width_in_bytes = int((width + 7) // 8)
+
+        for y in range(height):
+            row_bits_str = "".join(f'{byte:08b}' for byte in f.read(width_in_bytes))
+
+            for i in range(width):
+                data[y][i] = int(row_bits_str[i])
+
+    return data
+
+
+def report(name: str, old_time: float, new_time: float) -> None:
+    print(f"{name:>10}: strings {old_time * 1000:10.1f} ms, bit-packed {new_time * 1000:8.2f} ms, "
+          f"{old_time / new_time:8.1f}x")
+
+
+def main() -> None:
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else width
+
+    print(f"{width}x{height} map")
+
+    rng = random.Random(0)
+    map_data = MapData(width, height)
+    map_data.buffer[:] = rng.randbytes(len(map_data.buffer))
+    map_data._clear_padding()
+
+    data = [map_data.get_row(y) for y in range(height)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        old_filename = os.path.join(directory, "old.mapdata")
+        new_filename = os.path.join(directory, "new.mapdata")
+
+        start = time.perf_counter()
+        old_save_raw(data, width, height, old_filename)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        map_data.save_raw(new_filename)
+        new_time = time.perf_counter() - start
+
+        report("save_raw", old_time, new_time)
+
+        with open(old_filename, "rb") as old_file, open(new_filename, "rb") as new_file:
+            assert old_file.read() == new_file.read(), "Saved files differ"
+
+        start = time.perf_counter()
+        old_data = old_from_raw(old_filename)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded_map_data = MapData.from_raw(new_filename)
+        new_time = time.perf_counter() - start
+
+        report("from_raw", old_time, new_time)
+
+        assert loaded_map_data.buffer == map_data.buffer and old_data == data, "Loaded maps differ"
+
+        start = time.perf_counter()
+        rows = [loaded_map_data.get_row(y) for y in range(height)]
+        rows_time = time.perf_counter() - start
+
+        print(f"{'get_row':>10}: every row as lists {rows_time * 1000:8.1f} ms")
+        assert rows == data
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compares drawing a map from a maze one cell at a time, as previously, against building each row whole.
+
+Run from the repository root with `python -m Benchmarks.map_rasterising`, optionally followed by the maze sizes.
+"""
+
+import sys
+import time
+
+from MapGenerator import MapData, generate_map_using_maze
+from MapGenerator.MazeGenerator import HeapMazeGenerator, Maze
+
+
+def old_generate_map_using_maze(maze: Maze) -> MapData:
+    """The implementation of generate_map_using_maze before building each row whole."""
+
+    width_3 = maze.width * 3
+    height_3 = maze.height * 3
+
+    map_data = MapData(width_3, height_3)
+
+    for x in range(width_3):
+        map_data.set(x, 0, 1)
+        map_data.set(x, height_3 - 1, 1)
+
+    for y in range(height_3):
+        map_data.set(0, y, 1)
+        map_data.set(width_3 - 1, y, 1)
+
+    for y in range(height_3):
+        for x in range(width_3):
+            if (x % 3 == 0 or x % 3 == 2) and (y % 3 == 0 or y % 3 == 2):
+                map_data.set(x, y, 1)
+                continue
+
+    for y in range(maze.height):
+        y_3 = y * 3
+
+        for x in range(maze.width):
+            x_3 = x * 3
+
+            cell = maze.cells[y * maze.width + x]
+
+            if cell == Maze.accepted_mask:  # Every side accepted
+                map_data.set(x_3, y_3, 0)
+                map_data.set(x_3 + 2, y_3, 0)
+                map_data.set(x_3, y_3 + 2, 0)
+                map_data.set(x_3 + 2, y_3 + 2, 0)
+                continue
+
+            if cell & 0b00000011 != 0b00000001:  # Left
+                map_data.set(x_3, y_3 + 1, 1)
+
+            if cell & 0b00001100 != 0b00000100:  # Top
+                map_data.set(x_3 + 1, y_3, 1)
+
+            if cell & 0b00110000 != 0b00010000:  # Right
+                map_data.set(x_3 + 2, y_3 + 1, 1)
+
+            if cell & 0b11000000 != 0b01000000:  # Bottom
+                map_data.set(x_3 + 1, y_3 + 2, 1)
+
+    for x in range(1, width_3 - 1):
+        map_data.set(x, 1, 0)
+        map_data.set(x, height_3 - 2, 0)
+
+    for y in range(1, height_3 - 1):
+        map_data.set(1, y, 0)
+        map_data.set(width_3 - 2, y, 0)
+
+    return map_data
+
+
+def main() -> None:
+    maze_sizes = [int(arg) for arg in sys.argv[1:]] or [100, 250, 500, 1000]
+
+    for size in maze_sizes:
+        maze = HeapMazeGenerator()(size, size, seed=0)
+
+        start = time.perf_counter()
+        old_map_data = old_generate_map_using_maze(maze)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        map_data = generate_map_using_maze(maze)
+        new_time = time.perf_counter() - start
+
+        assert map_data.buffer == old_map_data.buffer, "Maps differ"
+
+        print(f"{size:>5}x{size:<5}: cell by cell {old_time * 1000:10.1f} ms, "
+              f"whole rows {new_time * 1000:8.1f} ms, {old_time / new_time:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Compares sending a map to many clients at once by building the whole message for each client and calling sendall,
+against streaming it in chunks through the Broadcaster.
+
+Reports the time taken for every client to receive and checksum the map, and the peak memory allocated meanwhile.
+
+Run from the repository root with `python -m Benchmarks.map_transfer`, optionally followed by the map size and the
+number of clients.
+"""
+
+import random
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+
+from Broadcaster import Broadcaster
+from MapGenerator import MapData
+from Utils import *
+
+CHUNK_SIZE = 64 * 1024
+
+
+def receive(soc: socket.socket, num_bytes: int, results: list[int], index: int) -> None:
+    """
+    Receives the message and checksums the map data as it arrives.
+    """
+
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    header_size = IndicatorInt.size_in_bytes + ServerMessageInfo.MAP_DATA.size_in_bytes
+
+    num_received = 0
+    crc32 = 0
+
+    while num_received < num_bytes:
+        num_read = soc.recv_into(view, min(CHUNK_SIZE, num_bytes - num_received))
+
+        # Skipping the header, which may be split over several reads
+        start = min(max(header_size - num_received, 0), num_read)
+        crc32 = zlib.crc32(view[start:num_read], crc32)
+
+        num_received += num_read
+
+    results[index] = crc32
+
+
+def send_naive(map_data: MapData, sockets: list[socket.socket]) -> None:
+    """
+    Builds the whole message for each client and sends it with sendall, a thread per client.
+    """
+
+    def send(soc: socket.socket) -> None:
+        soc.sendall(ServerMessageInfo.MAP_DATA.create_bytes(map_data.width, map_data.height) + bytes(map_data.buffer))
+
+    threads = [threading.Thread(target=send, args=(soc,)) for soc in sockets]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def send_streamed(map_data: MapData, sockets: list[socket.socket]) -> Broadcaster:
+    """
+    Streams a view of the map to each client through a Broadcaster.
+    """
+
+    def chunks():
+        yield ServerMessageInfo.MAP_DATA.create_bytes(map_data.width, map_data.height)
+
+        view = memoryview(map_data.buffer)
+        for start in range(0, len(view), CHUNK_SIZE):
+            yield view[start:start + CHUNK_SIZE]
+
+    broadcaster = Broadcaster()
+    broadcaster.start()
+
+    for client_id, soc in enumerate(sockets, 1):
+        soc.setblocking(False)
+        broadcaster.add_client(client_id, soc)
+        broadcaster.send_stream(client_id, chunks())
+
+    return broadcaster
+
+
+def run(name: str, sender, map_data: MapData, num_clients: int) -> None:
+    socket_pairs = [socket.socketpair() for _ in range(num_clients)]
+    num_bytes = IndicatorInt.size_in_bytes + ServerMessageInfo.MAP_DATA.size_in_bytes + len(map_data.buffer)
+
+    results = [0] * num_clients
+    receivers = [
+        threading.Thread(target=receive, args=(reading_socket, num_bytes, results, index))
+        for index, (reading_socket, _) in enumerate(socket_pairs)
+    ]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    for receiver in receivers:
+        receiver.start()
+
+    sent_by = sender(map_data, [writing_socket for _, writing_socket in socket_pairs])
+
+    for receiver in receivers:
+        receiver.join()
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if isinstance(sent_by, Broadcaster):
+        sent_by.close()
+
+    for reading_socket, writing_socket in socket_pairs:
+        reading_socket.close()
+        writing_socket.close()
+
+    assert all(crc32 == map_data.crc32() for crc32 in results), "Checksums differ"
+
+    print(f"{name:>9}: {elapsed * 1000:8.1f} ms, peak memory {peak / (1024 * 1024):8.2f} MiB")
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    num_clients = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+
+    map_data = MapData(size, size)
+    map_data.buffer[:] = random.Random(0).randbytes(len(map_data.buffer))
+
+    print(f"{size}x{size} map ({len(map_data.buffer) / (1024 * 1024):.2f} MiB) sent to {num_clients} clients")
+
+    run("sendall", send_naive, map_data, num_clients)
+    run("streamed", send_streamed, map_data, num_clients)
+
+
+if __name__ == "__main__":
+    main()
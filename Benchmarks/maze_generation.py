@@ -0,0 +1,40 @@
+"""
+Compares generating mazes by scanning every accepted node on each pass against keeping the paths in a heap.
+
+Run from the repository root with `python -m Benchmarks.maze_generation`, optionally followed by the largest maze size
+to generate with the scanning generator.
+"""
+
+import sys
+import time
+
+from MapGenerator.MazeGenerator import HeapMazeGenerator, Maze, MazeGenerator
+
+MAZE_SIZES = (10, 20, 40, 60, 80, 120, 250, 500, 1000)
+
+
+def time_generator(generator: MazeGenerator, size: int) -> tuple[Maze, float]:
+    start = time.perf_counter()
+    maze = generator(size, size, seed=0)
+    return maze, time.perf_counter() - start
+
+
+def main() -> None:
+    max_scanning_size = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+
+    for size in MAZE_SIZES:
+        heap_maze, heap_time = time_generator(HeapMazeGenerator(), size)
+
+        if size > max_scanning_size:
+            print(f"{size:>5}x{size:<5}: scanning {'-':>10}    , heap {heap_time * 1000:10.1f} ms")
+            continue
+
+        scanning_maze, scanning_time = time_generator(MazeGenerator(), size)
+        assert scanning_maze.cells == heap_maze.cells, "Mazes differ"
+
+        print(f"{size:>5}x{size:<5}: scanning {scanning_time * 1000:10.1f} ms, heap {heap_time * 1000:10.1f} ms, "
+              f"{scanning_time / heap_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Compares the memory used by the nodes of a maze stored as lists of lists, as they used to be, against a byte per node.
+
+Run from the repository root with `python -m Benchmarks.maze_storage`, optionally followed by the maze sizes.
+"""
+
+import sys
+import tracemalloc
+
+from MapGenerator.MazeGenerator import Maze
+
+
+def measure(create) -> int:
+    tracemalloc.start()
+    created = create()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del created
+    return size
+
+
+def main() -> None:
+    maze_sizes = [int(arg) for arg in sys.argv[1:]] or [100, 500, 1000]
+
+    for size in maze_sizes:
+        old_size = measure(lambda: [[[0, 0, 0, 0] for _ in range(size)] for _ in range(size)])
+        new_size = measure(lambda: Maze(size, size))
+
+        print(f"{size:>5}x{size:<5}: lists {old_size / (1024 * 1024):8.2f} MiB ({old_size / size ** 2:5.1f} B/node), "
+              f"bytearray {new_size / (1024 * 1024):8.2f} MiB ({new_size / size ** 2:5.1f} B/node), "
+              f"{old_size / new_size:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
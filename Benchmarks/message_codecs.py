@@ -0,0 +1,76 @@
+"""
+Compares encoding and decoding throughput of messages using format strings against the precompiled codecs.
+
+Run from the repository root with `python -m Benchmarks.message_codecs`.
+"""
+
+import struct
+import timeit
+
+from Utils import *
+
+NUM_REPEATS = 5
+
+
+def old_create_bytes(message_info, *args) -> bytes:
+    """The implementation of BaseMessageInfo.create_bytes before the precompiled codecs."""
+
+    return struct.pack(message_info.format_string_with_indicator, message_info._value_, *args)
+
+
+def old_unpack(message_info, buffer) -> tuple:
+    """How messages were unpacked before the precompiled codecs."""
+
+    return struct.unpack(message_info.format_string, buffer)
+
+
+def report(name: str, number: int, old, new) -> None:
+    old_time = min(timeit.repeat(old, number=number, repeat=NUM_REPEATS))
+    new_time = min(timeit.repeat(new, number=number, repeat=NUM_REPEATS))
+
+    print(f"{name:>32}: format strings {number / old_time:12.0f}/s, "
+          f"precompiled {number / new_time:12.0f}/s, {old_time / new_time:5.1f}x")
+
+
+def main() -> None:
+    message_info = ServerMessageInfo.CLIENT_ID
+    message_bytes = message_info.create_bytes(1234)
+    buffer = bytearray(message_info.struct_with_indicator.size)
+
+    report(
+        "encode CLIENT_ID", 200000,
+        lambda: old_create_bytes(message_info, 1234),
+        lambda: message_info.create_bytes(1234)
+    )
+    report(
+        "encode CLIENT_ID into buffer", 200000,
+        lambda: old_create_bytes(message_info, 1234),
+        lambda: message_info.pack_into(buffer, 0, 1234)
+    )
+    report(
+        "decode CLIENT_ID", 200000,
+        lambda: old_unpack(message_info, message_bytes[1:]),
+        lambda: message_info.unpack(message_bytes, 1)
+    )
+
+    header = ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER
+
+    for num_client_ids in (8, 64, 512):
+        client_ids = tuple(range(1, num_client_ids + 1))
+        array_bytes = header.create_bytes_with_array(client_ids)[1 + header.size_in_bytes:]
+        number = 2000000 // num_client_ids
+
+        report(
+            f"encode {num_client_ids} client ids", number,
+            lambda: old_create_bytes(header, len(client_ids)) + struct.pack("I" * len(client_ids), *client_ids),
+            lambda: header.create_bytes_with_array(client_ids)
+        )
+        report(
+            f"decode {num_client_ids} client ids", number,
+            lambda: list(struct.unpack("I" * num_client_ids, array_bytes)),
+            lambda: header.unpack_array(array_bytes).tolist()
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares checking the moves of every player in a tick cell by cell through lists of rows, against the bit masks of the
+MovementValidator, as a share of the tick budget.
+
+Run from the repository root with `python -m Benchmarks.movement_validation`, optionally followed by the maze size,
+the number of players and the furthest a player moves in a tick.
+"""
+
+import random
+import sys
+import time
+
+from MapGenerator import MovementValidator, generate_map_using_maze
+from MapGenerator.MazeGenerator import HeapMazeGenerator
+
+TICK_RATE = 30
+NUM_TICKS = 50
+
+
+def is_legal_move_per_cell(rows: list[list[int]], x_1: int, y_1: int, x_2: int, y_2: int) -> bool:
+    """Checks every cell the line between the centres touches, a cell at a time."""
+
+    height = len(rows)
+    width = len(rows[0]) if rows else 0
+
+    if not (0 <= x_1 < width and 0 <= y_1 < height and 0 <= x_2 < width and 0 <= y_2 < height):
+        return False
+
+    length_x = x_2 - x_1
+    length_y = y_2 - y_1
+
+    for y in range(min(y_1, y_2), max(y_1, y_2) + 1):
+        for x in range(min(x_1, x_2), max(x_1, x_2) + 1):
+            # The line touches the cell if its corners are not all strictly on one side of it
+            sides = [
+                length_x * (2 * (corner_y - y_1) + offset_y) - length_y * (2 * (corner_x - x_1) + offset_x)
+                for corner_x, corner_y in ((x, y),) for offset_x in (-1, 1) for offset_y in (-1, 1)
+            ]
+
+            if (min(sides) <= 0 <= max(sides)) and rows[y][x]:
+                return False
+
+    return True
+
+
+def report(name: str, all_moves: list[list[tuple[int, int, int, int]]], validate) -> None:
+    start = time.perf_counter()
+    for moves in all_moves:
+        results = validate(moves)
+    tick_time = (time.perf_counter() - start) / len(all_moves)
+
+    print(f"{name:>36}: {tick_time * 1000:8.3f} ms per tick, {tick_time * TICK_RATE * 100:7.2f}% of the tick budget, "
+          f"{results.count(True)}/{len(results)} legal")
+
+
+def main() -> None:
+    maze_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    num_players = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    max_distance = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    map_data = generate_map_using_maze(HeapMazeGenerator()(maze_size, maze_size, seed=0))
+
+    start = time.perf_counter()
+    movement_validator = MovementValidator(map_data)
+    print(f"{map_data.width}x{map_data.height} map, {num_players} players moving up to {max_distance} cells a tick, "
+          f"validator built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = random.Random(0)
+    open_cells = [(x, y) for y in range(map_data.height) for x in range(map_data.width) if not map_data.get(x, y)]
+    all_moves = []
+
+    for _ in range(NUM_TICKS):
+        all_moves.append([
+            (x, y, x + rng.randint(-max_distance, max_distance), y + rng.randint(-max_distance, max_distance))
+            for x, y in rng.sample(open_cells, num_players)
+        ])
+
+    rows = [map_data.get_row(y) for y in range(map_data.height)]
+    report("cell by cell through lists of rows", all_moves,
+           lambda moves: [is_legal_move_per_cell(rows, *move) for move in moves])
+    report("MovementValidator.is_legal_move", all_moves,
+           lambda moves: [movement_validator.is_legal_move(*move) for move in moves])
+    report("MovementValidator.validate_moves", all_moves, movement_validator.validate_moves)
+
+    # Checking the validator against cell by cell on every move, as the two must always agree
+    for moves in all_moves:
+        assert movement_validator.validate_moves(moves) == [is_legal_move_per_cell(rows, *move) for move in moves]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compares bots finding their next step toward a target every tick with A* through MapData.get, against looking it up in
+the distance fields held by a PathCache, as a share of the tick budget.
+
+Run from the repository root with `python -m Benchmarks.path_finding`, optionally followed by the maze size, the
+number of bots and the number of targets.
+"""
+
+import heapq
+import random
+import sys
+import time
+
+from MapGenerator import CachedMap, MapData, PathCache, generate_map_using_maze
+from MapGenerator.MazeGenerator import HeapMazeGenerator
+
+TICK_RATE = 30
+NUM_TICKS = 5
+
+
+def a_star_next_position(map_data: MapData, start: tuple[int, int], target: tuple[int, int]) -> tuple[int, int] | None:
+    target_x, target_y = target
+    came_from = {start: start}
+    costs = {start: 0}
+    queue = [(0, start)]
+
+    while queue:
+        _, position = heapq.heappop(queue)
+
+        if position == target:
+            # Walking back to the step just after the start
+            while came_from[position] != start:
+                position = came_from[position]
+            return position
+
+        x, y = position
+        cost = costs[position] + 1
+
+        for neighbour in ((x - 1, y), (x, y - 1), (x + 1, y), (x, y + 1)):
+            neighbour_x, neighbour_y = neighbour
+
+            if not (0 <= neighbour_x < map_data.width and 0 <= neighbour_y < map_data.height):
+                continue
+
+            if map_data.get(neighbour_x, neighbour_y) or cost >= costs.get(neighbour, cost + 1):
+                continue
+
+            costs[neighbour] = cost
+            came_from[neighbour] = position
+            heapq.heappush(queue, (cost + abs(target_x - neighbour_x) + abs(target_y - neighbour_y), neighbour))
+
+    return None
+
+
+def report(name: str, bot_to_target: dict[tuple[int, int], tuple[int, int]], next_position) -> None:
+    """
+    Moves every bot a step toward its target each tick.
+    """
+
+    bot_to_target = dict(bot_to_target)
+
+    start = time.perf_counter()
+    for _ in range(NUM_TICKS):
+        bot_to_target = {next_position(bot, target): target for bot, target in bot_to_target.items()}
+    tick_time = (time.perf_counter() - start) / NUM_TICKS
+
+    print(f"{name:>36}: {tick_time * 1000:9.3f} ms per tick, {tick_time * TICK_RATE * 100:8.2f}% of the tick budget")
+
+
+def main() -> None:
+    maze_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    num_bots = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    num_targets = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    map_data = generate_map_using_maze(HeapMazeGenerator()(maze_size, maze_size, seed=0))
+    cached_map = CachedMap("benchmark", map_data, map_data.crc32())
+
+    rng = random.Random(0)
+    open_cells = [(x, y) for y in range(map_data.height) for x in range(map_data.width) if not map_data.get(x, y)]
+    targets = rng.sample(open_cells, num_targets)
+    bot_to_target = {bot: rng.choice(targets) for bot in rng.sample(open_cells, num_bots)}
+
+    print(f"{map_data.width}x{map_data.height} map, {num_bots} bots, {num_targets} targets")
+
+    report("A* every tick", bot_to_target, lambda bot, target: a_star_next_position(map_data, bot, target))
+
+    path_cache = PathCache()
+
+    start = time.perf_counter()
+    for target in targets:
+        path_cache.get(cached_map, target)
+    print(f"{'distance fields built':>36}: {(time.perf_counter() - start) * 1000:9.3f} ms, "
+          f"{path_cache.num_bytes / 1024:.0f} KiB")
+
+    report("PathCache.next_position", bot_to_target,
+           lambda bot, target: path_cache.next_position(cached_map, bot, target))
+
+
+if __name__ == "__main__":
+    main()
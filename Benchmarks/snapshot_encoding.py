@@ -0,0 +1,78 @@
+"""
+Compares the number of bytes sent to each client per tick by the position and state data in the specification against
+SNAPSHOT messages, with and without 16 bit relative positions.
+
+Each client is assumed to acknowledge snapshots a few ticks late, as it would over a real connection.
+
+Run from the repository root with `python -m Benchmarks.snapshot_encoding`.
+"""
+
+import random
+
+from Utils import *
+
+NUM_TICKS = 300
+ACK_LAG_IN_TICKS = 3
+
+
+def idle(rng: random.Random, position_and_state: tuple[int, int, int]) -> tuple[int, int, int]:
+    return position_and_state
+
+
+def random_walk(rng: random.Random, position_and_state: tuple[int, int, int]) -> tuple[int, int, int]:
+    state, x, y = position_and_state
+    return state, x + rng.randint(-1, 1), y + rng.randint(-1, 1)
+
+
+def mostly_idle(rng: random.Random, position_and_state: tuple[int, int, int]) -> tuple[int, int, int]:
+    if rng.random() < 0.1:
+        return random_walk(rng, position_and_state)
+
+    return position_and_state
+
+
+def bytes_per_tick(num_players: int, move, allow_int16_relative: bool | None) -> float:
+    """
+    :param allow_int16_relative: None to send the position and state data as in the specification.
+    :return: The mean number of bytes sent to one client per tick.
+    """
+
+    if allow_int16_relative is None:
+        return PositionAndState.size_in_bytes * num_players
+
+    header_size = IndicatorInt.size_in_bytes + ServerMessageInfo.SNAPSHOT.size_in_bytes
+
+    rng = random.Random(0)
+    snapshot = {client_id: (1, rng.randint(0, 1000), rng.randint(0, 1000)) for client_id in range(1, num_players + 1)}
+
+    tick_to_snapshot = {}
+    total_bytes = 0
+
+    for tick in range(1, NUM_TICKS + 1):
+        snapshot = {client_id: move(rng, position_and_state) for client_id, position_and_state in snapshot.items()}
+
+        baseline = tick_to_snapshot.get(tick - 1 - ACK_LAG_IN_TICKS, {})
+        _, payload = SnapshotCodec.encode(snapshot, baseline, allow_int16_relative)
+
+        total_bytes += header_size + len(payload)
+        tick_to_snapshot[tick] = snapshot
+
+    return total_bytes / NUM_TICKS
+
+
+def main() -> None:
+    for name, move in (("idle", idle), ("mostly idle", mostly_idle), ("random walk", random_walk)):
+        print(f"{name}, bytes per client per tick")
+
+        for num_players in (16, 64, 256):
+            spec = bytes_per_tick(num_players, move, None)
+            delta = bytes_per_tick(num_players, move, False)
+            int16_relative = bytes_per_tick(num_players, move, True)
+
+            print(f"{num_players:>5} players: specification {spec:8.0f}, "
+                  f"snapshot delta {delta:8.0f} ({spec / delta:5.1f}x), "
+                  f"int16 relative {int16_relative:8.0f} ({spec / int16_relative:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
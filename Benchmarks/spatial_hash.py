@@ -0,0 +1,111 @@
+"""
+Compares finding every pair of players within tagging range by checking all pairs, against the SpatialHash, as a share
+of the tick budget, for increasing numbers of players moving around a map.
+
+Run from the repository root with `python -m Benchmarks.spatial_hash`, optionally followed by the map size and the
+tagging range.
+"""
+
+import itertools
+import random
+import sys
+import time
+
+from SpatialHash import SpatialHash
+
+TICK_RATE = 30
+NUM_TICKS = 20
+PLAYER_COUNTS = (16, 64, 256, 1024)
+
+
+def all_pairs_within(id_to_position: dict[int, tuple[int, int]], radius: float) -> list[tuple[int, int]]:
+    radius_squared = radius * radius
+
+    return [
+        (id_1, id_2)
+        for (id_1, (x_1, y_1)), (id_2, (x_2, y_2)) in itertools.combinations(id_to_position.items(), 2)
+        if (x_2 - x_1) ** 2 + (y_2 - y_1) ** 2 <= radius_squared
+    ]
+
+
+def all_nearest(id_to_position: dict[int, tuple[int, int]]) -> list[int]:
+    return [
+        min(
+            (other_id for other_id in id_to_position if other_id != client_id),
+            key=lambda other_id: (
+                (id_to_position[other_id][0] - x) ** 2 + (id_to_position[other_id][1] - y) ** 2, other_id
+            )
+        )
+        for client_id, (x, y) in id_to_position.items()
+    ]
+
+
+def simulate(map_size: int, num_players: int, run) -> tuple[float, int]:
+    """
+    Moves every player a step in a random direction each tick, then runs the query.
+
+    :return: The mean time per tick of the query, including updating the positions, and the size of its last result.
+    """
+
+    rng = random.Random(0)
+    id_to_position = {client_id: (rng.randrange(map_size), rng.randrange(map_size)) for client_id in range(num_players)}
+
+    total_time = 0
+    result = []
+
+    for _ in range(NUM_TICKS):
+        moves = [
+            (client_id, min(max(x + rng.randint(-1, 1), 0), map_size - 1), min(max(y + rng.randint(-1, 1), 0), map_size - 1))
+            for client_id, (x, y) in id_to_position.items()
+        ]
+
+        start = time.perf_counter()
+        result = run(moves, id_to_position)
+        total_time += time.perf_counter() - start
+
+    return total_time / NUM_TICKS, len(result)
+
+
+def report(name: str, map_size: int, num_players: int, run) -> None:
+    tick_time, result_size = simulate(map_size, num_players, run)
+
+    print(f"{name:>28}: {tick_time * 1000:8.3f} ms per tick, {tick_time * TICK_RATE * 100:7.2f}% of the tick budget, "
+          f"{result_size} results")
+
+
+def main() -> None:
+    map_size = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    radius = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    for num_players in PLAYER_COUNTS:
+        print(f"{num_players} players on a {map_size}x{map_size} map, tagging range {radius:g}")
+
+        def move(moves, id_to_position):
+            for client_id, x, y in moves:
+                id_to_position[client_id] = (x, y)
+
+        spatial_hash = SpatialHash()
+
+        def move_hashed(moves, id_to_position):
+            for client_id, x, y in moves:
+                id_to_position[client_id] = (x, y)
+                spatial_hash.update(client_id, x, y)
+
+        report("all pairs", map_size, num_players,
+               lambda moves, id_to_position: move(moves, id_to_position) or all_pairs_within(id_to_position, radius))
+        report("SpatialHash.pairs_within", map_size, num_players,
+               lambda moves, id_to_position: move_hashed(moves, id_to_position) or spatial_hash.pairs_within(radius))
+
+        if num_players <= 256:
+            report("all nearest", map_size, num_players,
+                   lambda moves, id_to_position: move(moves, id_to_position) or all_nearest(id_to_position))
+
+        spatial_hash.clear()
+        report("SpatialHash.nearest", map_size, num_players,
+               lambda moves, id_to_position: move_hashed(moves, id_to_position) or [
+                   spatial_hash.nearest(x, y, client_id)[0] for client_id, (x, y) in id_to_position.items()
+               ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Compares finding every pair of players that can see each other by casting a ray through MapData.data for each pair,
+against the VisibilityIndex, as a share of the tick budget.
+
+Run from the repository root with `python -m Benchmarks.visibility`, optionally followed by the maze size and the
+number of players.
+"""
+
+import random
+import sys
+import time
+
+from MapGenerator import MapData, VisibilityIndex, generate_map_using_maze
+from MapGenerator.MazeGenerator import HeapMazeGenerator
+
+TICK_RATE = 30
+NUM_TICKS = 10
+
+
+def ray_cast(map_data: MapData, x_1: int, y_1: int, x_2: int, y_2: int) -> bool:
+    """Steps from the centre of one cell to the other a cell at a time, checking every cell the ray enters."""
+
+    data = map_data.data
+
+    x, y = x_1, y_1
+    step_x = (x_2 > x_1) - (x_2 < x_1)
+    step_y = (y_2 > y_1) - (y_2 < y_1)
+    length_x = abs(x_2 - x_1)
+    length_y = abs(y_2 - y_1)
+
+    # How far along the ray the next vertical and horizontal cell edges are, over length_x * length_y
+    next_x = length_y if length_x else float("inf")
+    next_y = length_x if length_y else float("inf")
+
+    while True:
+        if data[y][x]:
+            return False
+
+        if (x, y) == (x_2, y_2):
+            return True
+
+        if next_x < next_y:
+            x += step_x
+            next_x += 2 * length_y
+        elif next_y < next_x:
+            y += step_y
+            next_y += 2 * length_x
+        else:
+            # Passing exactly through a corner
+            x += step_x
+            y += step_y
+            next_x += 2 * length_y
+            next_y += 2 * length_x
+
+
+def ray_cast_pairs(map_data: MapData, id_to_position: dict[int, tuple[int, int]]) -> list[tuple[int, int]]:
+    positions = list(id_to_position.items())
+
+    return [
+        (id_1, id_2)
+        for index, (id_1, position_1) in enumerate(positions)
+        for id_2, position_2 in positions[index + 1:]
+        if ray_cast(map_data, *position_1, *position_2)
+    ]
+
+
+def report(name: str, run) -> None:
+    start = time.perf_counter()
+    for _ in range(NUM_TICKS):
+        visible_pairs = run()
+    tick_time = (time.perf_counter() - start) / NUM_TICKS
+
+    print(f"{name:>40}: {tick_time * 1000:8.2f} ms per tick, {tick_time * TICK_RATE * 100:7.1f}% of the tick budget, "
+          f"{len(visible_pairs)} visible pairs")
+
+
+def run(name: str, map_data: MapData, num_players: int) -> None:
+    start = time.perf_counter()
+    visibility_index = VisibilityIndex(map_data)
+    build_time = time.perf_counter() - start
+
+    print(f"{name}, {map_data.width}x{map_data.height} map, {num_players} players, "
+          f"index built in {build_time * 1000:.1f} ms, {visibility_index.size_in_bytes / 1024:.0f} KiB")
+
+    rng = random.Random(0)
+    open_cells = [(x, y) for y in range(map_data.height) for x in range(map_data.width) if not map_data.get(x, y)]
+    id_to_position = dict(enumerate(rng.sample(open_cells, num_players), 1))
+
+    report("ray cast through MapData.data", lambda: ray_cast_pairs(map_data, id_to_position))
+    report("VisibilityIndex.visible_pairs", lambda: visibility_index.visible_pairs(id_to_position))
+    report("VisibilityIndex.visible_pairs, 30 cells", lambda: visibility_index.visible_pairs(id_to_position, 30))
+
+
+def main() -> None:
+    maze_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    num_players = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    run("Maze", generate_map_using_maze(HeapMazeGenerator()(maze_size, maze_size, seed=0)), num_players)
+
+    # An open arena of the same size with scattered pillars, where most players can see each other
+    rng = random.Random(0)
+    arena = MapData(maze_size * 3, maze_size * 3)
+    for _ in range(arena.width * arena.height // 100):
+        arena.set(rng.randrange(arena.width), rng.randrange(arena.height), 1)
+
+    run("Arena", arena, num_players)
+
+
+if __name__ == "__main__":
+    main()
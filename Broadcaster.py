@@ -0,0 +1,363 @@
+import collections
+import selectors
+import socket
+import threading
+from typing import Iterable, Iterator
+
+from SlowConsumerPolicy import SlowConsumerPolicy
+from Utils import *
+
+
+class OutboundQueue:
+    """
+    The messages waiting to be sent to a single client.
+    """
+
+    def __init__(self, client_id: int, client_socket: socket.socket):
+        self.client_id: int = client_id
+        self.socket: socket.socket = client_socket
+
+        self.chunks: collections.deque[memoryview | Iterator[memoryview]] = collections.deque()
+        """
+        The messages waiting to be sent, each is a view of a message shared between every client.
+        May also hold streams, which are only read from once everything before them has been sent.
+        """
+
+        self.num_bytes: int = 0
+        """The number of bytes of messages waiting to be sent, counted towards the high water mark."""
+
+        self.num_stream_bytes: int = 0
+        """
+        The number of bytes left of the chunk read from a stream at the front, if any.
+        Kept apart from self.num_bytes, so a stream never counts towards the high water mark.
+        """
+
+        self.is_front_from_stream: bool = False
+        """True if the first chunk was read from a stream."""
+
+        self.is_front_partially_sent: bool = False
+        """True if the first chunk has been partially sent or is part of a stream, so must not be dropped."""
+
+        self.num_dropped: int = 0
+        """The number of messages dropped due to the high water mark."""
+
+        self.is_waiting_for_writable: bool = False
+        """True if the socket is registered with the flusher to be notified when it becomes writable."""
+
+        self.has_failed: bool = False
+        """True once sending has failed or the client has been disconnected for being too slow."""
+
+
+class Broadcaster:
+    """
+    Sends messages to many clients without a slow client delaying the rest.
+
+    A message is encoded once and a view of it is queued for each client.
+    Queues are flushed with non-blocking sends, anything left over is sent by an internal thread once the socket becomes
+    writable.
+    A client whose queue grows past the high water mark is dealt with according to the slow consumer policy.
+
+    The client sockets must be non-blocking.
+    A client that fails is shut down, rather than closed, so that its handler notices and cleans up as normal.
+    """
+
+    def __init__(self, high_water_mark: int = 1024 * 1024,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.DISCONNECT):
+        """
+        :param high_water_mark: The number of bytes a client may have queued before the slow consumer policy applies.
+        :param slow_consumer_policy: What to do with a client whose queue is over the high water mark.
+        """
+
+        self.high_water_mark: int = high_water_mark
+        self.slow_consumer_policy: SlowConsumerPolicy = slow_consumer_policy
+
+        self.modifier_lock: threading.Lock = threading.Lock()
+        """A lock that must be acquired before modifying self.client_id_to_queue or any queue."""
+
+        self.client_id_to_queue: dict[int, OutboundQueue] = {}
+
+        self.selector: selectors.BaseSelector = selectors.DefaultSelector()
+        """The selector used to wait for sockets with queued messages to become writable."""
+
+        self.flusher_stop_event: WakeableEvent = WakeableEvent()
+        self.flusher_thread: threading.Thread | None = None
+
+        # Registering the stop event wakes the selector as soon as the flusher is told to stop
+        self.selector.register(self.flusher_stop_event, selectors.EVENT_READ, None)
+
+    def add_client(self, client_id: int, client_socket: socket.socket) -> None:
+        """
+        Starts sending broadcasts to the given client.
+
+        :param client_id: The id of the client.
+        :param client_socket: The non-blocking socket connection to the client.
+        """
+
+        with self.modifier_lock:
+            self.client_id_to_queue[client_id] = OutboundQueue(client_id, client_socket)
+
+    def remove_client(self, client_id: int) -> None:
+        """
+        Stops sending to the given client and discards anything queued for it.
+        Must be called before the socket is closed.
+
+        :param client_id: The id of the client.
+        """
+
+        with self.modifier_lock:
+            outbound_queue = self.client_id_to_queue.pop(client_id, None)
+
+            if outbound_queue is not None:
+                self._stop_waiting_for_writable(outbound_queue)
+
+    def queue_depths(self) -> dict[int, int]:
+        """
+        The number of bytes waiting to be sent to each client, including the rest of any chunk read from a stream.
+
+        :return: A dictionary of client ids to the number of bytes queued.
+        """
+
+        with self.modifier_lock:
+            return {
+                client_id: outbound_queue.num_bytes + outbound_queue.num_stream_bytes
+                for client_id, outbound_queue in self.client_id_to_queue.items()
+            }
+
+    def broadcast(self, data: bytes, client_ids: Iterable[int] | None = None) -> None:
+        """
+        Queues the data to be sent to each client, then sends as much as can be sent without blocking.
+        The data must not be modified afterwards, it is shared between every client until sent.
+
+        :param data: The encoded message.
+        :param client_ids: The clients to send to, every client if None.
+        """
+
+        view = memoryview(data)
+
+        with self.modifier_lock:
+            if client_ids is None:
+                outbound_queues = list(self.client_id_to_queue.values())
+            else:
+                outbound_queues = [
+                    self.client_id_to_queue[client_id] for client_id in client_ids
+                    if client_id in self.client_id_to_queue
+                ]
+
+            for outbound_queue in outbound_queues:
+                self._enqueue(outbound_queue, view)
+
+    def send(self, client_id: int, data: bytes) -> None:
+        """
+        Queues the data to be sent to a single client.
+
+        :param client_id: The id of the client.
+        :param data: The encoded message.
+        """
+
+        self.broadcast(data, (client_id,))
+
+    def send_stream(self, client_id: int, chunks: Iterable[bytes | memoryview]) -> None:
+        """
+        Queues a large message to be sent to a single client a chunk at a time.
+        Each chunk is only taken from the iterable once everything queued before it has been sent, so at most one
+        chunk is held for the client at a time, and the stream never counts towards the high water mark.
+        Chunks must not be modified until sent.
+
+        :param client_id: The id of the client.
+        :param chunks: The chunks of the message in order.
+        """
+
+        with self.modifier_lock:
+            outbound_queue = self.client_id_to_queue.get(client_id)
+
+            if outbound_queue is None or outbound_queue.has_failed:
+                return
+
+            outbound_queue.chunks.append(iter(chunks))
+            self._flush(outbound_queue)
+
+    def _enqueue(self, outbound_queue: OutboundQueue, view: memoryview) -> None:
+        """
+        Adds the view to the queue and flushes it.
+        The modifier lock must be held.
+        """
+
+        if outbound_queue.has_failed:
+            return
+
+        outbound_queue.chunks.append(view)
+        outbound_queue.num_bytes += len(view)
+
+        self._flush(outbound_queue)
+
+        if outbound_queue.num_bytes > self.high_water_mark:
+            self._handle_slow_consumer(outbound_queue)
+
+    def _flush(self, outbound_queue: OutboundQueue) -> None:
+        """
+        Sends as much of the queue as can be sent without blocking.
+        The modifier lock must be held.
+        """
+
+        chunks = outbound_queue.chunks
+
+        while chunks:
+            chunk = chunks[0]
+
+            if not isinstance(chunk, memoryview):
+                # Reading the next chunk of the stream at the front, which must not be dropped once read
+                try:
+                    chunk = memoryview(next(chunk))
+                except StopIteration:
+                    chunks.popleft()
+                    continue
+
+                chunks.appendleft(chunk)
+                outbound_queue.num_stream_bytes = len(chunk)
+                outbound_queue.is_front_from_stream = True
+                outbound_queue.is_front_partially_sent = True
+
+            try:
+                num_sent = outbound_queue.socket.send(chunk)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                Logger.log(f"Sending to client id {outbound_queue.client_id} caused error '{e}'")
+                self._fail(outbound_queue)
+                return
+
+            if outbound_queue.is_front_from_stream:
+                outbound_queue.num_stream_bytes -= num_sent
+            else:
+                outbound_queue.num_bytes -= num_sent
+
+            if num_sent < len(chunk):
+                chunks[0] = chunk[num_sent:]
+                outbound_queue.is_front_partially_sent = True
+                break
+
+            chunks.popleft()
+            outbound_queue.is_front_partially_sent = False
+            outbound_queue.is_front_from_stream = False
+
+        if chunks:
+            self._start_waiting_for_writable(outbound_queue)
+        else:
+            self._stop_waiting_for_writable(outbound_queue)
+
+    def _handle_slow_consumer(self, outbound_queue: OutboundQueue) -> None:
+        """
+        Applies the slow consumer policy to a queue over the high water mark.
+        The modifier lock must be held.
+        """
+
+        if self.slow_consumer_policy == SlowConsumerPolicy.DISCONNECT:
+            Logger.log(f"Client id {outbound_queue.client_id} has {outbound_queue.num_bytes} bytes queued, "
+                       f"over the high water mark of {self.high_water_mark}, disconnecting")
+            self._fail(outbound_queue)
+            return
+
+        # Dropping whole messages from the front, keeping the newest, any partially sent message and any stream
+        chunks = outbound_queue.chunks
+        index = 1 if outbound_queue.is_front_partially_sent else 0
+        num_dropped = 0
+
+        while outbound_queue.num_bytes > self.high_water_mark and index < len(chunks) - 1:
+            dropped_chunk = chunks[index]
+
+            if not isinstance(dropped_chunk, memoryview):
+                index += 1
+                continue
+
+            del chunks[index]
+            outbound_queue.num_bytes -= len(dropped_chunk)
+            num_dropped += 1
+
+        outbound_queue.num_dropped += num_dropped
+        Logger.log(f"Client id {outbound_queue.client_id} is over the high water mark of {self.high_water_mark}, "
+                   f"dropped {num_dropped} message(s), {outbound_queue.num_bytes} bytes still queued")
+
+    def _fail(self, outbound_queue: OutboundQueue) -> None:
+        """
+        Stops sending to a client and shuts its socket down, so that its handler notices and cleans up.
+        The modifier lock must be held.
+        """
+
+        outbound_queue.has_failed = True
+        outbound_queue.chunks.clear()
+        outbound_queue.num_bytes = 0
+        outbound_queue.num_stream_bytes = 0
+        outbound_queue.is_front_from_stream = False
+        self._stop_waiting_for_writable(outbound_queue)
+
+        try:
+            outbound_queue.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _start_waiting_for_writable(self, outbound_queue: OutboundQueue) -> None:
+        if outbound_queue.is_waiting_for_writable:
+            return
+
+        self.selector.register(outbound_queue.socket, selectors.EVENT_WRITE, outbound_queue)
+        outbound_queue.is_waiting_for_writable = True
+
+    def _stop_waiting_for_writable(self, outbound_queue: OutboundQueue) -> None:
+        if not outbound_queue.is_waiting_for_writable:
+            return
+
+        try:
+            self.selector.unregister(outbound_queue.socket)
+        except (KeyError, ValueError):
+            pass
+        outbound_queue.is_waiting_for_writable = False
+
+    def _flusher(self) -> None:
+        """
+        Sends the rest of any queue once its socket becomes writable.
+        """
+
+        Logger.log("Thread started")
+
+        while not self.flusher_stop_event.is_set():
+            for key, _ in self.selector.select():
+                if key.data is None:
+                    continue
+
+                with self.modifier_lock:
+                    if key.data.is_waiting_for_writable:
+                        self._flush(key.data)
+
+        Logger.log("Thread terminating")
+
+    def start(self) -> None:
+        if self.flusher_thread is not None:
+            return
+
+        Logger.log("Starting flusher thread")
+
+        self.flusher_stop_event.clear()
+
+        self.flusher_thread = threading.Thread(
+            target=self._flusher
+        )
+        self.flusher_thread.start()
+
+    def stop(self) -> None:
+        if self.flusher_thread is None:
+            return
+
+        Logger.log("Stopping flusher thread")
+
+        self.flusher_stop_event.set()
+        self.flusher_thread.join()
+        self.flusher_thread = None
+
+    def close(self) -> None:
+        """
+        Stops the flusher and releases the selector.
+        """
+
+        self.stop()
+        self.selector.close()
+        self.flusher_stop_event.close()
@@ -5,67 +5,234 @@ from ipaddress import IPv4Address
 
 import select
 
+from MapDataReceiver import MapDataReceiver
+from MapGenerator import MapData
 from Utils import *
 
 client_id_list: list[int] = []
 
+client_id_to_position_and_state: dict[int, tuple[int, int, int]] = {}
+"""The latest state, x and y position of every player, while a game is running."""
 
-def server_update_handler(soc: socket.socket, stop_event: threading.Event):
-    global client_id_list
+tick_to_snapshot: dict[int, dict[int, tuple[int, int, int]]] = {}
+"""The most recent snapshots received, any of which the server may use as the baseline of the next."""
+
+map_data: MapData | None = None
+"""The map received from the server, once the server has confirmed its checksum."""
+
+received_map_data: MapData | None = None
+"""The map most recently received from the server, while waiting for the server to confirm its checksum."""
+
+
+def handle_frame(frame: Frame) -> bool:
+    """
+    Handles a single message from the server while not in a game.
+
+    :param frame: The message.
+    :return: True if the message starts a game, otherwise False.
+    """
+
+    global client_id_list, map_data, received_map_data
+
+    if frame.message_info == ServerMessageInfo.MAP_CHECKSUM_CORRECT:
+        Logger.log("Map received correctly")
+        map_data = received_map_data
+        received_map_data = None
+        return False
+
+    elif frame.message_info == ServerMessageInfo.MAP_CHECKSUM_INCORRECT:
+        Logger.log("Map received incorrectly")
+        received_map_data = None
+        return False
+
+    elif frame.message_info == ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER:
+        client_id_list = ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.unpack_array(frame.array_bytes).tolist()
+
+    elif frame.message_info == ServerMessageInfo.CLIENT_CONNECTED:
+        client_id, = frame.values
+        if client_id not in client_id_list:
+            client_id_list.append(client_id)
+
+    elif frame.message_info == ServerMessageInfo.CLIENT_DISCONNECTED:
+        client_id, = frame.values
+        if client_id in client_id_list:
+            client_id_list.remove(client_id)
+
+    elif frame.message_info == ServerMessageInfo.START_GAME:
+        Logger.log(f"Game started with client ids {client_id_list}")
+        return True
+
+    else:
+        Logger.log(f"Unexpected message {frame.message_info.name}, ignoring")
+        return False
+
+    Logger.log(f"Client id list is now {client_id_list}")
+    return False
+
+
+def handle_position_and_state_data(data: bytes) -> bool:
+    """
+    Handles the position and state data of every player.
+
+    :param data: The records of every player.
+    :return: True if the data marks the end of the game, otherwise False.
+    """
+
+    if PositionAndState.is_end_game(data):
+        Logger.log("Game ended")
+        client_id_to_position_and_state.clear()
+        return True
+
+    for client_id, state, x, y in PositionAndState.unpack_all(data):
+        client_id_to_position_and_state[client_id] = (state, x, y)
+
+    return False
+
+
+def handle_map_data(soc: socket.socket, map_data_receiver: MapDataReceiver) -> None:
+    """
+    Handles a completely received map, sending its checksum to the server.
+
+    :param soc: The socket to send the checksum on.
+    :param map_data_receiver: The receiver of the map.
+    """
+
+    global received_map_data
+
+    Logger.log(f"Received {map_data_receiver.map_data.width}x{map_data_receiver.map_data.height} map "
+               f"with checksum {map_data_receiver.crc32:08x}")
+
+    received_map_data = map_data_receiver.map_data
+
+    soc.sendall(
+        ClientMessageInfo.MAP_CHECKSUM.create_bytes(map_data_receiver.crc32)
+    )
+
+
+def handle_snapshot(soc: socket.socket, frame: Frame) -> bool:
+    """
+    Handles a snapshot of the position and state of every player, acknowledging it to the server.
+
+    :param soc: The socket to send the acknowledgement on.
+    :param frame: The message, must be a SNAPSHOT.
+    :return: True if the snapshot marks the end of the game, otherwise False.
+    :raises ValueError: If the snapshot cannot be decoded.
+    """
+
+    global client_id_to_position_and_state
+
+    if frame.message_info != ServerMessageInfo.SNAPSHOT:
+        Logger.log(f"Unexpected message {frame.message_info.name} during a game, ignoring")
+        return False
+
+    tick, baseline_tick, encoding, _ = frame.values
+
+    if not tick:
+        Logger.log("Game ended")
+        client_id_to_position_and_state = {}
+        tick_to_snapshot.clear()
+        return True
+
+    if baseline_tick and baseline_tick not in tick_to_snapshot:
+        raise ValueError(f"Snapshot {tick} uses unknown baseline {baseline_tick}")
+
+    snapshot = SnapshotCodec.decode(
+        frame.array_bytes, SnapshotEncoding(encoding), tick_to_snapshot.get(baseline_tick, {})
+    )
+
+    tick_to_snapshot[tick] = snapshot
+    tick_to_snapshot.pop(tick - SnapshotCodec.history_length, None)
+    client_id_to_position_and_state = snapshot
+
+    soc.sendall(
+        ClientMessageInfo.SNAPSHOT_ACK.create_bytes(tick)
+    )
+
+    return False
+
+
+def server_update_handler(soc: socket.socket, stop_event: WakeableEvent, features: Features = Features.NONE):
+    """
+    Handles any messages being sent to the client from the server.
+
+    :param soc: The socket connection to the server.
+    :param stop_event: Set to stop handling messages.
+    :param features: The features accepted by the server during the handshake.
+    """
 
     Logger.log("Thread started")
 
-    while not stop_event.is_set():
-        readable, _, _ = select.select([soc], [], [], 0.1)
+    decoder = FrameDecoder(ServerMessageInfo)
 
-        if not readable:
-            continue
+    is_in_game = False
+    """True once the start game message has been received, until the end game data has been received."""
 
-        Logger.log("Reading indicator int from socket")
-        try:
-            indicator_int = IndicatorInt.read_from_socket(soc)
-        except struct.error:
-            Logger.log("Error unpacking struct, closing socket")
-            soc.close()
-            break
+    map_data_receiver: MapDataReceiver | None = None
+    """Receives the map data following a MAP_DATA or COMPRESSED_MAP_DATA message, until it has all been received."""
 
-        if indicator_int != ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.value:
-            Logger.log(f"Incorrect indicator int {hex(indicator_int)}, closing socket")
-            soc.close()
+    while True:
+        select.select([soc, stop_event], [], [])
+
+        if stop_event.is_set():
             break
 
-        Logger.log("Reading the number of client ids from the socket")
-        connected_client_ids_len_bytes = soc.recv(ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.size_in_bytes)
         try:
-            connected_client_ids_len, = struct.unpack(
-                ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.format_string,
-                connected_client_ids_len_bytes
-            )
-        except struct.error:
-            Logger.log("Error unpacking bytes, closing socket")
-            soc.close()
-            break
+            decoder.fill(soc)
 
-        format_str = "I" * connected_client_ids_len
+            while True:
+                if map_data_receiver is not None:
+                    # Checksumming the map data as it arrives, rather than waiting for all of it
+                    map_data_receiver.feed(decoder.take_bytes(map_data_receiver.num_remaining))
+                    if not map_data_receiver.is_complete:
+                        break
 
-        connected_client_ids_bytes = soc.recv(
-            struct.calcsize(format_str)
-        )
-        try:
-            connected_client_ids = struct.unpack(format_str, connected_client_ids_bytes)
-        except struct.error:
-            Logger.log("Error unpacking bytes, closing socket")
+                    handle_map_data(soc, map_data_receiver)
+                    map_data_receiver = None
+
+                elif is_in_game and Features.SNAPSHOT_DELTA in features:
+                    frame = decoder.next_frame()
+                    if frame is None:
+                        break
+
+                    is_in_game = not handle_snapshot(soc, frame)
+
+                elif is_in_game:
+                    # The position and state data has no indicator, its size is fixed by the players in the game
+                    data = decoder.next_bytes(PositionAndState.size_in_bytes * len(client_id_list))
+                    if data is None:
+                        break
+
+                    is_in_game = not handle_position_and_state_data(data)
+
+                else:
+                    frame = decoder.next_frame()
+                    if frame is None:
+                        break
+
+                    if frame.message_info in (ServerMessageInfo.MAP_DATA, ServerMessageInfo.COMPRESSED_MAP_DATA):
+                        map_data_receiver = MapDataReceiver(*frame.values)
+                    else:
+                        is_in_game = handle_frame(frame)
+
+        except (OSError, ValueError) as e:
+            Logger.log(f"Received error '{e}', closing socket")
             soc.close()
             break
 
-        client_id_list = list(connected_client_ids)
+    Logger.log("Thread exiting")
 
-        Logger.log(f"Client id list is now {client_id_list}")
 
-    Logger.log("Thread exiting")
+def connect(ip: IPv4Address, port: int,
+            requested_features: Features = Features.NONE) -> tuple[socket.socket, int, Features] | None:
+    """
+    Connects to the server and completes the handshake.
 
+    :param ip: The ip of the server.
+    :param port: The port of the server.
+    :param requested_features: The features to request, if none the handshake is exactly as in the specification.
+    :return: The socket, the client id and the features accepted by the server, None if unable to connect.
+    """
 
-def connect(ip: IPv4Address, port: int) -> tuple[socket.socket, int] | None:
     Logger.log(f"Attempting connection to server at address {ip}:{port}")
     soc = socket.socket()
     soc.settimeout(2)
@@ -78,9 +245,14 @@ def connect(ip: IPv4Address, port: int) -> tuple[socket.socket, int] | None:
     soc.settimeout(None)
 
     Logger.log("Sending new connection request")
-    soc.sendall(
-        ClientMessageInfo.NEW_CONNECTION_REQUEST.create_bytes()
-    )
+    if requested_features:
+        soc.sendall(
+            ClientMessageInfo.NEW_CONNECTION_REQUEST_WITH_FEATURES.create_bytes(requested_features)
+        )
+    else:
+        soc.sendall(
+            ClientMessageInfo.NEW_CONNECTION_REQUEST.create_bytes()
+        )
 
     Logger.log("Reading indicator int")
     try:
@@ -97,16 +269,14 @@ def connect(ip: IPv4Address, port: int) -> tuple[socket.socket, int] | None:
 
     Logger.log("Reading client id")
     try:
-        client_id_bytes = soc.recv(ServerMessageInfo.CLIENT_ID.size_in_bytes)
+        client_id_bytes = read_n_bytes_from_soc(soc, ServerMessageInfo.CLIENT_ID.size_in_bytes)
     except OSError as e:
         Logger.log(f"Received error '{e}', closing socket")
         soc.close()
         return None
 
     try:
-        client_id, = struct.unpack(
-            ServerMessageInfo.CLIENT_ID.format_string, client_id_bytes
-        )
+        client_id, = ServerMessageInfo.CLIENT_ID.unpack(client_id_bytes)
     except struct.error as e:
         Logger.log(f"Received error '{e}', closing socket")
         soc.close()
@@ -114,31 +284,50 @@ def connect(ip: IPv4Address, port: int) -> tuple[socket.socket, int] | None:
 
     Logger.log(f"Received client id {client_id}")
 
-    return soc, client_id
+    if not requested_features:
+        return soc, client_id, Features.NONE
+
+    Logger.log("Reading accepted features")
+    try:
+        indicator_int = IndicatorInt.read_from_socket(soc)
+
+        if indicator_int != ServerMessageInfo.ACCEPTED_FEATURES.value:
+            raise ValueError(f"Incorrect indicator int {hex(indicator_int)}")
+
+        accepted_features, = ServerMessageInfo.ACCEPTED_FEATURES.unpack(
+            read_n_bytes_from_soc(soc, ServerMessageInfo.ACCEPTED_FEATURES.size_in_bytes)
+        )
+    except (OSError, ValueError, struct.error) as e:
+        Logger.log(f"Received error '{e}', closing socket")
+        soc.close()
+        return None
+
+    accepted_features = Features(accepted_features)
+    Logger.log(f"Server accepted features {accepted_features!r}")
 
+    return soc, client_id, accepted_features
 
-def main(ip: IPv4Address, port: int) -> None:
-    result = connect(ip, port)
+
+def main(ip: IPv4Address, port: int,
+         requested_features: Features = (Features.SNAPSHOT_DELTA | Features.INT16_RELATIVE_POSITIONS
+                                         | Features.COMPRESSED_MAP_DATA | Features.CLIENT_ID_DELTAS)) -> None:
+    result = connect(ip, port, requested_features)
 
     if result is None:
         Logger.log("Error connecting to server")
         return
 
-    soc, client_id = result
+    soc, client_id, features = result
 
     Logger.log("Starting server update handler thread")
-    server_update_handler_stop_event = threading.Event()
+    server_update_handler_stop_event = WakeableEvent()
     server_update_handler_thread = threading.Thread(
         target=server_update_handler,
-        args=(soc, server_update_handler_stop_event)
+        args=(soc, server_update_handler_stop_event, features)
     )
     server_update_handler_thread.start()
 
-    try:
-        while True:
-            pass
-    except KeyboardInterrupt:
-        pass
+    wait_for_shutdown_signal()
 
     Logger.log("Notifying server of disconnect")
     soc.sendall(
@@ -150,6 +339,7 @@ def main(ip: IPv4Address, port: int) -> None:
     server_update_handler_stop_event.set()
     Logger.log("Joining server update handler thread")
     server_update_handler_thread.join()
+    server_update_handler_stop_event.close()
 
     Logger.log("Closing client socket")
     soc.close()
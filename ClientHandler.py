@@ -1,10 +1,12 @@
 import queue
 import socket
-import struct
 import threading
 
 import select
 
+from Broadcaster import Broadcaster
+from GameTicker import GameTicker
+from Reactor import Reactor
 from UpdaterTask import UpdaterTask
 from UpdaterTaskTypes import UpdaterTaskTypes
 from Utils import *
@@ -15,17 +17,26 @@ class ClientHandler(Logger):
     A class to manage a single client.
 
     Maintains a thread to update information being sent from the client.
+    If a reactor is given, the socket is registered with the reactor instead of using a thread of its own.
     """
 
     def __init__(self,
                  client_id: int,
                  client_socket: socket.socket, client_address: tuple[str, int],
-                 updater_queue: queue.Queue[UpdaterTask]):
+                 updater_queue: queue.Queue[UpdaterTask],
+                 reactor: Reactor | None = None,
+                 broadcaster: Broadcaster | None = None,
+                 game_ticker: GameTicker | None = None,
+                 features: Features = Features.NONE):
         """
         :param client_id: The id of the client to be handled.
         :param client_socket: The socket connection to the client.
         :param client_address: The address of the client.
         :param updater_queue: The queue to put tasks in pertaining information to be sent to other clients.
+        :param reactor: The reactor to register the socket with, if None a thread is used instead.
+        :param broadcaster: The broadcaster sending to this client, the client is removed from it when closed.
+        :param game_ticker: The game ticker to pass the position and state of the client to.
+        :param features: The features accepted for the client during the handshake.
         """
 
         self.log(f"Creating client handler for id {client_id} at {client_address[0]}:{client_address[1]}")
@@ -39,9 +50,21 @@ class ClientHandler(Logger):
 
         self.updater_queue: queue.Queue[UpdaterTask] = updater_queue
 
-        self._handler_stop_event: threading.Event = threading.Event()
+        self.decoder: FrameDecoder = FrameDecoder(ClientMessageInfo)
+        """Splits the bytes received from the client into messages."""
+
+        self._handler_stop_event: WakeableEvent | None = None
         self._handler_thread: threading.Thread | None = None
 
+        self.reactor: Reactor | None = reactor
+        self._is_registered: bool = False
+
+        self.broadcaster: Broadcaster | None = broadcaster
+
+        self.game_ticker: GameTicker | None = game_ticker
+
+        self.features: Features = features
+
     @property
     def is_alive(self) -> bool:
         """
@@ -52,32 +75,61 @@ class ClientHandler(Logger):
 
         return self._is_alive
 
-    def _handler(self) -> None:
+    def _handle_frame(self, frame: Frame) -> bool:
         """
-        Handles any messages being sent to the server from the client.
+        Handles a single message from the client.
+
+        :param frame: The message.
+        :return: True if the client should continue to be handled, otherwise False.
         """
 
-        Logger.log("Thread started")
+        if frame.message_info == ClientMessageInfo.WILL_DISCONNECT:
+            self.log("Client will disconnect")
+            return False
 
-        while not self._handler_stop_event.is_set():
-            readable, _, _ = select.select([self.socket], [], [], 0.1)
+        elif frame.message_info == ClientMessageInfo.POSITION_AND_STATE and self.game_ticker is not None:
+            self.game_ticker.update_position_and_state(self.client_id, *frame.values)
+            return True
 
-            if not readable:
-                continue
+        elif frame.message_info == ClientMessageInfo.SNAPSHOT_ACK and self.game_ticker is not None:
+            self.game_ticker.acknowledge_snapshot(self.client_id, *frame.values)
+            return True
 
-            try:
-                indicator_int = IndicatorInt.read_from_socket(self.socket)
-            except (OSError, struct.error) as e:
-                self.log(f"Received error '{e}'")
-                break
+        elif frame.message_info == ClientMessageInfo.MAP_CHECKSUM:
+            self.updater_queue.put(UpdaterTask(UpdaterTaskTypes.MAP_CHECKSUM_RECEIVED, self.client_id, *frame.values))
+            return True
 
-            if indicator_int == ClientMessageInfo.WILL_DISCONNECT.value:
-                self.log("Client will disconnect")
-                break
+        else:
+            self.log(f"Received unhandled message {frame.message_info.name}")
+            return False
 
-            else:
-                self.log(f"Received unknown/unhandled indicator int {hex(indicator_int)}")
-                break
+    def _handle_messages(self) -> bool:
+        """
+        Reads everything available from the readable socket and handles every complete message.
+
+        :return: True if the client should continue to be handled, otherwise False.
+        """
+
+        try:
+            self.decoder.fill(self.socket)
+
+            for frame in self.decoder.frames():
+                if not self._handle_frame(frame):
+                    return False
+
+        except (OSError, ValueError) as e:
+            self.log(f"Received error '{e}'")
+            return False
+
+        return True
+
+    def _close(self) -> None:
+        """
+        Closes the socket, marks this client as 'dead' and notifies the updater.
+        """
+
+        if self.broadcaster is not None:
+            self.broadcaster.remove_client(self.client_id)
 
         Logger.log("Closing socket")
         self.socket.close()
@@ -85,19 +137,60 @@ class ClientHandler(Logger):
 
         self.updater_queue.put(UpdaterTask(UpdaterTaskTypes.NUM_CLIENTS_CHANGED))
 
+    def _handler(self) -> None:
+        """
+        Handles any messages being sent to the server from the client.
+        """
+
+        Logger.log("Thread started")
+
+        while True:
+            select.select([self.socket, self._handler_stop_event], [], [])
+
+            if self._handler_stop_event.is_set():
+                break
+
+            if not self._handle_messages():
+                break
+
+        self._close()
+
         self.log("Thread terminating")
 
+    def _on_readable(self, _: socket.socket) -> None:
+        """
+        Called by the reactor when the socket is readable.
+        """
+
+        if self._handle_messages():
+            return
+
+        self.reactor.unregister(self.socket)
+        self._is_registered = False
+        self._close()
+
     def start(self) -> None:
         """
         Starts the internal thread to handle any messages received from the client.
+        If using a reactor, registers the socket with the reactor instead.
         """
 
+        if self.reactor is not None:
+            if self._is_registered or not self._is_alive:
+                return
+
+            self.log("Registering client handler with reactor")
+
+            self._is_registered = True
+            self.reactor.register(self.socket, self._on_readable)
+            return
+
         if self._handler_thread is not None:
             return
 
         self.log("Starting client handler")
 
-        self._handler_stop_event.clear()
+        self._handler_stop_event = WakeableEvent()
 
         self._handler_thread = threading.Thread(
             target=self._handler
@@ -107,8 +200,19 @@ class ClientHandler(Logger):
     def stop(self) -> None:
         """
         Stops the internal thread to handle any messages received from the client.
+        If using a reactor, unregisters the socket from the reactor instead.
         """
 
+        if self.reactor is not None:
+            if not self._is_registered:
+                return
+
+            self.log("Unregistering client handler from reactor")
+
+            self.reactor.unregister(self.socket)
+            self._is_registered = False
+            return
+
         if self._handler_thread is None:
             return
 
@@ -117,3 +221,6 @@ class ClientHandler(Logger):
         self._handler_stop_event.set()
         self._handler_thread.join()
         self._handler_thread = None
+
+        self._handler_stop_event.close()
+        self._handler_stop_event = None
@@ -1,9 +1,15 @@
 import queue
 import socket
-import struct
 import threading
+import time
+from typing import Iterable, Iterator
 
+from Broadcaster import Broadcaster
 from ClientHandler import ClientHandler
+from GameTicker import GameTicker
+from MapGenerator import CachedMap
+from Reactor import Reactor
+from SlowConsumerPolicy import SlowConsumerPolicy
 from UpdaterTask import UpdaterTask
 from UpdaterTaskTypes import UpdaterTaskTypes
 from Utils import *
@@ -14,9 +20,31 @@ class ClientHandlerManager:
     A class to manage all client connections to the server.
 
     Manages threads to update information sent from the client to the server.
+    If a reactor is given, every client is driven by that reactor instead of a thread per client.
     """
 
-    def __init__(self):
+    def __init__(self, reactor: Reactor | None = None,
+                 high_water_mark: int = 1024 * 1024,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.DISCONNECT,
+                 coalesce_window: float = 0.01,
+                 tick_rate: float = 30,
+                 map_chunk_size: int = 64 * 1024,
+                 max_map_attempts: int = 3,
+                 max_move_distance: int | None = None):
+        """
+        :param reactor: The reactor to drive the client sockets with, if None each client gets its own thread.
+        :param high_water_mark: The number of bytes a client may have queued before the slow consumer policy applies.
+        :param slow_consumer_policy: What to do with a client that is not keeping up with what is sent to it.
+        :param coalesce_window:
+            The number of seconds the updater waits after a task for more tasks to arrive, duplicates are merged.
+        :param tick_rate: The number of times per second the position and state data is sent during a game.
+        :param map_chunk_size: The number of bytes of map data sent to a client at a time.
+        :param max_map_attempts: The number of times a map is sent to a client before it is disconnected.
+        :param max_move_distance:
+            The furthest a player may move along either axis in a tick, if None there is no limit.
+            Only checked in games started with a map.
+        """
+
         self.modifier_lock: threading.Lock = threading.Lock()
         """A lock that must be acquired before modifying self.client_handlers"""
 
@@ -26,25 +54,70 @@ class ClientHandlerManager:
         self.updater_tasks: queue.Queue[UpdaterTask] = queue.Queue()
         """A queue of tasks for which contain information pertaining how to update clients."""
 
-        self.updater_stop_event: threading.Event = threading.Event()
         self.updater_thread: threading.Thread | None = None
 
-    def handle_client(self, client_id: int, client_socket: socket.socket, client_address: tuple[str, int]) -> None:
+        self.reactor: Reactor | None = reactor
+        """The reactor shared by all client handlers, None if using a thread per client."""
+
+        self.broadcaster: Broadcaster = Broadcaster(high_water_mark, slow_consumer_policy)
+        """Sends messages to the clients without a slow client holding up the rest."""
+
+        self.game_ticker: GameTicker = GameTicker(self.broadcaster, tick_rate, max_move_distance=max_move_distance)
+        """Sends the position and state data of every player while a game is running."""
+
+        self.map_chunk_size: int = map_chunk_size
+        self.max_map_attempts: int = max_map_attempts
+
+        self.client_id_to_map_transfer: dict[int, tuple[CachedMap, int]] = {}
+        """
+        A dictionary of the ids of clients yet to confirm they received the map, to the map and the number of times it
+        has been sent.
+        """
+
+        self.coalesce_window: float = coalesce_window
+
+        self.send_deltas: bool = slow_consumer_policy == SlowConsumerPolicy.DISCONNECT
+        """
+        If True, clients that received the last update and accepted Features.CLIENT_ID_DELTAS are sent connected and
+        disconnected notifications when smaller than the full list of client ids.
+        Only safe if a client never has messages dropped.
+        """
+
+        self.last_broadcast_client_ids: tuple[int, ...] = ()
+        """The client ids sent in the last update."""
+
+        self.num_tasks_received: int = 0
+        """The number of tasks taken from self.updater_tasks."""
+        self.num_tasks_merged: int = 0
+        """The number of tasks that were duplicates of another task handled at the same time."""
+        self.num_bytes_saved: int = 0
+        """The number of bytes not sent due to sending notifications instead of the full list of client ids."""
+
+    def handle_client(self, client_id: int, client_socket: socket.socket, client_address: tuple[str, int],
+                      features: Features = Features.NONE) -> None:
         """
         Sets up and starts a client handler for the given client with id, socket and address.
 
         :param client_id: The id of the client to be handled.
         :param client_socket: The socket connection to the client to be handled.
         :param client_address: The address of the client to be handled.
+        :param features: The features accepted for the client during the handshake.
         """
 
         Logger.log(f"Handling client with id {client_id} at address {client_address[0]}:{client_address[1]}")
 
-        client_handler = ClientHandler(client_id, client_socket, client_address, self.updater_tasks)
+        client_socket.setblocking(False)
+
+        client_handler = ClientHandler(
+            client_id, client_socket, client_address, self.updater_tasks, self.reactor, self.broadcaster,
+            self.game_ticker, features
+        )
 
         with self.modifier_lock:
             self.client_id_to_handler[client_id] = client_handler
 
+        self.broadcaster.add_client(client_id, client_socket)
+
         self.updater_tasks.put(UpdaterTask(UpdaterTaskTypes.NUM_CLIENTS_CHANGED))
 
         client_handler.start()
@@ -61,9 +134,20 @@ class ClientHandlerManager:
             return
 
         self.client_id_to_handler[client_id].stop()
+        self.broadcaster.remove_client(client_id)
 
         with self.modifier_lock:
             del self.client_id_to_handler[client_id]
+            self.client_id_to_map_transfer.pop(client_id, None)
+
+    def queue_depths(self) -> dict[int, int]:
+        """
+        The number of bytes waiting to be sent to each client.
+
+        :return: A dictionary of client ids to the number of bytes queued.
+        """
+
+        return self.broadcaster.queue_depths()
 
     def __handle_num_clients_changed(self) -> None:
         """
@@ -72,6 +156,8 @@ class ClientHandlerManager:
         """
 
         Logger.log("Finding and removing any 'dead' clients")
+
+        # Holding the lock throughout, so the update cannot be sent to a client after a game has started for it
         with self.modifier_lock:
             dead_client_ids = [
                 client_id for client_id, handler in self.client_id_to_handler.items() if not handler.is_alive
@@ -79,60 +165,259 @@ class ClientHandlerManager:
 
             for client_id in dead_client_ids:
                 self.client_id_to_handler[client_id].stop()
+                self.broadcaster.remove_client(client_id)
                 del self.client_id_to_handler[client_id]
+                self.client_id_to_map_transfer.pop(client_id, None)
 
             client_id_tuple = tuple(self.client_id_to_handler.keys())
-            client_handler_tuple = tuple(self.client_id_to_handler.values())
-        client_id_tuple_len = len(client_id_tuple)
-
-        Logger.log("Creating message to send")
-        bytes_to_send = \
-            ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.create_bytes(client_id_tuple_len) \
-            + struct.pack("I" * client_id_tuple_len, *client_id_tuple)
-
-        Logger.log("Sending bytes")
-        need_to_re_update = False
-        client_handler: ClientHandler
-        for client_handler, client_id in zip(client_handler_tuple, client_id_tuple):
+
+            Logger.log("Creating message to send")
+            full_bytes = ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.create_bytes_with_array(client_id_tuple)
+
+            previous_client_ids = set(self.last_broadcast_client_ids)
+            self.last_broadcast_client_ids = client_id_tuple
+
+            # Players in a running game only expect position and state data
+            player_ids = set(self.game_ticker.player_ids)
+            recipient_ids = [client_id for client_id in client_id_tuple if client_id not in player_ids]
+
+            # Clients that received the last update and accepted the deltas only need to know what changed
+            up_to_date_client_ids = []
+            full_list_client_ids = []
+            for client_id in recipient_ids:
+                if (client_id in previous_client_ids
+                        and Features.CLIENT_ID_DELTAS in self.client_id_to_handler[client_id].features):
+                    up_to_date_client_ids.append(client_id)
+                else:
+                    full_list_client_ids.append(client_id)
+
+            delta_bytes = b"".join(
+                [ServerMessageInfo.CLIENT_DISCONNECTED.create_bytes(client_id)
+                 for client_id in previous_client_ids.difference(client_id_tuple)]
+                + [ServerMessageInfo.CLIENT_CONNECTED.create_bytes(client_id)
+                   for client_id in client_id_tuple if client_id not in previous_client_ids]
+            )
+
+            # Any client that cannot be sent to is shut down by the broadcaster
+            # Its handler then closes it and adds another NUM_CLIENTS_CHANGED task
+            Logger.log("Broadcasting bytes")
+
+            if self.send_deltas and len(delta_bytes) < len(full_bytes):
+                self.num_bytes_saved += (len(full_bytes) - len(delta_bytes)) * len(up_to_date_client_ids)
+
+                if delta_bytes:
+                    self.broadcaster.broadcast(delta_bytes, up_to_date_client_ids)
+                self.broadcaster.broadcast(full_bytes, full_list_client_ids)
+
+            else:
+                self.broadcaster.broadcast(full_bytes, recipient_ids)
+
+    def _map_data_chunks(self, cached_map: CachedMap, features: Features) -> Iterator[bytes | memoryview]:
+        """
+        Splits the map data message into chunks, each a view of the map rather than a copy.
+        Clients that accepted Features.COMPRESSED_MAP_DATA are sent the compressed map, shared between every client.
+        """
+
+        map_data = cached_map.map_data
+
+        # Compressing now if needed, rather than while the broadcaster reads the first chunk holding its lock
+        if Features.COMPRESSED_MAP_DATA in features:
+            buffer = cached_map.compressed_buffer
+            header = ServerMessageInfo.COMPRESSED_MAP_DATA.create_bytes(map_data.width, map_data.height, len(buffer))
+        else:
+            buffer = map_data.buffer
+            header = ServerMessageInfo.MAP_DATA.create_bytes(map_data.width, map_data.height)
+
+        def chunks() -> Iterator[bytes | memoryview]:
+            yield header
+
+            with memoryview(buffer) as view:
+                for start in range(0, len(view), self.map_chunk_size):
+                    yield view[start:start + self.map_chunk_size]
+
+        return chunks()
+
+    def send_map(self, cached_map: CachedMap, client_ids: Iterable[int] | None = None) -> None:
+        """
+        Streams the map to each client, a chunk at a time, then waits for them to reply with its checksum.
+        The map must not be modified.
+
+        :param cached_map: The map to send.
+        :param client_ids: The clients to send to, every client if None.
+        """
+
+        with self.modifier_lock:
+            if client_ids is None:
+                client_ids = tuple(self.client_id_to_handler.keys())
+
+            for client_id in client_ids:
+                client_handler = self.client_id_to_handler.get(client_id)
+                if client_handler is None:
+                    continue
+
+                Logger.log(f"Sending map to client id {client_id}")
+
+                self.client_id_to_map_transfer[client_id] = (cached_map, 1)
+                self.broadcaster.send_stream(client_id, self._map_data_chunks(cached_map, client_handler.features))
+
+    def __handle_map_checksum_received(self, client_id: int, checksum: int) -> None:
+        """
+        Tells the client if the checksum of the map it received is correct, sending the map again if not.
+        """
+
+        with self.modifier_lock:
+            map_transfer = self.client_id_to_map_transfer.get(client_id)
+
+            if map_transfer is None:
+                Logger.log(f"Client id {client_id} sent a map checksum without being sent a map, ignoring")
+                return
+
+            cached_map, num_attempts = map_transfer
+
+            if checksum == cached_map.crc32:
+                Logger.log(f"Client id {client_id} received the map correctly")
+                del self.client_id_to_map_transfer[client_id]
+                self.broadcaster.send(client_id, ServerMessageInfo.MAP_CHECKSUM_CORRECT.create_bytes())
+                return
+
+            self.broadcaster.send(client_id, ServerMessageInfo.MAP_CHECKSUM_INCORRECT.create_bytes())
+
+            if num_attempts >= self.max_map_attempts:
+                Logger.log(f"Client id {client_id} failed to receive the map {num_attempts} times, disconnecting")
+                del self.client_id_to_map_transfer[client_id]
+                self.client_id_to_handler[client_id].socket.shutdown(socket.SHUT_RDWR)
+                return
+
+            Logger.log(f"Client id {client_id} sent incorrect map checksum {checksum:08x}, sending the map again")
+            self.client_id_to_map_transfer[client_id] = (cached_map, num_attempts + 1)
+            self.broadcaster.send_stream(
+                client_id, self._map_data_chunks(cached_map, self.client_id_to_handler[client_id].features)
+            )
+
+    def start_game(self, cached_map: CachedMap | None = None) -> None:
+        """
+        Starts a game with every connected client.
+        Each is sent the list of players followed by the start game message, then only position and state data.
+
+        :param cached_map: The map the game is played on, whose walls every move is checked against, if None moves are
+            not checked.
+        """
+
+        with self.modifier_lock:
+            if self.game_ticker.is_running:
+                return
+
+            player_ids = tuple(self.client_id_to_handler.keys())
+
+            Logger.log(f"Starting game with client ids {player_ids}")
+
+            # Sending the players in the same order as their records, so each client knows the size of the data
+            self.broadcaster.broadcast(
+                ServerMessageInfo.CONNECTED_CLIENT_IDS_HEADER.create_bytes_with_array(player_ids)
+                + ServerMessageInfo.START_GAME.create_bytes(),
+                player_ids
+            )
+
+            self.game_ticker.start(
+                player_ids,
+                {client_id: self.client_id_to_handler[client_id].features for client_id in player_ids},
+                None if cached_map is None else cached_map.movement_validator
+            )
+
+    def end_game(self) -> None:
+        """
+        Ends the running game, if any, then updates every client with the list of client ids.
+        """
+
+        with self.modifier_lock:
+            if not self.game_ticker.is_running:
+                return
+
+            Logger.log("Ending game")
+
+            self.game_ticker.stop()
+
+            # The players missed any updates during the game, so every client is sent the full list
+            self.last_broadcast_client_ids = ()
+
+        self.updater_tasks.put(UpdaterTask(UpdaterTaskTypes.NUM_CLIENTS_CHANGED))
+
+    def _get_coalesced_tasks(self) -> list[UpdaterTask]:
+        """
+        Blocks until a task is available, then collects any more tasks arriving within the coalesce window.
+        Duplicate tasks without data are merged, as they would each do the same work.
+        Tasks with data each describe a separate event, so are never merged.
+
+        :return: The tasks to handle in order, without duplicates.
+        """
+
+        tasks = [self.updater_tasks.get()]
+
+        deadline = time.monotonic() + self.coalesce_window
+        while tasks[-1].task != UpdaterTaskTypes.STOP:
             try:
-                client_handler.socket.sendall(bytes_to_send)
-            except OSError as e:
-                Logger.log(f"Sending to client id {client_id} caused error '{e}'")
-                client_handler.socket.close()
-                with self.modifier_lock:
-                    del self.client_id_to_handler[client_id]
-                need_to_re_update = True
+                remaining = deadline - time.monotonic()
+
+                if remaining > 0:
+                    tasks.append(self.updater_tasks.get(timeout=remaining))
+                else:
+                    tasks.append(self.updater_tasks.get_nowait())
+
+            except queue.Empty:
+                break
+
+        self.num_tasks_received += len(tasks)
+
+        task_types = set()
+        unique_tasks = []
+
+        for task in tasks:
+            if not task.data:
+                if task.task in task_types:
+                    continue
+
+                task_types.add(task.task)
 
-        if need_to_re_update:
-            Logger.log("Re-adding NUM_CLIENTS_CHANGED task")
-            self.updater_tasks.put(UpdaterTask(UpdaterTaskTypes.NUM_CLIENTS_CHANGED))
+            unique_tasks.append(task)
+
+        self.num_tasks_merged += len(tasks) - len(unique_tasks)
+
+        return unique_tasks
 
     def updater(self) -> None:
 
         Logger.log("Thread started")
 
-        while not self.updater_stop_event.is_set():
-            try:
-                task = self.updater_tasks.get(timeout=0.1)
-            except queue.Empty:
-                continue
+        is_stopping = False
 
-            if task.task == UpdaterTaskTypes.NUM_CLIENTS_CHANGED:
-                Logger.log("Handling NUM_CLIENTS_CHANGED")
-                self.__handle_num_clients_changed()
+        while not is_stopping:
+            for task in self._get_coalesced_tasks():
+                if task.task == UpdaterTaskTypes.STOP:
+                    is_stopping = True
+                    break
 
-            else:
-                Logger.log(f"Encountered unknown task '{task.task}'")
+                elif task.task == UpdaterTaskTypes.NUM_CLIENTS_CHANGED:
+                    Logger.log("Handling NUM_CLIENTS_CHANGED")
+                    self.__handle_num_clients_changed()
+
+                elif task.task == UpdaterTaskTypes.MAP_CHECKSUM_RECEIVED:
+                    Logger.log("Handling MAP_CHECKSUM_RECEIVED")
+                    self.__handle_map_checksum_received(*task.data)
+
+                else:
+                    Logger.log(f"Encountered unknown task '{task.task}'")
 
+        Logger.log(f"Updater stats: received {self.num_tasks_received} tasks, merged {self.num_tasks_merged}, "
+                   f"saved {self.num_bytes_saved} bytes")
         Logger.log("Thread terminating")
 
     def start(self) -> None:
         if self.updater_thread is not None:
             return
 
-        Logger.log("Starting updater thread")
+        self.broadcaster.start()
 
-        self.updater_stop_event.clear()
+        Logger.log("Starting updater thread")
 
         self.updater_thread = threading.Thread(
             target=self.updater
@@ -145,16 +430,23 @@ class ClientHandlerManager:
 
         Logger.log("Stopping updater thread")
 
-        self.updater_stop_event.set()
+        self.updater_tasks.put(UpdaterTask(UpdaterTaskTypes.STOP))
         self.updater_thread.join()
         self.updater_thread = None
 
+        self.broadcaster.stop()
+
     def shutdown(self) -> None:
         Logger.log("Shutting down")
 
+        self.end_game()
         self.stop()
 
         with self.modifier_lock:
-            for client_handler in self.client_id_to_handler.values():
-                client_handler.socket.close()
+            for client_id, client_handler in self.client_id_to_handler.items():
                 client_handler.stop()
+                self.broadcaster.remove_client(client_id)
+                client_handler.socket.close()
+
+        self.game_ticker.close()
+        self.broadcaster.close()
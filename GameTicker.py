@@ -0,0 +1,432 @@
+import threading
+import time
+
+from Broadcaster import Broadcaster
+from MapGenerator import MovementValidator
+from SpatialHash import SpatialHash
+from Utils import *
+
+
+class TickStats:
+    """
+    Timings describing how the game ticker is keeping up with its tick rate.
+    """
+
+    def __init__(self):
+        self.num_ticks: int = 0
+
+        self.num_overruns: int = 0
+        """The number of ticks that finished after the next tick was due."""
+        self.num_skipped_ticks: int = 0
+        """The number of ticks not run at all, due to falling more than a whole tick behind."""
+
+        self.total_encode_time: float = 0
+        self.max_encode_time: float = 0
+        """The time taken to pack every record into the buffer."""
+
+        self.total_send_time: float = 0
+        self.max_send_time: float = 0
+        """The time taken to queue and flush the buffer to every player."""
+
+        self.total_bytes: int = 0
+        """The number of bytes queued to be sent to every player combined."""
+
+        self.num_rejected_moves: int = 0
+        """The number of positions ignored for not being a legal move from the last position of the player."""
+
+    def add_tick(self, encode_time: float, send_time: float, num_bytes: int) -> None:
+        self.num_ticks += 1
+        self.total_bytes += num_bytes
+        self.total_encode_time += encode_time
+        self.max_encode_time = max(self.max_encode_time, encode_time)
+        self.total_send_time += send_time
+        self.max_send_time = max(self.max_send_time, send_time)
+
+    @property
+    def mean_encode_time(self) -> float:
+        return self.total_encode_time / self.num_ticks if self.num_ticks else 0
+
+    @property
+    def mean_send_time(self) -> float:
+        return self.total_send_time / self.num_ticks if self.num_ticks else 0
+
+    @property
+    def mean_bytes(self) -> float:
+        return self.total_bytes / self.num_ticks if self.num_ticks else 0
+
+    def __str__(self) -> str:
+        return (f"{self.num_ticks} ticks, {self.num_overruns} overruns, {self.num_skipped_ticks} skipped, "
+                f"encode mean/max {self.mean_encode_time * 1000:.3f}/{self.max_encode_time * 1000:.3f} ms, "
+                f"send mean/max {self.mean_send_time * 1000:.3f}/{self.max_send_time * 1000:.3f} ms, "
+                f"{self.mean_bytes:.0f} bytes per tick, {self.num_rejected_moves} rejected moves")
+
+
+class GameTicker:
+    """
+    Broadcasts the position and state data of every player at a fixed rate while a game is running.
+
+    Players send their positions whenever they like, only the latest is kept.
+    Each tick packs the record of every player into a single preallocated buffer, which is broadcast to every player.
+    Ticks are scheduled against the monotonic clock, so a slow tick does not delay every tick after it.
+
+    Players that accepted Features.SNAPSHOT_DELTA are instead sent SNAPSHOT messages, holding only the records changed
+    since the last snapshot they acknowledged.
+    Players acknowledging the same snapshot share a single encoded message.
+
+    If the game has a movement validator, the positions received are only taken at the start of each tick, all checked
+    at once, and any that are not a legal move from the last position of the player are ignored.
+
+    The positions are also kept in a spatial hash, so the players near each other can be found without checking every
+    pair of players.
+    """
+
+    def __init__(self, broadcaster: Broadcaster, tick_rate: float = 30, report_interval: float = 10,
+                 max_move_distance: int | None = None):
+        """
+        :param broadcaster: The broadcaster used to send to the players.
+        :param tick_rate: The number of ticks per second.
+        :param report_interval: The number of seconds between logging the stats while a game is running.
+        :param max_move_distance:
+            The furthest a player may move along either axis in a tick, if None there is no limit.
+            Only checked in games with a movement validator.
+        """
+
+        self.broadcaster: Broadcaster = broadcaster
+
+        self.tick_interval: float = 1 / tick_rate
+        self.report_interval: float = report_interval
+        self.max_move_distance: int | None = max_move_distance
+
+        self.modifier_lock: threading.Lock = threading.Lock()
+        """A lock that must be acquired before modifying the players, their positions or the snapshots."""
+
+        self.player_ids: tuple[int, ...] = ()
+        """The ids of the clients in the current game, in the order their records are sent."""
+
+        self.player_id_to_position_and_state: dict[int, tuple[int, int, int]] = {}
+        """A dictionary of player ids to their latest state, x and y position."""
+
+        self.movement_validator: MovementValidator | None = None
+        """Checks the moves of the players across the map of the current game, None if moves are not checked."""
+
+        self.player_id_to_pending_position: dict[int, tuple[int, int, int]] = {}
+        """The latest state and position of each player, not yet checked by the movement validator."""
+
+        self.placed_player_ids: set[int] = set()
+        """The ids of the players with a checked position, the first position of any other is only checked to be open."""
+
+        self.spatial_hash: SpatialHash = SpatialHash()
+        """The latest position of every player, updated along with self.player_id_to_position_and_state."""
+
+        self.spec_player_ids: tuple[int, ...] = ()
+        """The ids of the players sent the position and state data as in the specification."""
+
+        self.player_id_to_features: dict[int, Features] = {}
+
+        self.player_id_to_acked_tick: dict[int, int] = {}
+        """A dictionary of the ids of players sent snapshots to the latest tick they acknowledged, 0 if none."""
+
+        self.tick: int = 0
+        """The number of the latest tick, starting from 1."""
+
+        self.tick_to_snapshot: dict[int, dict[int, tuple[int, int, int]]] = {}
+        """The snapshots of the most recent ticks, kept while players using snapshots may acknowledge them."""
+
+        self.buffer: bytearray = bytearray()
+        """Holds the records of every player, allocated once per game."""
+
+        self.stats: TickStats = TickStats()
+
+        self.ticker_stop_event: WakeableEvent = WakeableEvent()
+        self.ticker_thread: threading.Thread | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.ticker_thread is not None
+
+    def update_position_and_state(self, client_id: int, state: int, x: int, y: int) -> None:
+        """
+        Records the latest position and state of a player, to be sent on the next tick.
+        Ignored if the client is not in the current game.
+        If the game has a movement validator, the position is only checked and taken at the start of the next tick.
+
+        :param client_id: The id of the client.
+        :param state: The state of the client.
+        :param x: The x position of the client.
+        :param y: The y position of the client.
+        """
+
+        with self.modifier_lock:
+            if client_id not in self.player_id_to_position_and_state:
+                return
+
+            if self.movement_validator is not None:
+                self.player_id_to_pending_position[client_id] = (state, x, y)
+                return
+
+            self.player_id_to_position_and_state[client_id] = (state, x, y)
+            self.spatial_hash.update(client_id, x, y)
+
+    def _apply_pending_positions(self) -> None:
+        """
+        Checks every pending position with the movement validator in a single batch, taking only the legal moves.
+        The modifier lock must be held.
+        """
+
+        pending_positions = self.player_id_to_pending_position
+        self.player_id_to_pending_position = {}
+
+        moves = []
+        for client_id, (_, x, y) in pending_positions.items():
+            if client_id in self.placed_player_ids:
+                _, last_x, last_y = self.player_id_to_position_and_state[client_id]
+                moves.append((last_x, last_y, x, y))
+            else:
+                # A player has nowhere to move from until placed, so the first position is only checked to be open
+                moves.append((x, y, x, y))
+
+        is_legal = self.movement_validator.validate_moves(moves, self.max_move_distance)
+
+        for (client_id, position_and_state), is_move_legal in zip(pending_positions.items(), is_legal):
+            if not is_move_legal:
+                self.stats.num_rejected_moves += 1
+                continue
+
+            self.player_id_to_position_and_state[client_id] = position_and_state
+            self.placed_player_ids.add(client_id)
+            self.spatial_hash.update(client_id, position_and_state[1], position_and_state[2])
+
+    def players_within(self, radius: float) -> list[tuple[int, int]]:
+        """
+        Finds the players in the current game close enough to each other, for example a seeker and the hiders it tags.
+
+        :param radius: The furthest apart the players can be, inclusive, in map cells.
+        :return: Each pair of player ids, once, in no particular order.
+        """
+
+        with self.modifier_lock:
+            return self.spatial_hash.pairs_within(radius)
+
+    def nearest_player(self, client_id: int, max_radius: float | None = None) -> tuple[int, float] | None:
+        """
+        :param client_id: The id of the client.
+        :param max_radius: The furthest the other player can be, in map cells, if None there is no limit.
+        :return: The id of the nearest other player in the current game and its distance, None if there is none.
+        """
+
+        with self.modifier_lock:
+            position = self.spatial_hash.id_to_position.get(client_id)
+
+            if position is None:
+                return None
+
+            return self.spatial_hash.nearest(*position, client_id, max_radius)
+
+    def acknowledge_snapshot(self, client_id: int, tick: int) -> None:
+        """
+        Records that a player has received the snapshot of the given tick, so it can be used as their baseline.
+
+        :param client_id: The id of the client.
+        :param tick: The tick of the snapshot.
+        """
+
+        with self.modifier_lock:
+            acked_tick = self.player_id_to_acked_tick.get(client_id)
+
+            if acked_tick is not None and acked_tick < tick <= self.tick:
+                self.player_id_to_acked_tick[client_id] = tick
+
+    def _encode_snapshots(self, snapshot: dict[int, tuple[int, int, int]]) -> list[tuple[bytes, list[int]]]:
+        """
+        Encodes the snapshot for every player using snapshots, once per distinct baseline and encoding.
+        The modifier lock must be held.
+
+        :param snapshot: The snapshot of this tick.
+        :return: Each encoded message and the players to send it to.
+        """
+
+        baseline_to_player_ids: dict[tuple[int, bool], list[int]] = {}
+
+        for client_id, acked_tick in self.player_id_to_acked_tick.items():
+            if acked_tick not in self.tick_to_snapshot:
+                acked_tick = 0
+
+            allow_int16_relative = Features.INT16_RELATIVE_POSITIONS in self.player_id_to_features[client_id]
+            baseline_to_player_ids.setdefault((acked_tick, allow_int16_relative), []).append(client_id)
+
+        messages = []
+
+        for (baseline_tick, allow_int16_relative), player_ids in baseline_to_player_ids.items():
+            encoding, payload = SnapshotCodec.encode(
+                snapshot, self.tick_to_snapshot.get(baseline_tick, {}), allow_int16_relative
+            )
+
+            messages.append((
+                ServerMessageInfo.SNAPSHOT.create_bytes(self.tick, baseline_tick, encoding, len(payload)) + payload,
+                player_ids
+            ))
+
+        return messages
+
+    def _tick(self) -> None:
+        """
+        Packs the record of every player into the buffer and encodes the snapshots, then broadcasts them.
+        """
+
+        encode_start = time.perf_counter()
+
+        with self.modifier_lock:
+            self.tick += 1
+
+            if self.player_id_to_pending_position:
+                self._apply_pending_positions()
+
+            snapshot = dict(self.player_id_to_position_and_state)
+
+            messages = []
+
+            if self.spec_player_ids:
+                offset = 0
+                for client_id in self.player_ids:
+                    offset = PositionAndState.pack_into(self.buffer, offset, client_id, *snapshot[client_id])
+
+                # The broadcaster keeps a view of the data until sent, so the buffer is copied before it is reused
+                messages.append((bytes(self.buffer), self.spec_player_ids))
+
+            if self.player_id_to_acked_tick:
+                messages.extend(self._encode_snapshots(snapshot))
+
+                self.tick_to_snapshot[self.tick] = snapshot
+                self.tick_to_snapshot.pop(self.tick - SnapshotCodec.history_length, None)
+
+        send_start = time.perf_counter()
+        for data, player_ids in messages:
+            self.broadcaster.broadcast(data, player_ids)
+        send_end = time.perf_counter()
+
+        self.stats.add_tick(
+            send_start - encode_start, send_end - send_start,
+            sum(len(data) * len(player_ids) for data, player_ids in messages)
+        )
+
+    def _ticker(self) -> None:
+        """
+        Runs a tick every tick interval until stopped.
+        """
+
+        Logger.log("Thread started")
+
+        next_tick = time.monotonic()
+        next_report = next_tick + self.report_interval
+
+        while True:
+            self._tick()
+
+            next_tick += self.tick_interval
+            now = time.monotonic()
+
+            if now > next_tick:
+                self.stats.num_overruns += 1
+
+                # Running the missed ticks back to back would only send stale data, so skipping to the next due tick
+                num_missed_ticks = int((now - next_tick) / self.tick_interval)
+                self.stats.num_skipped_ticks += num_missed_ticks
+                next_tick += num_missed_ticks * self.tick_interval
+
+            if now >= next_report:
+                next_report += self.report_interval
+                Logger.log(f"Tick stats: {self.stats}")
+
+            if self.ticker_stop_event.wait(max(next_tick - now, 0)):
+                break
+
+        Logger.log("Thread terminating")
+
+    def start(self, player_ids: tuple[int, ...], player_id_to_features: dict[int, Features] | None = None,
+              movement_validator: MovementValidator | None = None) -> None:
+        """
+        Starts a game with the given players.
+        The start game message must already have been sent to them.
+
+        :param player_ids: The ids of the clients in the game.
+        :param player_id_to_features: The features accepted for each player, if None no player uses any.
+        :param movement_validator: Checks the moves of the players across the map of the game, if None every position
+            is taken as sent.
+        """
+
+        if self.ticker_thread is not None:
+            return
+
+        Logger.log(f"Starting ticker thread with {len(player_ids)} players")
+
+        with self.modifier_lock:
+            self.player_ids = player_ids
+            self.player_id_to_position_and_state = {client_id: (0, 0, 0) for client_id in player_ids}
+            self.movement_validator = movement_validator
+            self.player_id_to_pending_position = {}
+            self.placed_player_ids = set()
+            self.spatial_hash.clear()
+            for client_id in player_ids:
+                self.spatial_hash.update(client_id, 0, 0)
+            self.buffer = bytearray(PositionAndState.size_in_bytes * len(player_ids))
+
+            self.player_id_to_features = {
+                client_id: Features.NONE if player_id_to_features is None else player_id_to_features[client_id]
+                for client_id in player_ids
+            }
+            self.spec_player_ids = tuple(
+                client_id for client_id in player_ids
+                if Features.SNAPSHOT_DELTA not in self.player_id_to_features[client_id]
+            )
+            self.player_id_to_acked_tick = {
+                client_id: 0 for client_id in player_ids
+                if Features.SNAPSHOT_DELTA in self.player_id_to_features[client_id]
+            }
+
+            self.tick = 0
+            self.tick_to_snapshot = {}
+
+        self.stats = TickStats()
+        self.ticker_stop_event.clear()
+
+        self.ticker_thread = threading.Thread(
+            target=self._ticker
+        )
+        self.ticker_thread.start()
+
+    def stop(self) -> None:
+        """
+        Ends the game, sending the end game data to every player.
+        """
+
+        if self.ticker_thread is None:
+            return
+
+        Logger.log("Stopping ticker thread")
+
+        self.ticker_stop_event.set()
+        self.ticker_thread.join()
+        self.ticker_thread = None
+
+        self.broadcaster.broadcast(bytes(len(self.buffer)), self.spec_player_ids)
+        self.broadcaster.broadcast(
+            ServerMessageInfo.SNAPSHOT.create_bytes(0, 0, SnapshotEncoding.FULL, 0), self.player_id_to_acked_tick
+        )
+
+        Logger.log(f"Tick stats: {self.stats}")
+
+        with self.modifier_lock:
+            self.player_ids = ()
+            self.player_id_to_position_and_state = {}
+            self.movement_validator = None
+            self.player_id_to_pending_position = {}
+            self.placed_player_ids = set()
+            self.spatial_hash.clear()
+            self.spec_player_ids = ()
+            self.player_id_to_features = {}
+            self.player_id_to_acked_tick = {}
+            self.tick_to_snapshot = {}
+
+    def close(self) -> None:
+        self.stop()
+        self.ticker_stop_event.close()
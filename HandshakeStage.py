@@ -0,0 +1,371 @@
+import collections
+import itertools
+import selectors
+import socket
+import threading
+import time
+
+from ClientHandlerManager import ClientHandlerManager
+from Utils import *
+
+
+class PendingHandshake:
+    """
+    A newly accepted client that has not yet completed the handshake.
+    """
+
+    def __init__(self, client_socket: socket.socket, client_address: tuple[str, int], timeout: float):
+        self.socket: socket.socket = client_socket
+        self.address: tuple[str, int] = client_address
+
+        self.accepted_at: float = time.monotonic()
+        """The monotonic time the client was accepted at."""
+        self.deadline: float = self.accepted_at + timeout
+        """The monotonic time by which the handshake must be completed."""
+
+        self.is_done: bool = False
+        """True once the handshake has either been completed or abandoned."""
+
+        self.received: bytearray = bytearray()
+        """The bytes of the connection request received so far."""
+
+
+class HandshakeStats:
+    """
+    Counters describing how the handshake stage is performing.
+    """
+
+    def __init__(self):
+        self.started_at: float = time.monotonic()
+
+        self.num_accepted: int = 0
+        """The number of sockets accepted."""
+        self.num_completed: int = 0
+        """The number of handshakes completed and handed over to the client handler manager."""
+        self.num_rejected: int = 0
+        """The number of handshakes that failed due to a bad message or a socket error."""
+        self.num_timed_out: int = 0
+        """The number of handshakes that did not complete before their deadline."""
+
+        self.total_latency: float = 0
+        self.min_latency: float = float("inf")
+        self.max_latency: float = 0
+
+    def add_latency(self, latency: float) -> None:
+        self.num_completed += 1
+        self.total_latency += latency
+        self.min_latency = min(self.min_latency, latency)
+        self.max_latency = max(self.max_latency, latency)
+
+    @property
+    def accept_rate(self) -> float:
+        """The number of sockets accepted per second since the stats were created."""
+
+        return self.num_accepted / max(time.monotonic() - self.started_at, 1e-9)
+
+    @property
+    def mean_latency(self) -> float:
+        """The mean time in seconds from accepting a socket to completing its handshake."""
+
+        return self.total_latency / self.num_completed if self.num_completed else 0
+
+    def __str__(self) -> str:
+        if not self.num_completed:
+            latency = "n/a"
+        else:
+            latency = f"{self.min_latency * 1000:.2f}/{self.mean_latency * 1000:.2f}/{self.max_latency * 1000:.2f} ms"
+
+        return (f"accepted {self.num_accepted} ({self.accept_rate:.1f}/s), completed {self.num_completed}, "
+                f"rejected {self.num_rejected}, timed out {self.num_timed_out}, "
+                f"handshake latency min/mean/max {latency}")
+
+
+class HandshakeStage:
+    """
+    Performs the new connection handshake for many clients concurrently.
+
+    Sockets are accepted in bulk and handed to an internal thread that waits on all pending handshakes at once.
+    Each handshake has a deadline, so a client that never sends its request cannot hold up any other client.
+    Completed clients are handed over to the client handler manager.
+    """
+
+    def __init__(self, client_handler_manager: ClientHandlerManager,
+                 handshake_timeout: float = 2, report_interval: float = 10,
+                 supported_features: Features = (Features.SNAPSHOT_DELTA | Features.INT16_RELATIVE_POSITIONS
+                                                 | Features.COMPRESSED_MAP_DATA | Features.CLIENT_ID_DELTAS)):
+        """
+        :param client_handler_manager: The manager to hand clients to once their handshake is complete.
+        :param handshake_timeout: The number of seconds a client has to complete the handshake.
+        :param report_interval: The number of seconds between logging the stats, if any clients were accepted.
+        :param supported_features: The features accepted if a client requests them.
+        """
+
+        self.client_handler_manager: ClientHandlerManager = client_handler_manager
+
+        self.handshake_timeout: float = handshake_timeout
+        self.report_interval: float = report_interval
+        self.supported_features: Features = supported_features
+
+        self.client_ids = itertools.count(1)
+        """Where the ids for new clients are taken from."""
+
+        self.stats: HandshakeStats = HandshakeStats()
+
+        self.selector: selectors.BaseSelector = selectors.DefaultSelector()
+        """The selector used to wait on every pending handshake."""
+
+        self.modifier_lock: threading.Lock = threading.Lock()
+        """A lock that must be acquired before modifying self.pending or self.selector."""
+
+        self.pending: collections.deque[PendingHandshake] = collections.deque()
+        """Every pending handshake in order of deadline, may contain handshakes that are already done."""
+
+        self.handshaker_stop_event: WakeableEvent = WakeableEvent()
+        self.handshaker_thread: threading.Thread | None = None
+
+        # Registering the stop event wakes the selector as soon as the stage is told to stop
+        self.selector.register(self.handshaker_stop_event, selectors.EVENT_READ, None)
+
+    def accept_all(self, soc: socket.socket) -> int:
+        """
+        Accepts every client waiting on the listening socket and begins their handshakes.
+        The listening socket must be non-blocking.
+
+        :param soc: The listening socket.
+        :return: The number of clients accepted.
+        """
+
+        num_accepted = 0
+
+        while True:
+            try:
+                client_socket, client_address = soc.accept()
+            except BlockingIOError:
+                break
+            except OSError as e:
+                Logger.log(f"Accepting caused error '{e}'")
+                break
+
+            self.submit(client_socket, client_address)
+            num_accepted += 1
+
+        return num_accepted
+
+    def submit(self, client_socket: socket.socket, client_address: tuple[str, int]) -> None:
+        """
+        Begins the handshake for an accepted client.
+
+        :param client_socket: The socket connection to the client.
+        :param client_address: The address of the client.
+        """
+
+        client_socket.setblocking(False)
+        pending_handshake = PendingHandshake(client_socket, client_address, self.handshake_timeout)
+
+        with self.modifier_lock:
+            self.stats.num_accepted += 1
+            self.pending.append(pending_handshake)
+            self.selector.register(client_socket, selectors.EVENT_READ, pending_handshake)
+
+    def _abandon(self, pending_handshake: PendingHandshake) -> None:
+        """
+        Stops waiting on the given handshake and closes its socket.
+        """
+
+        with self.modifier_lock:
+            self.selector.unregister(pending_handshake.socket)
+        pending_handshake.is_done = True
+        pending_handshake.socket.close()
+
+    def _read_request(self, pending_handshake: PendingHandshake) -> ClientMessageInfo | None:
+        """
+        Reads as much of the connection request as is available, without reading past the end of it.
+
+        :return: The type of request once it has been completely received, otherwise None.
+        :raises OSError: If the socket errors or has been closed by the other end.
+        :raises ValueError: If the client sent something other than a connection request.
+        """
+
+        received = pending_handshake.received
+
+        while True:
+            if not received:
+                num_needed = IndicatorInt.size_in_bytes
+            else:
+                message_info = ClientMessageInfo(received[0])
+
+                if message_info not in (ClientMessageInfo.NEW_CONNECTION_REQUEST,
+                                        ClientMessageInfo.NEW_CONNECTION_REQUEST_WITH_FEATURES):
+                    raise ValueError(f"Incorrect indicator int {hex(received[0])}")
+
+                num_needed = IndicatorInt.size_in_bytes + message_info.size_in_bytes
+
+                if len(received) == num_needed:
+                    return message_info
+
+            try:
+                data = pending_handshake.socket.recv(num_needed - len(received))
+            except BlockingIOError:
+                return None
+
+            if not data:
+                raise OSError("Client closed the connection")
+
+            received += data
+
+    def _handshake(self, pending_handshake: PendingHandshake) -> None:
+        """
+        Reads the new connection request from a readable client, then sends its client id and hands it over.
+        """
+
+        address = f"{pending_handshake.address[0]}:{pending_handshake.address[1]}"
+
+        try:
+            message_info = self._read_request(pending_handshake)
+        except (OSError, ValueError) as e:
+            Logger.log(f"Client at {address} caused error '{e}', closing socket")
+            self.stats.num_rejected += 1
+            self._abandon(pending_handshake)
+            return
+
+        if message_info is None:
+            return
+
+        client_id = next(self.client_ids)
+        bytes_to_send = ServerMessageInfo.CLIENT_ID.create_bytes(client_id)
+
+        accepted_features = Features.NONE
+        if message_info == ClientMessageInfo.NEW_CONNECTION_REQUEST_WITH_FEATURES:
+            requested_features, = message_info.unpack(pending_handshake.received, IndicatorInt.size_in_bytes)
+            accepted_features = Features(requested_features) & self.supported_features
+
+            if Features.SNAPSHOT_DELTA not in accepted_features:
+                accepted_features &= ~Features.INT16_RELATIVE_POSITIONS
+
+            bytes_to_send += ServerMessageInfo.ACCEPTED_FEATURES.create_bytes(accepted_features)
+
+        # The send buffer of a new socket has plenty of space, so the message is sent whole or not at all
+        try:
+            num_sent = pending_handshake.socket.send(bytes_to_send)
+        except OSError as e:
+            num_sent = 0
+            Logger.log(f"Sending client id {client_id} to {address} caused error '{e}'")
+
+        if num_sent != len(bytes_to_send):
+            self.stats.num_rejected += 1
+            self._abandon(pending_handshake)
+            return
+
+        with self.modifier_lock:
+            self.selector.unregister(pending_handshake.socket)
+        pending_handshake.is_done = True
+
+        self.stats.add_latency(time.monotonic() - pending_handshake.accepted_at)
+
+        self.client_handler_manager.handle_client(
+            client_id, pending_handshake.socket, pending_handshake.address, accepted_features
+        )
+
+    def _expire(self, now: float) -> float | None:
+        """
+        Abandons any handshakes past their deadline.
+
+        :param now: The current monotonic time.
+        :return: The earliest deadline still pending, None if there are no pending handshakes.
+        """
+
+        while True:
+            with self.modifier_lock:
+                if not self.pending:
+                    return None
+
+                pending_handshake = self.pending[0]
+
+                if not pending_handshake.is_done and pending_handshake.deadline > now:
+                    return pending_handshake.deadline
+
+                self.pending.popleft()
+
+            if pending_handshake.is_done:
+                continue
+
+            Logger.log(f"Client at {pending_handshake.address[0]}:{pending_handshake.address[1]} "
+                       f"did not complete the handshake in time, closing socket")
+            self.stats.num_timed_out += 1
+            self._abandon(pending_handshake)
+
+    def _handshaker(self) -> None:
+        """
+        Waits on all pending handshakes at once, completing or expiring them.
+        """
+
+        Logger.log("Thread started")
+
+        next_report = time.monotonic() + self.report_interval
+        last_reported_num_accepted = 0
+
+        while not self.handshaker_stop_event.is_set():
+            now = time.monotonic()
+            earliest_deadline = self._expire(now)
+
+            # Only waking for the next deadline or stats report, the stop event wakes the selector itself
+            wake_at = next_report if earliest_deadline is None else min(next_report, earliest_deadline)
+
+            for key, _ in self.selector.select(wake_at - now):
+                if key.data is not None and not key.data.is_done:
+                    self._handshake(key.data)
+
+            if time.monotonic() >= next_report:
+                next_report += self.report_interval
+
+                if self.stats.num_accepted != last_reported_num_accepted:
+                    last_reported_num_accepted = self.stats.num_accepted
+                    Logger.log(f"Handshake stats: {self.stats}")
+
+        Logger.log("Thread terminating")
+
+    def start(self) -> None:
+        if self.handshaker_thread is not None:
+            return
+
+        Logger.log("Starting handshaker thread")
+
+        self.handshaker_stop_event.clear()
+
+        self.handshaker_thread = threading.Thread(
+            target=self._handshaker
+        )
+        self.handshaker_thread.start()
+
+    def stop(self) -> None:
+        if self.handshaker_thread is None:
+            return
+
+        Logger.log("Stopping handshaker thread")
+
+        self.handshaker_stop_event.set()
+        self.handshaker_thread.join()
+        self.handshaker_thread = None
+
+    def shutdown(self) -> None:
+        """
+        Stops the handshaker thread and closes every socket with a pending handshake.
+        """
+
+        Logger.log("Shutting down")
+
+        self.stop()
+
+        with self.modifier_lock:
+            pending_handshakes = [
+                pending_handshake for pending_handshake in self.pending if not pending_handshake.is_done
+            ]
+            self.pending.clear()
+
+        for pending_handshake in pending_handshakes:
+            self._abandon(pending_handshake)
+
+        self.selector.close()
+        self.handshaker_stop_event.close()
+
+        Logger.log(f"Handshake stats: {self.stats}")
@@ -0,0 +1,73 @@
+import zlib
+
+from MapGenerator import MapData
+
+
+class MapDataReceiver:
+    """
+    Receives the map data following a MAP_DATA or COMPRESSED_MAP_DATA message as it arrives.
+
+    Each piece is copied, or decompressed, straight into the map and added to the checksum, so the map data is never
+    held twice.
+    """
+
+    def __init__(self, width: int, height: int, num_compressed_bytes: int | None = None):
+        """
+        :param width: The width of the map, from the message.
+        :param height: The height of the map, from the message.
+        :param num_compressed_bytes: The number of compressed bytes, from a COMPRESSED_MAP_DATA message, None if the
+            map data is not compressed.
+        """
+
+        self.map_data: MapData = MapData(width, height)
+
+        self.num_expected: int = len(self.map_data.buffer) if num_compressed_bytes is None else num_compressed_bytes
+        """The number of bytes following the message."""
+
+        self.num_received: int = 0
+        """The number of bytes following the message received so far."""
+
+        self.num_decompressed: int = 0
+        """The number of bytes of map data written to the map so far."""
+
+        self.decompressor = None if num_compressed_bytes is None else zlib.decompressobj()
+        """Decompresses the map data as it arrives, None if the map data is not compressed."""
+
+        self.crc32: int = 0
+        """The checksum of the map data written to the map so far."""
+
+    @property
+    def num_remaining(self) -> int:
+        return self.num_expected - self.num_received
+
+    @property
+    def is_complete(self) -> bool:
+        return not self.num_remaining
+
+    def feed(self, data: bytes) -> None:
+        """
+        Adds the next piece of the bytes following the message.
+
+        :param data: The bytes received, must not be more than the number remaining.
+        :raises ValueError: If there are more bytes than remaining.
+        """
+
+        if len(data) > self.num_remaining:
+            raise ValueError(f"Received {len(data)} bytes of map data, only {self.num_remaining} remaining")
+
+        self.num_received += len(data)
+
+        if self.decompressor is not None:
+            num_missing = len(self.map_data.buffer) - self.num_decompressed
+
+            # Corrupt data, or anything decompressing past the end of the map, is discarded
+            # The checksum then tells the server the map was received incorrectly, so it is sent again
+            try:
+                data = self.decompressor.decompress(data, num_missing) if num_missing else b""
+            except zlib.error:
+                self.num_decompressed = len(self.map_data.buffer)
+                return
+
+        self.map_data.buffer[self.num_decompressed:self.num_decompressed + len(data)] = data
+        self.num_decompressed += len(data)
+        self.crc32 = zlib.crc32(data, self.crc32)
@@ -0,0 +1,68 @@
+import threading
+import zlib
+
+from .MapData import MapData
+from .MovementValidator import MovementValidator
+
+
+class CachedMap:
+    """
+    A generated map held by a MapCache, alongside anything derived from it that is worth keeping.
+    The map must not be modified.
+    """
+
+    compression_level: int = 9
+    """The zlib compression level of the compressed map data, which is only compressed once so may as well be small."""
+
+    def __init__(self, key: str, map_data: MapData, crc32: int):
+        self.key: str = key
+        """The hash of the parameters the map was generated from."""
+
+        self.map_data: MapData = map_data
+
+        self.crc32: int = crc32
+        """The checksum of the map data, as sent to clients."""
+
+        self.compress_lock: threading.Lock = threading.Lock()
+        """A lock that must be acquired before compressing the map, so it is only compressed once."""
+
+        self._compressed_buffer: bytes | None = None
+
+        self.validator_lock: threading.Lock = threading.Lock()
+        """A lock that must be acquired before building the movement validator, so it is only built once."""
+
+        self._movement_validator: MovementValidator | None = None
+
+    @property
+    def compressed_buffer(self) -> bytes:
+        """
+        The map data compressed with zlib, compressed the first time it is needed then kept for every later client.
+        """
+
+        if self._compressed_buffer is None:
+            with self.compress_lock:
+                if self._compressed_buffer is None:
+                    self._compressed_buffer = zlib.compress(self.map_data.buffer, self.compression_level)
+
+        return self._compressed_buffer
+
+    @property
+    def movement_validator(self) -> MovementValidator:
+        """
+        Checks the moves of players across the map, built the first time it is needed then kept for every later game.
+        """
+
+        if self._movement_validator is None:
+            with self.validator_lock:
+                if self._movement_validator is None:
+                    self._movement_validator = MovementValidator(self.map_data)
+
+        return self._movement_validator
+
+    @property
+    def size_in_bytes(self) -> int:
+        """
+        The size of the map data, not including the compressed map data, which is only a fraction of it.
+        """
+
+        return len(self.map_data.buffer)
@@ -0,0 +1,219 @@
+import array
+
+from .MapData import MapData
+from .MazeGenerator import Maze
+from .MazeGenerator.Types import Coords
+
+_DIRECTION_TO_STEP: tuple[Coords, ...] = ((-1, 0), (0, -1), (1, 0), (0, 1))
+"""The change in position of a step in each direction, in the order (left, top, right, bottom)."""
+
+
+class DistanceField:
+    """
+    The shortest distance from every cell or node to a single target, and which way to step to get there, found with a
+    single breadth first search so that every later query is a lookup.
+
+    Steps are taken in one of the four directions, in the order (left, top, right, bottom) as in Node.
+    Built from a MapData, each cell is a position and a step may only move into cells not filled in.
+    Built from a Maze, each node is a position and a step may only cross an accepted side.
+
+    Both are stored with each position at [origin + y * stride + x], for a MapData surrounded by a ring of unused
+    positions so that the search never has to check it is still inside the map.
+    """
+
+    at_target: int = 4
+    """The next step of the target itself."""
+
+    unreachable: int = 255
+    """The next step of a position with no path to the target."""
+
+    def __init__(self, width: int, height: int, target: Coords, padding: int = 0):
+        """
+        Creates a field with every position unreachable, use from_map_data or from_maze instead.
+
+        :param padding: The width of the ring of unused positions around the edge.
+        """
+
+        self.width: int = width
+        self.height: int = height
+
+        self.target: Coords = target
+
+        self.stride: int = width + 2 * padding
+        """The distance between rows of the positions."""
+        self.origin: int = padding * (self.stride + 1)
+        """The index of the position (0, 0)."""
+
+        num_positions = self.stride * (height + 2 * padding)
+
+        self.distances: array.array = array.array("i", [-1]) * num_positions
+        """The number of steps from each position to the target, -1 if unreachable."""
+
+        self.next_steps: bytearray = bytearray([self.unreachable]) * num_positions
+        """The direction of the first step from each position toward the target."""
+
+    @classmethod
+    def from_map_data(cls, map_data: MapData, target: Coords):
+        """
+        :param map_data: The map to search.
+        :param target: The cell to find the paths to.
+        :return: The field.
+        :raises ValueError: If the target is outside of the map or filled in.
+        """
+
+        width, height = map_data.width, map_data.height
+
+        field = cls(width, height, target, 1)
+        field._check_target()
+        stride = field.stride
+
+        # Anything not yet reached and not filled in is 0, the ring around the map is filled in
+        blocked = bytearray([1]) * (stride * (height + 2))
+        for y in range(height):
+            start = field.origin + y * stride
+            blocked[start:start + width] = bytes(map_data.get_row(y))
+
+        if blocked[field._index(*target)]:
+            raise ValueError(f"Target {target} is filled in")
+
+        offsets = (-1, -stride, 1, stride)
+        field._search(lambda index: (
+            (direction, index + offset) for direction, offset in enumerate(offsets)
+            if not blocked[index + offset]
+        ), blocked)
+
+        return field
+
+    @classmethod
+    def from_maze(cls, maze: Maze, target: Coords):
+        """
+        :param maze: The maze to search.
+        :param target: The node to find the paths to.
+        :return: The field.
+        :raises ValueError: If the target is outside of the maze.
+        """
+
+        field = cls(maze.width, maze.height, target)
+        field._check_target()
+
+        cells = maze.cells
+        offsets = (-1, -maze.width, 1, maze.width)
+
+        # A maze never accepts a side on its outer edge, so following accepted sides stays inside it
+        field._search(lambda index: (
+            (direction, index + offsets[direction]) for direction in range(4)
+            if (cells[index] >> (direction * 2)) & 1
+        ), bytearray(len(field.next_steps)))
+
+        return field
+
+    def _check_target(self) -> None:
+        x, y = self.target
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f"Target {self.target} is outside of the map")
+
+    def _index(self, x: int, y: int) -> int:
+        return self.origin + y * self.stride + x
+
+    def _search(self, open_neighbours, reached: bytearray) -> None:
+        """
+        Fills in the field a whole distance at a time, outward from the target.
+
+        :param open_neighbours: Gives the direction and index of each position a step can be taken to from an index.
+        :param reached: Non-zero for each position that has been reached or must never be, updated as positions are.
+        """
+
+        distances = self.distances
+        next_steps = self.next_steps
+
+        start = self._index(*self.target)
+        distances[start] = 0
+        next_steps[start] = self.at_target
+        reached[start] = 1
+
+        frontier = [start]
+        distance = 0
+
+        while frontier:
+            distance += 1
+            next_frontier = []
+
+            for index in frontier:
+                for direction, neighbour in open_neighbours(index):
+                    if reached[neighbour]:
+                        continue
+
+                    reached[neighbour] = 1
+                    distances[neighbour] = distance
+                    # Stepping back the way the search came, which is the opposite direction
+                    next_steps[neighbour] = (direction + 2) & 3
+                    next_frontier.append(neighbour)
+
+            frontier = next_frontier
+
+    @property
+    def size_in_bytes(self) -> int:
+        return self.distances.itemsize * len(self.distances) + len(self.next_steps)
+
+    def distance(self, x: int, y: int) -> int:
+        """
+        :param x: The x coordinate of the position.
+        :param y: The y coordinate of the position.
+        :return: The number of steps to the target, -1 if it cannot be reached.
+        """
+
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Position ({x}, {y}) is outside of the map")
+
+        return self.distances[self.origin + y * self.stride + x]
+
+    def next_step(self, x: int, y: int) -> int:
+        """
+        :param x: The x coordinate of the position.
+        :param y: The y coordinate of the position.
+        :return: The direction of the first step toward the target, at_target or unreachable.
+        """
+
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Position ({x}, {y}) is outside of the map")
+
+        return self.next_steps[self.origin + y * self.stride + x]
+
+    def next_position(self, x: int, y: int) -> Coords | None:
+        """
+        :param x: The x coordinate of the position.
+        :param y: The y coordinate of the position.
+        :return: The position after the first step toward the target, the same position if it is the target, None if
+            it cannot be reached.
+        """
+
+        direction = self.next_step(x, y)
+
+        if direction == self.unreachable:
+            return None
+
+        if direction == self.at_target:
+            return x, y
+
+        step_x, step_y = _DIRECTION_TO_STEP[direction]
+        return x + step_x, y + step_y
+
+    def path(self, x: int, y: int) -> list[Coords] | None:
+        """
+        :param x: The x coordinate of the position.
+        :param y: The y coordinate of the position.
+        :return: Every position from this one to the target, both included, None if it cannot be reached.
+        """
+
+        if self.next_step(x, y) == self.unreachable:
+            return None
+
+        path = [(x, y)]
+
+        while (direction := self.next_steps[self.origin + y * self.stride + x]) != self.at_target:
+            step_x, step_y = _DIRECTION_TO_STEP[direction]
+            x += step_x
+            y += step_y
+            path.append((x, y))
+
+        return path
@@ -0,0 +1,368 @@
+import collections
+import hashlib
+import os
+import queue
+import threading
+import time
+from typing import Callable
+
+from .CachedMap import CachedMap
+from .MapCacheStats import MapCacheStats
+from .MapData import MapData
+from .MazeGenerator import HeapMazeGenerator
+from .MazeGenerator.Types import Coords
+from .generate_map_using_maze import generate_map_using_maze
+
+MapParameters = tuple[int, int, int, int, Coords | None, int]
+"""The width, height, vertical bias, horizontal bias, starting position and seed of a maze."""
+
+
+class MapCache:
+    """
+    Caches maps generated from mazes, so the same map is only generated once.
+
+    Maps are keyed by a hash of the parameters given to the maze generator.
+    The most recently used maps are kept in memory, and every map is saved to disk as a .mapdata file alongside a
+    .crc32 file holding its checksum, both bounded in size with the least recently used maps evicted first.
+    Maps can be pre-warmed by an internal thread, so they are ready by the time they are needed.
+
+    Maps without a seed are random, so are never cached.
+    """
+
+    version: str = "maze-1"
+    """Part of every key, must be changed whenever the maps generated from the same parameters change."""
+
+    def __init__(self, directory: str | None = None,
+                 max_bytes_in_memory: int = 64 * 1024 * 1024, max_bytes_on_disk: int = 1024 * 1024 * 1024,
+                 log: Callable[[str], None] = print):
+        """
+        :param directory: The directory to save maps in, if None maps are only kept in memory.
+        :param max_bytes_in_memory: The total size of the maps kept in memory.
+        :param max_bytes_on_disk: The total size of the maps kept on disk.
+        :param log: Called with each message logged by the pre-warmer, for example Logger.log from the server.
+        """
+
+        self.directory: str | None = directory
+        self.max_bytes_in_memory: int = max_bytes_in_memory
+        self.max_bytes_on_disk: int = max_bytes_on_disk
+
+        self.log: Callable[[str], None] = log
+
+        self.stats: MapCacheStats = MapCacheStats()
+        """Only modified while holding self.modifier_lock, as maps are got from many threads at once."""
+
+        self.modifier_lock: threading.Lock = threading.Lock()
+        """A lock that must be acquired before modifying anything below."""
+
+        self.key_to_cached_map: collections.OrderedDict[str, CachedMap] = collections.OrderedDict()
+        """The maps in memory, from least to most recently used."""
+        self.num_bytes_in_memory: int = 0
+
+        self.key_to_size_on_disk: collections.OrderedDict[str, int] = collections.OrderedDict()
+        """The size of the maps on disk, from least to most recently used."""
+        self.num_bytes_on_disk: int = 0
+
+        self.key_to_generated_event: dict[str, threading.Event] = {}
+        """Events set once a map being generated by another thread is ready, so it is not generated twice."""
+
+        self.prewarm_queue: queue.Queue[MapParameters | None] = queue.Queue()
+        """The parameters of the maps to pre-warm, None to stop the pre-warmer."""
+        self.prewarmer_thread: threading.Thread | None = None
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._scan_directory()
+
+    @classmethod
+    def key(cls, width: int, height: int, vertical_bias: int, horizontal_bias: int,
+            starting_position: Coords | None, seed: int) -> str:
+        """
+        :return: The key of the map generated from the given parameters.
+        """
+
+        if starting_position is None:
+            starting_position = (0, 0)
+
+        parameters = (cls.version, width, height, vertical_bias, horizontal_bias, tuple(starting_position), seed)
+        return hashlib.sha256(repr(parameters).encode("ascii")).hexdigest()[:32]
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, key + extension)
+
+    def _scan_directory(self) -> None:
+        """
+        Finds the maps already on disk, least recently used first.
+        """
+
+        entries = []
+
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".mapdata") and "." not in entry.name[:-len(".mapdata")]:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len(".mapdata")], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self.key_to_size_on_disk[key] = size
+            self.num_bytes_on_disk += size
+
+        self._evict_from_disk()
+
+    def _load_from_disk(self, key: str) -> CachedMap | None:
+        """
+        :return: The map, None if it is not on disk or does not match its checksum.
+        """
+
+        if self.directory is None:
+            return None
+
+        with self.modifier_lock:
+            if key not in self.key_to_size_on_disk:
+                return None
+
+            self.key_to_size_on_disk.move_to_end(key)
+
+        try:
+            with open(self._path(key, ".crc32"), "r") as f:
+                expected_crc32 = int(f.read(), 16)
+
+            map_data = MapData.from_raw(self._path(key, ".mapdata"))
+
+        except (OSError, ValueError):
+            map_data = None
+            expected_crc32 = None
+
+        if map_data is None or map_data.crc32() != expected_crc32:
+            with self.modifier_lock:
+                self.stats.num_corrupt += 1
+            self._delete_from_disk(key)
+            return None
+
+        # Marking the file as recently used, so it survives eviction if the cache is reopened
+        os.utime(self._path(key, ".mapdata"))
+
+        return CachedMap(key, map_data, expected_crc32)
+
+    @classmethod
+    def save_files(cls, directory: str, cached_map: CachedMap) -> int:
+        """
+        Saves the map and its checksum in the layout used on disk, so a cache opened on the directory finds them.
+
+        :param directory: The directory to save in.
+        :param cached_map: The map to save.
+        :return: The size of the .mapdata file.
+        """
+
+        key = cached_map.key
+
+        mapdata_filename = os.path.join(directory, key + ".mapdata")
+        crc32_filename = os.path.join(directory, key + ".crc32")
+
+        # Writing to temporary files first, so a map is never seen half written
+        temporary_name = os.path.join(directory, f"{key}.{os.getpid()}.{threading.get_ident()}")
+
+        try:
+            cached_map.map_data.save_raw(temporary_name + ".mapdata")
+            with open(temporary_name + ".crc32", "w") as f:
+                f.write(f"{cached_map.crc32:08x}")
+
+            os.replace(temporary_name + ".crc32", crc32_filename)
+            os.replace(temporary_name + ".mapdata", mapdata_filename)
+
+        except OSError:
+            # Not leaving the temporary files behind, for example when the disk is full
+            for extension in (".mapdata", ".crc32"):
+                try:
+                    os.remove(temporary_name + extension)
+                except OSError:
+                    pass
+            raise
+
+        return os.path.getsize(mapdata_filename)
+
+    def _save_to_disk(self, cached_map: CachedMap) -> None:
+        """
+        Saves the map to disk, if the cache has a directory.
+        A map that cannot be saved is only logged, as it can still be kept in memory.
+        """
+
+        if self.directory is None:
+            return
+
+        key = cached_map.key
+
+        try:
+            size = self.save_files(self.directory, cached_map)
+        except OSError as e:
+            self.log(f"Saving map {key} caused error '{e}', only keeping it in memory")
+            return
+
+        with self.modifier_lock:
+            self.num_bytes_on_disk += size - self.key_to_size_on_disk.pop(key, 0)
+            self.key_to_size_on_disk[key] = size
+
+        self._evict_from_disk()
+
+    def _delete_from_disk(self, key: str) -> None:
+        with self.modifier_lock:
+            self.num_bytes_on_disk -= self.key_to_size_on_disk.pop(key, 0)
+
+        for extension in (".mapdata", ".crc32"):
+            try:
+                os.remove(self._path(key, extension))
+            except FileNotFoundError:
+                pass
+
+    def _evict_from_disk(self) -> None:
+        while True:
+            with self.modifier_lock:
+                if self.num_bytes_on_disk <= self.max_bytes_on_disk or not self.key_to_size_on_disk:
+                    return
+
+                key = next(iter(self.key_to_size_on_disk))
+                self.stats.num_disk_evictions += 1
+
+            self._delete_from_disk(key)
+
+    def _add_to_memory(self, cached_map: CachedMap) -> None:
+        """
+        The modifier lock must be held.
+        """
+
+        if cached_map.key in self.key_to_cached_map:
+            return
+
+        self.key_to_cached_map[cached_map.key] = cached_map
+        self.num_bytes_in_memory += cached_map.size_in_bytes
+
+        # Always keeping the newest map, even if it alone is over the limit
+        while self.num_bytes_in_memory > self.max_bytes_in_memory and len(self.key_to_cached_map) > 1:
+            _, evicted_map = self.key_to_cached_map.popitem(last=False)
+            self.num_bytes_in_memory -= evicted_map.size_in_bytes
+            self.stats.num_evictions += 1
+
+    def get(self, width: int, height: int,
+            vertical_bias: int = 10, horizontal_bias: int = 10,
+            starting_position: Coords | None = None,
+            seed: int | None = None) -> CachedMap:
+        """
+        Gets the map generated from the given maze parameters, generating it only if it is not cached.
+        Takes the same parameters as MazeGenerator.
+
+        :return: The map, which must not be modified.
+        """
+
+        if seed is None:
+            map_data = generate_map_using_maze(
+                HeapMazeGenerator()(width, height, vertical_bias, horizontal_bias, starting_position, seed)
+            )
+            return CachedMap("", map_data, map_data.crc32())
+
+        key = self.key(width, height, vertical_bias, horizontal_bias, starting_position, seed)
+
+        while True:
+            with self.modifier_lock:
+                cached_map = self.key_to_cached_map.get(key)
+
+                if cached_map is not None:
+                    self.key_to_cached_map.move_to_end(key)
+                    self.stats.num_memory_hits += 1
+                    return cached_map
+
+                generated_event = self.key_to_generated_event.get(key)
+
+                if generated_event is None:
+                    generated_event = threading.Event()
+                    self.key_to_generated_event[key] = generated_event
+                    break
+
+            # Another thread is already loading or generating the map
+            generated_event.wait()
+
+        try:
+            cached_map = self._load_from_disk(key)
+            generation_time = None
+
+            if cached_map is None:
+                start = time.perf_counter()
+                map_data = generate_map_using_maze(
+                    HeapMazeGenerator()(width, height, vertical_bias, horizontal_bias, starting_position, seed)
+                )
+                generation_time = time.perf_counter() - start
+
+                cached_map = CachedMap(key, map_data, map_data.crc32())
+                self._save_to_disk(cached_map)
+
+            with self.modifier_lock:
+                if generation_time is None:
+                    self.stats.num_disk_hits += 1
+                else:
+                    self.stats.total_generation_time += generation_time
+                    self.stats.num_misses += 1
+
+                self._add_to_memory(cached_map)
+
+        finally:
+            with self.modifier_lock:
+                del self.key_to_generated_event[key]
+            generated_event.set()
+
+        return cached_map
+
+    def prewarm(self, num_seeds: int, width: int, height: int,
+                vertical_bias: int = 10, horizontal_bias: int = 10,
+                starting_position: Coords | None = None,
+                first_seed: int = 0) -> None:
+        """
+        Queues the maps of the next seeds to be generated by the pre-warmer thread, which must be started.
+
+        :param num_seeds: The number of seeds to pre-warm, starting from the first seed.
+        :param first_seed: The first seed to pre-warm.
+        """
+
+        for seed in range(first_seed, first_seed + num_seeds):
+            self.prewarm_queue.put((width, height, vertical_bias, horizontal_bias, starting_position, seed))
+
+    def _prewarmer(self) -> None:
+        self.log("Thread started")
+
+        while (parameters := self.prewarm_queue.get()) is not None:
+            # A map that cannot be pre-warmed must not stop the maps queued after it
+            try:
+                self.get(*parameters)
+            except Exception as e:
+                self.log(f"Pre-warming map with parameters {parameters} caused error '{e!r}'")
+
+        self.log("Thread terminating")
+
+    def start(self) -> None:
+        if self.prewarmer_thread is not None:
+            return
+
+        self.log("Starting pre-warmer thread")
+
+        self.prewarmer_thread = threading.Thread(
+            target=self._prewarmer
+        )
+        self.prewarmer_thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the pre-warmer thread, discarding any maps not yet pre-warmed.
+        """
+
+        if self.prewarmer_thread is None:
+            return
+
+        self.log("Stopping pre-warmer thread")
+
+        while True:
+            try:
+                self.prewarm_queue.get_nowait()
+            except queue.Empty:
+                break
+
+        self.prewarm_queue.put(None)
+        self.prewarmer_thread.join()
+        self.prewarmer_thread = None
+
+        self.log(f"Map cache stats: {self.stats}")
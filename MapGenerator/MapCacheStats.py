@@ -0,0 +1,31 @@
+class MapCacheStats:
+    """
+    Counters describing how well a MapCache is performing.
+    """
+
+    def __init__(self):
+        self.num_memory_hits: int = 0
+        self.num_disk_hits: int = 0
+        self.num_misses: int = 0
+        """The number of maps that had to be generated, including those pre-warmed."""
+
+        self.num_evictions: int = 0
+        """The number of maps evicted from memory."""
+        self.num_disk_evictions: int = 0
+        """The number of maps deleted from disk."""
+        self.num_corrupt: int = 0
+        """The number of maps on disk that did not match their checksum, and so were generated again."""
+
+        self.total_generation_time: float = 0
+        """The number of seconds spent generating maps."""
+
+    @property
+    def hit_rate(self) -> float:
+        num_requests = self.num_memory_hits + self.num_disk_hits + self.num_misses
+        return (self.num_memory_hits + self.num_disk_hits) / num_requests if num_requests else 0
+
+    def __str__(self) -> str:
+        return (f"memory hits {self.num_memory_hits}, disk hits {self.num_disk_hits}, misses {self.num_misses} "
+                f"(hit rate {self.hit_rate * 100:.1f}%), evictions {self.num_evictions}, "
+                f"disk evictions {self.num_disk_evictions}, corrupt {self.num_corrupt}, "
+                f"generation time {self.total_generation_time:.2f} s")
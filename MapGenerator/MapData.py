@@ -1,16 +1,148 @@
+import mmap
 import struct
+import zlib
+
+from .MapDataView import MapDataView
+
+_BIT_CHARACTERS_TO_VALUES = bytes.maketrans(b"01", b"\x00\x01")
+"""Translates a string of '0' and '1' characters into the value of each bit."""
+
+_VALUES_TO_BIT_CHARACTERS = b"0" + b"1" * 255
+"""Translates the value of each cell into a '0' or '1' character, anything non-zero is filled in."""
+
+_BIT_CHARACTERS_TO_PRETTY = str.maketrans("01", " ▉")
 
 
 class MapData:
-    def __init__(self, width: int, height: int):
+    """
+    A rectangle of cells, each either filled in (1) or not (0).
+
+    Stored as one bit per cell, in the same layout as a .mapdata file after the header.
+    Each row is padded with zeros to a whole number of bytes and the first cell of a byte is its most significant bit.
+    """
+
+    def __init__(self, width: int, height: int, buffer: bytearray | memoryview | None = None):
+        """
+        :param width: The number of cells in each row.
+        :param height: The number of rows.
+        :param buffer: The bits of every row to use without copying, if None an empty map is created.
+        """
+
         self.width: int = width
         self.height: int = height
 
-        self.data: list[list[int]] = [
-            [
-                0 for _ in range(width)
-            ] for _ in range(height)
-        ]
+        self.width_in_bytes: int = (width + 7) // 8
+        """The number of bytes used to store each row, including the padding."""
+
+        if buffer is None:
+            buffer = bytearray(self.width_in_bytes * height)
+
+        elif len(buffer) != self.width_in_bytes * height:
+            raise ValueError(f"Expected a buffer of {self.width_in_bytes * height} bytes, got {len(buffer)}")
+
+        self.buffer: bytearray | memoryview = buffer
+        """The bits of every row, one after another."""
+
+        self._mmap: mmap.mmap | None = None
+        """The memory mapped file the buffer is a view of, if opened with open_mmap."""
+
+    @property
+    def data(self) -> MapDataView:
+        """
+        A view of the map indexed as `data[y][x]`, reading and writing the underlying bits.
+        Slower than the methods of this class, kept for existing callers.
+        """
+
+        return MapDataView(self)
+
+    def get(self, x: int, y: int) -> int:
+        """
+        :param x: The x coordinate of the cell.
+        :param y: The y coordinate of the cell.
+        :return: 1 if the cell is filled in, otherwise 0.
+        """
+
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Cell ({x}, {y}) is outside of the map")
+
+        return (self.buffer[y * self.width_in_bytes + (x >> 3)] >> (7 - (x & 7))) & 1
+
+    def set(self, x: int, y: int, value: int) -> None:
+        """
+        :param x: The x coordinate of the cell.
+        :param y: The y coordinate of the cell.
+        :param value: Truthy to fill in the cell, otherwise the cell is cleared.
+        """
+
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Cell ({x}, {y}) is outside of the map")
+
+        index = y * self.width_in_bytes + (x >> 3)
+        mask = 0x80 >> (x & 7)
+
+        if value:
+            self.buffer[index] |= mask
+        else:
+            self.buffer[index] &= ~mask
+
+    def row_bytes(self, y: int) -> memoryview:
+        """
+        :param y: The index of the row.
+        :return: A view of the bytes storing the row, including the padding.
+        """
+
+        start = y * self.width_in_bytes
+        return memoryview(self.buffer)[start:start + self.width_in_bytes]
+
+    def crc32(self) -> int:
+        """
+        The checksum of the map data as sent to clients, not including the width and height.
+
+        :return: The CRC32 checksum.
+        """
+
+        return zlib.crc32(self.buffer)
+
+    def _row_bit_string(self, y: int) -> str:
+        """
+        :param y: The index of the row.
+        :return: The row as a string of '0' and '1' characters, including the padding.
+        """
+
+        return bin(int.from_bytes(self.row_bytes(y), "big"))[2:].zfill(self.width_in_bytes * 8)
+
+    def get_row(self, y: int) -> list[int]:
+        """
+        :param y: The index of the row.
+        :return: The value of every cell in the row.
+        """
+
+        if not 0 <= y < self.height:
+            raise IndexError(f"Row {y} is outside of the map")
+
+        # Converting the whole row at once rather than shifting out each bit
+        return list(self._row_bit_string(y)[:self.width].encode("ascii").translate(_BIT_CHARACTERS_TO_VALUES))
+
+    def set_row(self, y: int, values) -> None:
+        """
+        :param y: The index of the row.
+        :param values: The value of every cell in the row, each an int from 0 to 255 or a bool.
+        """
+
+        if not 0 <= y < self.height:
+            raise IndexError(f"Row {y} is outside of the map")
+
+        if len(values) != self.width:
+            raise ValueError(f"Expected {self.width} values, got {len(values)}")
+
+        if not self.width:
+            return
+
+        num_padding_bits = self.width_in_bytes * 8 - self.width
+        bit_characters = bytes(values).translate(_VALUES_TO_BIT_CHARACTERS) + b"0" * num_padding_bits
+
+        start = y * self.width_in_bytes
+        self.buffer[start:start + self.width_in_bytes] = int(bit_characters, 2).to_bytes(self.width_in_bytes, "big")
 
     def _convert_data_to_list_of_strings(self) -> list[str]:
         """
@@ -19,12 +151,7 @@ class MapData:
         :return: A list of strings representing the map data.
         """
 
-        _length = len(self.data[0])
-        extension_len = 8 - _length % 8
-        extension = "0" * extension_len
-        rows = ["".join([str(_value) for _value in _row]) + extension for _row in self.data]
-
-        return rows
+        return [self._row_bit_string(y) for y in range(self.height)]
 
     def save_raw(self, filename: str) -> None:
         """
@@ -36,21 +163,11 @@ class MapData:
         if not filename.endswith(".mapdata"):
             filename += ".mapdata"
 
-        rows = self._convert_data_to_list_of_strings()
-
         header = struct.pack("<II", self.width, self.height)
 
+        # The buffer is already in the file layout, so the whole file is a single write
         with open(filename, "wb") as f:
-            f.write(header)
-
-            for row in rows:
-                row_bytes = bytes(
-                    [
-                        int(row[n:n + 8], 2)
-                        for n in range(0, len(row), 8)
-                    ]
-                )
-                f.write(row_bytes)
+            f.write(header + self.buffer)
 
     @classmethod
     def from_raw(cls, filename: str):
@@ -60,22 +177,97 @@ class MapData:
         with open(filename, "rb") as f:
             header = f.read(8)
 
+            if len(header) != 8:
+                raise ValueError(f"Expected an 8 byte header in {filename}")
+
             width, height = struct.unpack("<II", header)
 
             map_data = cls(width, height)
 
-            width_in_bytes = int((width + 7) // 8)
+            # The file holds the rows in the same layout as the buffer, so they are read straight into it
+            num_read = f.readinto(map_data.buffer)
 
-            for y in range(height):
-                row_bytes = f.read(width_in_bytes)
+            if num_read != len(map_data.buffer):
+                raise ValueError(f"Expected {len(map_data.buffer)} bytes of map data in {filename}, got {num_read}")
 
-                row_bits_str = "".join(f'{byte:08b}' for byte in row_bytes)
+        # Ignoring anything set in the padding, so it is always written as zeros
+        map_data._clear_padding()
 
-                for i in range(width):
-                    map_data.data[y][i] = int(row_bits_str[i])
+        return map_data
+
+    @classmethod
+    def open_mmap(cls, filename: str):
+        """
+        Maps a .mapdata file into memory read only, serving every query straight from the mapped pages.
+
+        Nothing is read until it is used and processes mapping the same file share a single copy through the page cache.
+        The map cannot be modified, and any bits set in the padding are kept as they are in the file.
+        Must be closed once finished with, or used as a context manager.
+
+        :param filename: The filename of the map.
+        :return: The map.
+        :raises ValueError: If the header is missing or the size of the file does not match it.
+        """
+
+        if not filename.endswith(".mapdata"):
+            raise ValueError(f"Expected file of type '*.mapdata', got {filename}")
+
+        with open(filename, "rb") as f:
+            header = f.read(8)
+
+            if len(header) != 8:
+                raise ValueError(f"Expected an 8 byte header in {filename}")
+
+            width, height = struct.unpack("<II", header)
+
+            # The mapping stays valid once the file is closed
+            mapped_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        expected_size = 8 + (width + 7) // 8 * height
+        size = len(mapped_file)
+
+        if size != expected_size:
+            mapped_file.close()
+            raise ValueError(f"Expected {filename} to be {expected_size} bytes, got {size}")
+
+        map_data = cls(width, height, memoryview(mapped_file)[8:])
+        map_data._mmap = mapped_file
 
         return map_data
 
+    def close(self) -> None:
+        """
+        Unmaps the file if opened with open_mmap, the map cannot be used afterwards.
+        """
+
+        if self._mmap is None:
+            return
+
+        self.buffer.release()
+        self._mmap.close()
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _clear_padding(self) -> None:
+        """
+        Clears the unused bits at the end of each row.
+        """
+
+        num_padding_bits = self.width_in_bytes * 8 - self.width
+        if not num_padding_bits:
+            return
+
+        mask = (0xFF << num_padding_bits) & 0xFF
+        last_bytes = slice(self.width_in_bytes - 1, None, self.width_in_bytes)
+
+        # Masking the last byte of every row at once
+        self.buffer[last_bytes] = self.buffer[last_bytes].translate(bytes(byte & mask for byte in range(256)))
+
     def save_simple(self, filename: str) -> None:
         """
         Save the map data in a simplified format compared to the raw format.
@@ -113,6 +305,7 @@ class MapData:
         with open(filename, "w", encoding="UTF-8") as f:
             f.writelines(
                 [
-                    "".join([str("▉" if wall else " ") for wall in row]) + "\n" for row in self.data
+                    self._row_bit_string(y)[:self.width].translate(_BIT_CHARACTERS_TO_PRETTY) + "\n"
+                    for y in range(self.height)
                 ]
             )
@@ -0,0 +1,44 @@
+from typing import Iterator
+
+
+class MapDataRowView:
+    """
+    A single row of a MapData, behaving like the list of ints each row used to be.
+    Reads and writes go straight to the underlying bits.
+    """
+
+    def __init__(self, map_data, y: int):
+        """
+        :param map_data: The MapData the row belongs to.
+        :param y: The index of the row.
+        """
+
+        self.map_data = map_data
+        self.y: int = y
+
+    def __len__(self) -> int:
+        return self.map_data.width
+
+    def _normalise_index(self, x: int) -> int:
+        if x < 0:
+            x += self.map_data.width
+
+        if not 0 <= x < self.map_data.width:
+            raise IndexError("map row index out of range")
+
+        return x
+
+    def __getitem__(self, x: int) -> int:
+        return self.map_data.get(self._normalise_index(x), self.y)
+
+    def __setitem__(self, x: int, value: int) -> None:
+        self.map_data.set(self._normalise_index(x), self.y, value)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.map_data.get_row(self.y))
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(self.map_data.get_row(self.y))
@@ -0,0 +1,32 @@
+from typing import Iterator
+
+from .MapDataRowView import MapDataRowView
+
+
+class MapDataView:
+    """
+    A view of a MapData behaving like the list of rows it used to be stored as, so `data[y][x]` still works.
+    """
+
+    def __init__(self, map_data):
+        """
+        :param map_data: The MapData to view.
+        """
+
+        self.map_data = map_data
+
+    def __len__(self) -> int:
+        return self.map_data.height
+
+    def __getitem__(self, y: int) -> MapDataRowView:
+        if y < 0:
+            y += self.map_data.height
+
+        if not 0 <= y < self.map_data.height:
+            raise IndexError("map index out of range")
+
+        return MapDataRowView(self.map_data, y)
+
+    def __iter__(self) -> Iterator[MapDataRowView]:
+        for y in range(self.map_data.height):
+            yield MapDataRowView(self.map_data, y)
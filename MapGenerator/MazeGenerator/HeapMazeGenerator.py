@@ -0,0 +1,95 @@
+import heapq
+
+from .Maze import Maze
+from .MazeGenerator import MazeGenerator
+
+
+class HeapMazeGenerator(MazeGenerator):
+    """
+    Generates exactly the same mazes as MazeGenerator, in O(N log N) rather than O(N²) in the number of nodes.
+
+    Rather than scanning every accepted node for the path of lowest weight on each pass, every path leading out of the
+    accepted nodes is kept in a heap, and paths leading to a node accepted since are skipped when popped.
+
+    Paths are ordered by weight, then by the most recently accepted node, then by direction, which is the order
+    MazeGenerator.pass_through finds them in, so ties are broken in the same way.
+    """
+
+    def generate_paths(self, maze: Maze) -> None:
+        """
+        Accepts the path of lowest weight out of the accepted nodes until there are none left.
+
+        :param maze: The maze to be modified, with only the starting position accepted.
+        """
+
+        cells = maze.cells
+        width = maze.width
+        horizontal_weights = self.horizontal_weights
+        vertical_weights = self.vertical_weights
+        all_accepted_nodes = self.all_accepted_nodes
+
+        is_accepted = bytearray(maze.width * maze.height)
+        """Whether each node has been accepted, indexed by y * width + x."""
+
+        # Each path is packed into a single int, which the heap compares far faster than a tuple
+        # From most to least significant: the weight, the order of the node, then the direction
+        # The order of the node is the last possible index in self.all_accepted_nodes minus the index of the node
+        last_accepted_index = maze.width * maze.height - 1
+        order_mask = (1 << last_accepted_index.bit_length()) - 1
+        weight_shift = last_accepted_index.bit_length() + 2
+
+        paths: list[int] = []
+        """The paths leading out of the accepted nodes, as a heap."""
+
+        def add_paths(x: int, y: int, accepted_index: int) -> None:
+            index = y * width + x
+            cell = cells[index]
+            order = (last_accepted_index - accepted_index) << 2
+
+            # Sides to be considered have neither bit set
+            if not cell & 0b00000011 and not is_accepted[index - 1]:  # Left
+                heapq.heappush(paths, horizontal_weights[y][x - 1] << weight_shift | order | 0)
+
+            if not cell & 0b00001100 and not is_accepted[index - width]:  # Top
+                heapq.heappush(paths, vertical_weights[x][y - 1] << weight_shift | order | 1)
+
+            if not cell & 0b00110000 and not is_accepted[index + 1]:  # Right
+                heapq.heappush(paths, horizontal_weights[y][x] << weight_shift | order | 2)
+
+            if not cell & 0b11000000 and not is_accepted[index + width]:  # Bottom
+                heapq.heappush(paths, vertical_weights[x][y] << weight_shift | order | 3)
+
+        starting_x, starting_y = all_accepted_nodes[0]
+        is_accepted[starting_y * width + starting_x] = 1
+        add_paths(starting_x, starting_y, 0)
+
+        while paths:
+            path = heapq.heappop(paths)
+            direction = path & 0b11
+            x, y = all_accepted_nodes[last_accepted_index - ((path >> 2) & order_mask)]
+
+            if direction == 0:  # Looking left
+                adjacent_x, adjacent_y = x - 1, y
+            elif direction == 1:  # Looking up
+                adjacent_x, adjacent_y = x, y - 1
+            elif direction == 2:  # Looking right
+                adjacent_x, adjacent_y = x + 1, y
+            else:
+                adjacent_x, adjacent_y = x, y + 1
+
+            adjacent_index = adjacent_y * width + adjacent_x
+
+            # The adjacent node was reached by another path since this one was added
+            if is_accepted[adjacent_index]:
+                continue
+
+            # Both sides were to be considered, so setting the low bit of each accepts them
+            cells[y * width + x] |= 1 << (direction * 2)
+            cells[adjacent_index] |= 1 << ((direction + 2) % 4 * 2)
+
+            is_accepted[adjacent_index] = 1
+            all_accepted_nodes.append((adjacent_x, adjacent_y))
+
+            add_paths(adjacent_x, adjacent_y, len(all_accepted_nodes) - 1)
+
+        self.nodes_to_look_at = []
@@ -1,25 +1,87 @@
+from .MazeNodesView import MazeNodesView
 from .Types import Node
 
+_STATE_TO_BITS = {-1: 0b10, 0: 0b00, 1: 0b01}
+_BITS_TO_STATE = (0, 1, -1, -1)
+
 
 class Maze:
     """
     Stores information about a maze.
+
+    Each node is stored as a single byte holding the state of each of its sides in 2 bits, the left side in the least
+    significant bits followed by the top, right and bottom sides.
+    A side to be considered is 0b00, accepted is 0b01 and rejected is 0b10, so the low bit of every side can be tested
+    at once with `accepted_mask` and the high bit with `rejected_mask`.
     """
 
+    accepted_mask: int = 0b01010101
+    """The low bit of every side of a node, set for each accepted side."""
+
+    rejected_mask: int = 0b10101010
+    """The high bit of every side of a node, set for each rejected side."""
+
     def __init__(self, width: int, height: int, nodes: list[list[Node]] | None = None):
         self.width: int = width
         """The width of this maze."""
         self.height: int = height
         """The height of this maze."""
 
-        self.nodes: list[list[Node]] = nodes
+        self.cells: bytearray = bytearray(width * height)
+        """The node at (x, y) is at [y * width + x]."""
+
+        if nodes is not None:
+            for y, row in enumerate(nodes):
+                for x, node in enumerate(row):
+                    for direction, state in enumerate(node):
+                        self.set(x, y, direction, state)
+
+    @property
+    def nodes(self) -> MazeNodesView:
         """
-        A 2D array of the nodes for this maze.
+        A view of the nodes indexed as `nodes[y][x][direction]`, reading and writing the underlying cells.
+        Slower than the methods of this class, kept for existing callers.
         """
 
-        if nodes is None:
-            self.nodes = [
-                [
-                    [0, 0, 0, 0] for _ in range(width)
-                ] for _ in range(height)
-            ]
+        return MazeNodesView(self)
+
+    def get(self, x: int, y: int, direction: int) -> int:
+        """
+        :param x: The x coordinate of the node.
+        :param y: The y coordinate of the node.
+        :param direction: The side of the node, in the order (left, top, right, bottom).
+        :return: The state of the side, as in Node.
+        """
+
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Node ({x}, {y}) is outside of the maze")
+
+        return _BITS_TO_STATE[(self.cells[y * self.width + x] >> (direction * 2)) & 0b11]
+
+    def set(self, x: int, y: int, direction: int, state: int) -> None:
+        """
+        :param x: The x coordinate of the node.
+        :param y: The y coordinate of the node.
+        :param direction: The side of the node, in the order (left, top, right, bottom).
+        :param state: The state of the side, as in Node.
+        """
+
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Node ({x}, {y}) is outside of the maze")
+
+        shift = direction * 2
+        index = y * self.width + x
+        self.cells[index] = (self.cells[index] & ~(0b11 << shift)) | (_STATE_TO_BITS[state] << shift)
+
+    def get_node(self, x: int, y: int) -> Node:
+        """
+        :param x: The x coordinate of the node.
+        :param y: The y coordinate of the node.
+        :return: A copy of the state of every side of the node.
+        """
+
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Node ({x}, {y}) is outside of the maze")
+
+        cell = self.cells[y * self.width + x]
+        return [_BITS_TO_STATE[(cell >> shift) & 0b11] for shift in (0, 2, 4, 6)]
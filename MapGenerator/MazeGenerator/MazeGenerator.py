@@ -1,7 +1,9 @@
+import array
 import random
+import sys
 
 from .Maze import Maze
-from .Types import Coords, Node
+from .Types import Coords
 
 
 class MazeGenerator:
@@ -13,6 +15,12 @@ class MazeGenerator:
         self.seed: int | None = None
         """The seed used to generate the horizontal and vertical weights."""
 
+        self.random: random.Random = random.Random()
+        """
+        The random number generator of this generator alone, so generators in other threads do not interfere.
+        Reseeded with the seed each time weights are generated.
+        """
+
         self.horizontal_weights: list[list[int]] = []
         """
         The horizontal weights between nodes.
@@ -50,35 +58,103 @@ class MazeGenerator:
         """
 
         for x in range(maze.width):
-            maze.nodes[0][x][1] = -1
-            maze.nodes[maze.height - 1][x][3] = -1
+            maze.set(x, 0, 1, -1)
+            maze.set(x, maze.height - 1, 3, -1)
 
         for y in range(maze.height):
-            maze.nodes[y][0][0] = -1
-            maze.nodes[y][maze.width - 1][2] = -1
+            maze.set(0, y, 0, -1)
+            maze.set(maze.width - 1, y, 2, -1)
 
     def generate_weights(self,
                          maze_width: int, maze_height: int,
                          horizontal_bias: int, vertical_bias: int,
                          seed: int | None):
+        """
+        Generates the horizontal and vertical weights.
+
+        For a given seed the weights are exactly those given by calling `random.seed(seed)` followed by
+        `random.randint(0, bias)` for each weight in turn, every horizontal weight row by row then every vertical
+        weight, so the same seed always generates the same maze.
+        """
+
         self.horizontal_bias = horizontal_bias
         self.vertical_bias = vertical_bias
         self.max_bias = max(horizontal_bias, vertical_bias) + 1
         self.seed = seed
 
-        random.seed(seed)
+        self.random.seed(seed)
 
+        row_length = maze_width - 1
+        weights = self._random_weights(horizontal_bias, row_length * maze_height)
         self.horizontal_weights = [
-            [
-                random.randint(0, horizontal_bias) for _ in range(maze_width - 1)
-            ] for _ in range(maze_height)
-        ]
+            weights[start:start + row_length] for start in range(0, row_length * maze_height, row_length)
+        ] if row_length else [[] for _ in range(maze_height)]
 
+        row_length = maze_height - 1
+        weights = self._random_weights(vertical_bias, row_length * maze_width)
         self.vertical_weights = [
-            [
-                random.randint(0, vertical_bias) for _ in range(maze_height - 1)
-            ] for _ in range(maze_width)
-        ]
+            weights[start:start + row_length] for start in range(0, row_length * maze_width, row_length)
+        ] if row_length else [[] for _ in range(maze_width)]
+
+    def _random_weights(self, bias: int, num_weights: int) -> list[int]:
+        """
+        Generates weights from 0 to bias inclusive in bulk, the same as calling `self.random.randint(0, bias)` for each.
+
+        randint takes the top bits of a 32 bit random word, drawing another word whenever the value is out of range.
+        Here the words are drawn in one call, only as many as the number of weights still needed so none are drawn
+        that randint would not have, then the values out of range are filtered out, repeating until there are enough.
+
+        :param bias: The largest weight.
+        :param num_weights: The number of weights.
+        :return: The weights in the order randint would have generated them.
+        """
+
+        if bias < 0:
+            raise ValueError(f"Bias {bias} must be at least 0")
+
+        num_values = bias + 1
+        num_bits = num_values.bit_length()
+
+        # Each value takes more than a single word, which is not worth reproducing
+        if num_bits > 32:
+            return [self.random.randint(0, bias) for _ in range(num_weights)]
+
+        weights: list[int] = []
+
+        if num_bits <= 8:
+            # Each value is only in the most significant byte of its word, which is translated to the value in C, and
+            # dropped if out of range
+            shift = 8 - num_bits
+            byte_to_value = bytes(byte >> shift for byte in range(256))
+            out_of_range_bytes = bytes(byte for byte in range(256) if byte >> shift >= num_values)
+
+            while len(weights) < num_weights:
+                words = self._random_words(num_weights - len(weights))
+                weights.extend(words[3::4].translate(byte_to_value, out_of_range_bytes))
+
+            return weights
+
+        shift = 32 - num_bits
+        limit = num_values << shift
+        """Any word at least this large is out of range once shifted."""
+
+        while len(weights) < num_weights:
+            words = array.array("I", self._random_words(num_weights - len(weights)))
+            if sys.byteorder == "big":
+                words.byteswap()
+
+            weights.extend([word >> shift for word in words if word < limit])
+
+        return weights
+
+    def _random_words(self, num_words: int) -> bytes:
+        """
+        :param num_words: The number of words to draw.
+        :return: The next 32 bit random words, each little endian, in the order they are generated.
+        """
+
+        # The words of a single large getrandbits call are in the order they are generated, least significant first
+        return self.random.getrandbits(32 * num_words).to_bytes(4 * num_words, "little")
 
     def pass_through(self, maze):
         # Information regarding the path of lowest weight to be added
@@ -89,18 +165,21 @@ class MazeGenerator:
         lw_coordinates: tuple[int, int] | None = None
         lw_adjacent_coordinates: tuple[int, int] | None = None
 
+        cells = maze.cells
+        width = maze.width
+
         for node_index in range(len(self.nodes_to_look_at) - 1, -1, -1):
             node_coords = self.nodes_to_look_at[node_index]
-            node = maze.nodes[node_coords[1]][node_coords[0]]
+            cell = cells[node_coords[1] * width + node_coords[0]]
 
-            # If we have no directions to consider
-            if 0 not in node:
+            # If we have no directions to consider, every side having either bit set
+            if (cell | cell >> 1) & Maze.accepted_mask == Maze.accepted_mask:
                 # Remove from nodes we look at and skip
                 self.nodes_to_look_at.remove(node_coords)
                 continue
 
-            for direction, finished in enumerate(node):
-                if finished:
+            for direction in range(4):
+                if (cell >> (direction * 2)) & 0b11:
                     continue
 
                 # Acquire the adjacent node
@@ -116,15 +195,16 @@ class MazeGenerator:
                 else:
                     adjacent_node_coords = (node_coords[0], node_coords[1] + 1)
 
-                adjacent_node: Node = maze.nodes[adjacent_node_coords[1]][adjacent_node_coords[0]]
+                adjacent_cell = cells[adjacent_node_coords[1] * width + adjacent_node_coords[0]]
 
-                if 1 in adjacent_node:
+                # If the adjacent node has any accepted side
+                if adjacent_cell & Maze.accepted_mask:
                     continue
 
                 # If we cannot traverse to the adjacent node
-                if adjacent_node[(direction + 2) % 4] == -1:
+                if adjacent_cell & Maze.rejected_mask & (0b11 << ((direction + 2) % 4 * 2)):
                     # Make sure our node reflects this, skip
-                    maze.nodes[node_coords[1]][node_coords[0]][direction] = -1
+                    maze.set(node_coords[0], node_coords[1], direction, -1)
                     continue
 
                 # Acquire the weight of the path to the adjacent node
@@ -150,8 +230,8 @@ class MazeGenerator:
             return False
 
         # Modify the nodes to add in the shortest path
-        maze.nodes[lw_coordinates[1]][lw_coordinates[0]][lowest_weight_direction] = 1
-        maze.nodes[lw_adjacent_coordinates[1]][lw_adjacent_coordinates[0]][(lowest_weight_direction + 2) % 4] = 1
+        maze.set(lw_coordinates[0], lw_coordinates[1], lowest_weight_direction, 1)
+        maze.set(lw_adjacent_coordinates[0], lw_adjacent_coordinates[1], (lowest_weight_direction + 2) % 4, 1)
 
         # Store the node we just added
         self.all_accepted_nodes.append(lw_adjacent_coordinates)
@@ -159,6 +239,16 @@ class MazeGenerator:
 
         return True
 
+    def generate_paths(self, maze: Maze) -> None:
+        """
+        Accepts the path of lowest weight out of the accepted nodes until there are none left.
+
+        :param maze: The maze to be modified, with only the starting position accepted.
+        """
+
+        while self.pass_through(maze):
+            pass
+
     def __call__(self,
                  width: int, height: int,
                  vertical_bias: int = 10, horizontal_bias: int = 10,
@@ -187,8 +277,6 @@ class MazeGenerator:
 
         self.setup_nodes(maze)
         self.generate_weights(maze.width, maze.height, horizontal_bias, vertical_bias, seed)
-
-        while self.pass_through(maze):
-            pass
+        self.generate_paths(maze)
 
         return maze
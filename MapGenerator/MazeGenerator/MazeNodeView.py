@@ -0,0 +1,49 @@
+from typing import Iterator
+
+
+class MazeNodeView:
+    """
+    A single node of a Maze, behaving like the list of the states of its sides each node used to be.
+    Reads and writes go straight to the underlying cell.
+    """
+
+    def __init__(self, maze, x: int, y: int):
+        """
+        :param maze: The Maze the node belongs to.
+        :param x: The x coordinate of the node.
+        :param y: The y coordinate of the node.
+        """
+
+        self.maze = maze
+        self.x: int = x
+        self.y: int = y
+
+    def __len__(self) -> int:
+        return 4
+
+    def _normalise_index(self, direction: int) -> int:
+        if direction < 0:
+            direction += 4
+
+        if not 0 <= direction < 4:
+            raise IndexError("maze node index out of range")
+
+        return direction
+
+    def __getitem__(self, direction: int) -> int:
+        return self.maze.get(self.x, self.y, self._normalise_index(direction))
+
+    def __setitem__(self, direction: int, state: int) -> None:
+        self.maze.set(self.x, self.y, self._normalise_index(direction), state)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.maze.get_node(self.x, self.y))
+
+    def __contains__(self, state: int) -> bool:
+        return state in self.maze.get_node(self.x, self.y)
+
+    def __eq__(self, other) -> bool:
+        return self.maze.get_node(self.x, self.y) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(self.maze.get_node(self.x, self.y))
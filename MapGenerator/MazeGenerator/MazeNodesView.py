@@ -0,0 +1,35 @@
+from typing import Iterator
+
+from .MazeRowView import MazeRowView
+
+
+class MazeNodesView:
+    """
+    A view of a Maze behaving like the list of rows of nodes it used to be stored as, so `nodes[y][x]` still works.
+    """
+
+    def __init__(self, maze):
+        """
+        :param maze: The Maze to view.
+        """
+
+        self.maze = maze
+
+    def __len__(self) -> int:
+        return self.maze.height
+
+    def __getitem__(self, y: int) -> MazeRowView:
+        if y < 0:
+            y += self.maze.height
+
+        if not 0 <= y < self.maze.height:
+            raise IndexError("maze index out of range")
+
+        return MazeRowView(self.maze, y)
+
+    def __iter__(self) -> Iterator[MazeRowView]:
+        for y in range(self.maze.height):
+            yield MazeRowView(self.maze, y)
+
+    def __eq__(self, other) -> bool:
+        return len(self) == len(other) and all(row == other_row for row, other_row in zip(self, other))
@@ -0,0 +1,40 @@
+from typing import Iterator
+
+from .MazeNodeView import MazeNodeView
+
+
+class MazeRowView:
+    """
+    A single row of a Maze, behaving like the list of nodes each row used to be.
+    """
+
+    def __init__(self, maze, y: int):
+        """
+        :param maze: The Maze the row belongs to.
+        :param y: The index of the row.
+        """
+
+        self.maze = maze
+        self.y: int = y
+
+    def __len__(self) -> int:
+        return self.maze.width
+
+    def __getitem__(self, x: int) -> MazeNodeView:
+        if x < 0:
+            x += self.maze.width
+
+        if not 0 <= x < self.maze.width:
+            raise IndexError("maze row index out of range")
+
+        return MazeNodeView(self.maze, x, self.y)
+
+    def __iter__(self) -> Iterator[MazeNodeView]:
+        for x in range(self.maze.width):
+            yield MazeNodeView(self.maze, x, self.y)
+
+    def __eq__(self, other) -> bool:
+        return len(self) == len(other) and all(node == other_node for node, other_node in zip(self, other))
+
+    def __repr__(self) -> str:
+        return repr([self.maze.get_node(x, self.y) for x in range(self.maze.width)])
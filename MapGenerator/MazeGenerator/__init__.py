@@ -1,2 +1,3 @@
+from .HeapMazeGenerator import HeapMazeGenerator
 from .Maze import Maze
 from .MazeGenerator import MazeGenerator
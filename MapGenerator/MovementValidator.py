@@ -0,0 +1,148 @@
+from typing import Iterable
+
+from .MapData import MapData
+
+_REVERSE_BITS = bytes(int(f"{byte:08b}"[::-1], 2) for byte in range(256))
+"""Translates each byte into the same bits in the opposite order."""
+
+Move = tuple[int, int, int, int]
+"""The x and y position moved from, then the x and y position moved to."""
+
+
+class MovementValidator:
+    """
+    Checks whether moves across a map are legal, built once per map.
+
+    A move is legal if both ends are inside the map and every cell the straight line between their centres passes
+    through or touches is not filled in, so a move can never cut the corner of a filled in cell.
+
+    The open cells of every row and every column are precomputed as an int, with the bit of each open cell set, the first
+    cell in the least significant bit.
+    A move is checked a row at a time if it is shallow, or a column at a time if it is steep, each a single mask of the
+    cells the line covers in it, so a move costs one check per row or column it crosses rather than one per cell.
+    """
+
+    def __init__(self, map_data: MapData):
+        """
+        :param map_data: The map to check moves across, which must not be modified afterwards.
+        """
+
+        self.width: int = map_data.width
+        self.height: int = map_data.height
+
+        all_open = (1 << self.width) - 1
+
+        self.open_rows: list[int] = [
+            ~int.from_bytes(bytes(map_data.row_bytes(y)).translate(_REVERSE_BITS), "little") & all_open
+            for y in range(self.height)
+        ]
+        """The open cells of each row, bit x set if (x, y) is not filled in."""
+
+        # Laying out every row as a string of bits, last row first, so each column is a single slice
+        all_bits = "".join(f"{self.open_rows[y]:0{self.width}b}"[::-1] for y in reversed(range(self.height)))
+
+        self.open_columns: list[int] = [int(all_bits[x::self.width] or "0", 2) for x in range(self.width)]
+        """The open cells of each column, bit y set if (x, y) is not filled in."""
+
+    def is_open(self, x: int, y: int) -> bool:
+        """
+        :param x: The x coordinate of the cell.
+        :param y: The y coordinate of the cell.
+        :return: True if the cell is inside the map and not filled in.
+        """
+
+        return 0 <= x < self.width and 0 <= y < self.height and (self.open_rows[y] >> x) & 1 == 1
+
+    def is_legal_move(self, x_1: int, y_1: int, x_2: int, y_2: int, max_distance: int | None = None) -> bool:
+        """
+        :param x_1: The x coordinate of the cell moved from.
+        :param y_1: The y coordinate of the cell moved from.
+        :param x_2: The x coordinate of the cell moved to.
+        :param y_2: The y coordinate of the cell moved to.
+        :param max_distance: The furthest the move may go along either axis, if None there is no limit.
+        :return: True if the move is legal.
+        """
+
+        return self.validate_moves(((x_1, y_1, x_2, y_2),), max_distance)[0]
+
+    def validate_moves(self, moves: Iterable[Move], max_distance: int | None = None) -> list[bool]:
+        """
+        Checks a batch of moves, such as the moves of every player in a tick.
+
+        :param moves: The moves to check.
+        :param max_distance: The furthest a move may go along either axis, if None there is no limit.
+        :return: Whether each move is legal, in the same order.
+        """
+
+        width = self.width
+        height = self.height
+        open_rows = self.open_rows
+        open_columns = self.open_columns
+        is_lane_run_open = self._is_lane_run_open
+
+        results = []
+
+        for x_1, y_1, x_2, y_2 in moves:
+            if not (0 <= x_1 < width and 0 <= y_1 < height and 0 <= x_2 < width and 0 <= y_2 < height):
+                results.append(False)
+                continue
+
+            length_x = abs(x_2 - x_1)
+            length_y = abs(y_2 - y_1)
+
+            if max_distance is not None and max(length_x, length_y) > max_distance:
+                results.append(False)
+
+            elif not length_y:
+                # Along a single row, the most common move
+                mask = (1 << (length_x + 1)) - 1
+                results.append((open_rows[y_1] >> min(x_1, x_2)) & mask == mask)
+
+            elif not length_x:
+                mask = (1 << (length_y + 1)) - 1
+                results.append((open_columns[x_1] >> min(y_1, y_2)) & mask == mask)
+
+            elif length_x >= length_y:
+                results.append(is_lane_run_open(open_rows, x_1, y_1, x_2, y_2))
+
+            else:
+                results.append(is_lane_run_open(open_columns, y_1, x_1, y_2, x_2))
+
+        return results
+
+    @staticmethod
+    def _is_lane_run_open(lanes: list[int], major_1: int, minor_1: int, major_2: int, minor_2: int) -> bool:
+        """
+        Checks a line at least as long along its major axis as its minor axis, a lane of the minor axis at a time.
+        Lanes are the rows if the major axis is x, otherwise the columns.
+
+        Works in doubled coordinates, so the centre of a cell is even and its edges are odd, with positions along the
+        major axis kept as fractions over the length of the line along the minor axis.
+        """
+
+        if minor_1 > minor_2:
+            major_1, minor_1, major_2, minor_2 = major_2, minor_2, major_1, minor_1
+
+        minor_length = minor_2 - minor_1
+        major_length = major_2 - major_1
+        cell_size = 2 * minor_length
+
+        for minor in range(minor_1, minor_2 + 1):
+            # The part of the line inside this lane, edges included, kept within the ends of the line
+            start = max(2 * minor - 1, 2 * minor_1) - 2 * minor_1
+            end = min(2 * minor + 1, 2 * minor_2) - 2 * minor_1
+
+            major_start = 2 * major_1 * minor_length + major_length * start
+            major_end = 2 * major_1 * minor_length + major_length * end
+            if major_start > major_end:
+                major_start, major_end = major_end, major_start
+
+            # Every cell whose edges the line reaches, ceiling then floor
+            run_start = -((minor_length - major_start) // cell_size)
+            run_end = (major_end + minor_length) // cell_size
+
+            mask = (1 << (run_end - run_start + 1)) - 1
+            if (lanes[minor] >> run_start) & mask != mask:
+                return False
+
+        return True
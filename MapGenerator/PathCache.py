@@ -0,0 +1,100 @@
+import collections
+import threading
+
+from .CachedMap import CachedMap
+from .DistanceField import DistanceField
+from .MazeGenerator.Types import Coords
+
+
+class PathCache:
+    """
+    Caches the distance fields of maps, so the way from anywhere to a target is only searched for once, and every
+    later step toward it is a lookup.
+
+    Fields are keyed by the key of the map and the target, with the least recently used fields evicted first once their
+    total size is over the limit.
+    Maps without a key are random, so their fields are never cached.
+
+    Fields are built without holding the lock, so two threads asking for the same new field may both build it, and
+    the first to finish is kept.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        :param max_bytes: The total size of the fields kept.
+        """
+
+        self.max_bytes: int = max_bytes
+
+        self.modifier_lock: threading.Lock = threading.Lock()
+        """A lock that must be acquired before modifying anything below."""
+
+        self.key_to_field: collections.OrderedDict[tuple[str, Coords], DistanceField] = collections.OrderedDict()
+        """The fields kept, from least to most recently used."""
+        self.num_bytes: int = 0
+
+        self.num_hits: int = 0
+        self.num_misses: int = 0
+        self.num_evictions: int = 0
+
+    def get(self, cached_map: CachedMap, target: Coords) -> DistanceField:
+        """
+        Gets the distance field of the map to the target, only building it if it is not cached.
+
+        :param cached_map: The map.
+        :param target: The cell to find the paths to.
+        :return: The field, which must not be modified.
+        :raises ValueError: If the target is outside of the map or filled in.
+        """
+
+        if not cached_map.key:
+            return DistanceField.from_map_data(cached_map.map_data, target)
+
+        key = (cached_map.key, tuple(target))
+
+        with self.modifier_lock:
+            field = self.key_to_field.get(key)
+
+            if field is not None:
+                self.key_to_field.move_to_end(key)
+                self.num_hits += 1
+                return field
+
+        field = DistanceField.from_map_data(cached_map.map_data, key[1])
+
+        with self.modifier_lock:
+            self.num_misses += 1
+
+            if key in self.key_to_field:
+                return self.key_to_field[key]
+
+            self.key_to_field[key] = field
+            self.num_bytes += field.size_in_bytes
+
+            # Always keeping the newest field, even if it alone is over the limit
+            while self.num_bytes > self.max_bytes and len(self.key_to_field) > 1:
+                _, evicted_field = self.key_to_field.popitem(last=False)
+                self.num_bytes -= evicted_field.size_in_bytes
+                self.num_evictions += 1
+
+        return field
+
+    def next_position(self, cached_map: CachedMap, position: Coords, target: Coords) -> Coords | None:
+        """
+        :param cached_map: The map.
+        :param position: The cell to step from.
+        :param target: The cell to step toward.
+        :return: The cell after the first step toward the target, the same cell if it is the target, None if the
+            target cannot be reached.
+        """
+
+        return self.get(cached_map, target).next_position(*position)
+
+    def clear(self) -> None:
+        with self.modifier_lock:
+            self.key_to_field.clear()
+            self.num_bytes = 0
+
+    def __str__(self) -> str:
+        return (f"{len(self.key_to_field)} fields, {self.num_bytes / 1024 / 1024:.1f} MiB, hits {self.num_hits}, "
+                f"misses {self.num_misses}, evictions {self.num_evictions}")
@@ -0,0 +1,219 @@
+import array
+import itertools
+import operator
+
+from .MapData import MapData
+
+
+class VisibilityIndex:
+    """
+    Answers whether one cell of a map can be seen from another, built once per map.
+
+    A cell can see another if the straight line between their centres passes through no filled in cell, including the
+    two cells themselves. A line only touching the corner of a cell does not pass through it.
+
+    The index is a summed-area table, so whether any cell in a rectangle is filled in is a few lookups.
+    A line is checked a stretch of rows at a time if it is steep, or columns if it is shallow, by checking the rectangle
+    around that stretch of the line. The stretch doubles in length each time its rectangle is empty and shrinks while
+    it is not, down to a single row or column, whose rectangle holds exactly the cells the line passes through.
+    Lines through open space are so checked in a few steps, and lines blocked by a nearby wall in a few more.
+    """
+
+    def __init__(self, map_data: MapData):
+        """
+        :param map_data: The map to index, which must not be modified afterwards.
+        """
+
+        self.width: int = map_data.width
+        self.height: int = map_data.height
+
+        self.stride: int = self.width + 1
+        """The distance between rows of the counts."""
+
+        self.counts: array.array = array.array("I" if self.width * self.height < 1 << 32 else "Q", bytes(0))
+        """
+        The number of filled in cells above and to the left of (x, y), not including row y or column x, is at
+        [y * stride + x], for x up to width and y up to height.
+        """
+
+        self.cells: bytearray = bytearray()
+        """Whether the cell at (x, y) is filled in is at [y * width + x]."""
+
+        counts_above = [0] * self.stride
+        self.counts.extend(counts_above)
+
+        for y in range(self.height):
+            row = map_data.get_row(y)
+            self.cells.extend(row)
+
+            counts_above = list(map(operator.add, counts_above, itertools.accumulate(row, initial=0)))
+            self.counts.extend(counts_above)
+
+    @property
+    def size_in_bytes(self) -> int:
+        return self.counts.itemsize * len(self.counts) + len(self.cells)
+
+    def is_rectangle_empty(self, x_1: int, y_1: int, x_2: int, y_2: int) -> bool:
+        """
+        :param x_1: The x coordinate of the left column.
+        :param y_1: The y coordinate of the top row.
+        :param x_2: The x coordinate of the right column, included.
+        :param y_2: The y coordinate of the bottom row, included.
+        :return: True if no cell in the rectangle is filled in.
+        """
+
+        counts = self.counts
+        top = y_1 * self.stride
+        bottom = (y_2 + 1) * self.stride
+
+        return counts[bottom + x_2 + 1] - counts[top + x_2 + 1] - counts[bottom + x_1] + counts[top + x_1] == 0
+
+    def is_visible(self, x_1: int, y_1: int, x_2: int, y_2: int) -> bool:
+        """
+        :param x_1: The x coordinate of the first cell.
+        :param y_1: The y coordinate of the first cell.
+        :param x_2: The x coordinate of the second cell.
+        :param y_2: The y coordinate of the second cell.
+        :return: True if the cells can see each other.
+        """
+
+        if not (0 <= x_1 < self.width and 0 <= y_1 < self.height and 0 <= x_2 < self.width and 0 <= y_2 < self.height):
+            raise IndexError(f"Line from ({x_1}, {y_1}) to ({x_2}, {y_2}) is outside of the map")
+
+        return self._is_line_clear(x_1, y_1, x_2, y_2)
+
+    def _is_line_clear(self, x_1: int, y_1: int, x_2: int, y_2: int) -> bool:
+        """
+        Checks the line between two cells, which must be inside the map.
+
+        Works along the major axis, the one the line is longer along, in doubled coordinates, so the centre of a cell
+        is odd and its edges are even.
+        Positions across the minor axis are kept as fractions over the length of the line along the major axis.
+        """
+
+        is_steep = abs(y_2 - y_1) >= abs(x_2 - x_1)
+
+        if is_steep:
+            major_1, minor_1, major_2, minor_2 = y_1, x_1, y_2, x_2
+        else:
+            major_1, minor_1, major_2, minor_2 = x_1, y_1, x_2, y_2
+
+        if major_1 > major_2:
+            major_1, minor_1, major_2, minor_2 = major_2, minor_2, major_1, minor_1
+
+        major_length = major_2 - major_1
+        minor_length = minor_2 - minor_1
+
+        if not major_length:
+            return self.is_rectangle_empty(x_1, y_1, x_1, y_1)
+
+        counts = self.counts
+        stride = self.stride
+
+        start = 2 * major_1 + 1
+        end = 2 * major_2 + 1
+        minor_start = (2 * minor_1 + 1) * major_length
+        cell_size = 2 * major_length
+
+        major = major_1
+        stretch = 1
+
+        while major <= major_2:
+            last_major = min(major + stretch - 1, major_2)
+
+            # Where the line enters the first row of the stretch and leaves the last, over the major length
+            enter = minor_start + minor_length * (max(2 * major, start) - start)
+            leave = minor_start + minor_length * (min(2 * last_major + 2, end) - start)
+
+            if enter > leave:
+                enter, leave = leave, enter
+
+            # Not including a cell the line only touches the edge of on the far side
+            first_minor = enter // cell_size
+            last_minor = -(-leave // cell_size) - 1
+
+            if is_steep:
+                top, bottom, left, right = major * stride, (last_major + 1) * stride, first_minor, last_minor + 1
+            else:
+                top, bottom, left, right = first_minor * stride, (last_minor + 1) * stride, major, last_major + 1
+
+            if counts[bottom + right] - counts[top + right] - counts[bottom + left] + counts[top + left] == 0:
+                major = last_major + 1
+                stretch *= 2
+
+            elif last_major == major:
+                return False
+
+            else:
+                stretch = (last_major - major + 1) // 2
+
+        return True
+
+    def visible_pairs(self, id_to_position: dict[int, tuple[int, int]],
+                      max_distance: float | None = None) -> list[tuple[int, int]]:
+        """
+        Finds every pair of players that can see each other.
+
+        :param id_to_position: A dictionary of player ids to the x and y coordinates of the cell they are in.
+        :param max_distance: The furthest players can see in cells, if None only walls block sight.
+        :return: Each pair of player ids that can see each other, once, in no particular order.
+        """
+
+        # Players in the same cell are checked once, as a single position
+        position_to_ids: dict[tuple[int, int], list[int]] = {}
+        for client_id, position in id_to_position.items():
+            position_to_ids.setdefault(position, []).append(client_id)
+
+        positions = list(position_to_ids)
+
+        for x, y in positions:
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise IndexError(f"Position ({x}, {y}) is outside of the map")
+
+        max_distance_squared = float("inf") if max_distance is None else max_distance * max_distance
+        is_line_clear = self._is_line_clear
+        cells = self.cells
+        width = self.width
+
+        visible_position_pairs = []
+
+        for index, position_1 in enumerate(positions):
+            x_1, y_1 = position_1
+
+            # Players in the same cell see each other unless they are in a wall
+            if cells[y_1 * width + x_1]:
+                continue
+
+            visible_position_pairs.append((position_1, position_1))
+
+            for position_2 in itertools.islice(positions, index + 1, None):
+                x_2, y_2 = position_2
+                length_x = x_2 - x_1
+                length_y = y_2 - y_1
+
+                if length_x * length_x + length_y * length_y > max_distance_squared:
+                    continue
+
+                # The first cell the line passes through after leaving either end is directly along the major axis, or
+                # diagonal if the line passes through the corner, so a wall there is found without checking the line
+                step = ((length_y > 0) - (length_y < 0)) * width if abs(length_y) >= abs(length_x) else 0
+                if abs(length_x) >= abs(length_y):
+                    step += (length_x > 0) - (length_x < 0)
+
+                if cells[y_1 * width + x_1 + step] or cells[y_2 * width + x_2 - step]:
+                    continue
+
+                if is_line_clear(x_1, y_1, x_2, y_2):
+                    visible_position_pairs.append((position_1, position_2))
+
+        visible_pairs = []
+
+        for position_1, position_2 in visible_position_pairs:
+            ids_1 = position_to_ids[position_1]
+
+            if position_1 == position_2:
+                visible_pairs.extend(itertools.combinations(ids_1, 2))
+            else:
+                visible_pairs.extend(itertools.product(ids_1, position_to_ids[position_2]))
+
+        return visible_pairs
@@ -1,3 +1,11 @@
 import MapGenerator.MazeGenerator
+from .CachedMap import CachedMap
+from .DistanceField import DistanceField
+from .MapCache import MapCache
+from .MapCacheStats import MapCacheStats
 from .MapData import MapData
+from .MovementValidator import MovementValidator
+from .PathCache import PathCache
+from .VisibilityIndex import VisibilityIndex
 from .generate_map_using_maze import generate_map_using_maze
+from .generate_maps import generate_maps
@@ -0,0 +1,77 @@
+"""
+Generates maps in bulk across a pool of processes, for example to pre-generate maps for rotation.
+
+Run from the repository root with `python -m MapGenerator DIRECTORY --sizes 40x40 80x80 --seeds 0:1000`.
+Each map is saved as a .mapdata file and a .crc32 file named by its MapCache key, and a line describing it is
+appended to index.txt in the directory as soon as it is saved, holding the key, width, height, vertical bias,
+horizontal bias, seed and checksum separated by tabs.
+"""
+
+import argparse
+import os
+import time
+
+from .generate_maps import generate_maps
+
+
+def parse_size(size: str) -> tuple[int, int]:
+    width, _, height = size.partition("x")
+    return int(width), int(height or width)
+
+
+def parse_seeds(seeds: str) -> range:
+    start, _, stop = seeds.partition(":")
+    return range(int(start), int(stop)) if stop else range(int(start), int(start) + 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m MapGenerator", description="Generates maze maps in bulk.")
+    parser.add_argument("directory", help="The directory to save the maps in.")
+    parser.add_argument("--sizes", type=parse_size, nargs="+", required=True,
+                        help="The maze sizes, as WIDTHxHEIGHT or a single number for a square.")
+    parser.add_argument("--seeds", type=parse_seeds, required=True,
+                        help="The seeds, as START:STOP (not including STOP) or a single seed.")
+    parser.add_argument("--vertical-bias", type=int, default=10)
+    parser.add_argument("--horizontal-bias", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="The number of processes, one per CPU by default.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="The number of maps per task.")
+    parser.add_argument("--skip-existing", action="store_true", help="Do not generate maps already saved.")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary.")
+    args = parser.parse_args()
+
+    num_maps = len(args.sizes) * len(args.seeds)
+    num_generated = 0
+    total_generation_time = 0
+    start = time.perf_counter()
+
+    os.makedirs(args.directory, exist_ok=True)
+
+    with open(os.path.join(args.directory, "index.txt"), "a") as index_file:
+        for index, (parameters, key, crc32, generation_time) in enumerate(generate_maps(
+                args.directory, args.sizes, args.seeds, args.vertical_bias, args.horizontal_bias,
+                num_workers=args.workers, chunk_size=args.chunk_size, skip_existing=args.skip_existing
+        ), 1):
+            width, height, vertical_bias, horizontal_bias, _, seed = parameters
+
+            # Maps skipped for already existing were indexed when they were generated
+            if generation_time:
+                index_file.write(
+                    f"{key}\t{width}\t{height}\t{vertical_bias}\t{horizontal_bias}\t{seed}\t{crc32:08x}\n"
+                )
+                index_file.flush()
+
+                num_generated += 1
+                total_generation_time += generation_time
+
+            if not args.quiet:
+                print(f"[{index}/{num_maps}] {width}x{height} seed {seed}: {key}.mapdata crc32 {crc32:08x}"
+                      + ("" if generation_time else " (existing)"))
+
+    elapsed = time.perf_counter() - start
+
+    print(f"{num_maps} maps ({num_generated} generated) in {elapsed:.2f} s, {num_maps / elapsed:.1f} maps/s, "
+          f"{total_generation_time / elapsed:.2f} average parallelism")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,70 @@
 from .MapData import MapData
 from .MazeGenerator import Maze
 
+_CELL_TO_PILLAR = bytes(0 if cell == Maze.accepted_mask else 1 for cell in range(256))
+"""Translates each node into whether its corners are filled in, which is only not the case if every side is accepted."""
+
+_CELL_TO_WALLS = tuple(
+    bytes(0 if (cell >> (direction * 2)) & 0b11 == 0b01 else 1 for cell in range(256))
+    for direction in range(4)
+)
+"""For each direction, translates each node into whether the middle of that side is filled in, unless accepted."""
+
 
 def generate_map_using_maze(maze: Maze) -> MapData:
+    """
+    Draws each node of the maze as 3x3 cells, with a wall in the middle of each side that is not accepted and a pillar
+    in each corner, unless every side is accepted.
+    The outer edge of the map is filled in, and the ring of cells just inside it cleared.
+
+    Each row of the map is built whole, with every third cell set at once by slice assignment, rather than cell by
+    cell.
+
+    :param maze: The maze to draw.
+    :return: The map.
+    """
+
     width_3 = maze.width * 3
     height_3 = maze.height * 3
 
     map_data = MapData(width_3, height_3)
 
-    for x in range(width_3):
-        map_data.data[0][x] = 1
-        map_data.data[height_3 - 1][x] = 1
+    if not maze.width or not maze.height:
+        return map_data
 
-    for y in range(height_3):
-        map_data.data[y][0] = 1
-        map_data.data[y][width_3 - 1] = 1
+    left_walls, top_walls, right_walls, bottom_walls = _CELL_TO_WALLS
 
-    for y in range(height_3):
-        for x in range(width_3):
-            if (x % 3 == 0 or x % 3 == 2) and (y % 3 == 0 or y % 3 == 2):
-                map_data.data[y][x] = 1
-                continue
+    row = bytearray(width_3)
 
     for y in range(maze.height):
         y_3 = y * 3
 
-        for x in range(maze.width):
-            x_3 = x * 3
-
-            node = maze.nodes[y][x]
-
-            if node == [1, 1, 1, 1]:
-                map_data.data[y_3][x_3] = 0
-                map_data.data[y_3][x_3 + 2] = 0
-                map_data.data[y_3 + 2][x_3] = 0
-                map_data.data[y_3 + 2][x_3 + 2] = 0
-                continue
+        cells = maze.cells[y * maze.width:(y + 1) * maze.width]
+        pillars = cells.translate(_CELL_TO_PILLAR)
 
-            if node[0] != 1:  # Left
-                map_data.data[y_3 + 1][x_3] = 1
+        for map_y, middles in ((y_3, cells.translate(top_walls)), (y_3 + 2, cells.translate(bottom_walls))):
+            row[0::3] = pillars
+            row[2::3] = pillars
 
-            if node[1] != 1:  # Top
-                map_data.data[y_3][x_3 + 1] = 1
+            if map_y == 0 or map_y == height_3 - 1:
+                # Along the outer edge, only the corners of a node with every side accepted are not filled in
+                row[1::3] = bytes([1]) * maze.width
+            else:
+                row[1::3] = middles
+                row[1] = 0
+                row[-2] = 0
 
-            if node[2] != 1:  # Right
-                map_data.data[y_3 + 1][x_3 + 2] = 1
+            map_data.set_row(map_y, row)
 
-            if node[3] != 1:  # Bottom
-                map_data.data[y_3 + 2][x_3 + 1] = 1
+        row[0::3] = cells.translate(left_walls)
+        row[1::3] = bytes(maze.width)
+        row[2::3] = cells.translate(right_walls)
+        row[0] = 1
+        row[-1] = 1
 
-    for x in range(1, width_3 - 1):
-        map_data.data[1][x] = 0
-        map_data.data[height_3 - 2][x] = 0
+        if y_3 + 1 == 1 or y_3 + 1 == height_3 - 2:
+            row[1:-1] = bytes(width_3 - 2)
 
-    for y in range(1, height_3 - 1):
-        map_data.data[y][1] = 0
-        map_data.data[y][width_3 - 2] = 0
+        map_data.set_row(y_3 + 1, row)
 
     return map_data
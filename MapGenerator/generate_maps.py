@@ -0,0 +1,110 @@
+import concurrent.futures
+import os
+import time
+from typing import Iterable, Iterator
+
+from .CachedMap import CachedMap
+from .MapCache import MapCache, MapParameters
+from .MazeGenerator import HeapMazeGenerator
+from .generate_map_using_maze import generate_map_using_maze
+
+GeneratedMap = tuple[MapParameters, str, int, float]
+"""The parameters of a generated map, its key, its checksum and the seconds spent generating it, 0 if it existed."""
+
+
+def _load_existing_crc32(directory: str, key: str) -> int | None:
+    """
+    :return: The checksum of the map already saved under the key, None if it has not been saved.
+    """
+
+    try:
+        with open(os.path.join(directory, key + ".crc32"), "r") as f:
+            crc32 = int(f.read(), 16)
+    except (OSError, ValueError):
+        return None
+
+    if not os.path.exists(os.path.join(directory, key + ".mapdata")):
+        return None
+
+    return crc32
+
+
+def _generate_and_save(directory: str, all_parameters: list[MapParameters], skip_existing: bool) -> list[GeneratedMap]:
+    """
+    Generates and saves each map, run in a worker process.
+    Only the keys and checksums are sent back, the maps themselves never leave the worker.
+    """
+
+    generated_maps = []
+
+    for parameters in all_parameters:
+        key = MapCache.key(*parameters)
+
+        if skip_existing and (crc32 := _load_existing_crc32(directory, key)) is not None:
+            generated_maps.append((parameters, key, crc32, 0.0))
+            continue
+
+        start = time.perf_counter()
+
+        map_data = generate_map_using_maze(HeapMazeGenerator()(*parameters))
+        cached_map = CachedMap(key, map_data, map_data.crc32())
+        MapCache.save_files(directory, cached_map)
+
+        generated_maps.append((parameters, key, cached_map.crc32, time.perf_counter() - start))
+
+    return generated_maps
+
+
+def generate_maps(directory: str, sizes: Iterable[tuple[int, int]], seeds: Iterable[int],
+                  vertical_bias: int = 10, horizontal_bias: int = 10,
+                  starting_position: tuple[int, int] | None = None,
+                  num_workers: int | None = None, chunk_size: int | None = None,
+                  skip_existing: bool = False) -> Iterator[GeneratedMap]:
+    """
+    Generates a map for every size and seed across a pool of processes, saving each as soon as it is generated.
+
+    Maps are saved in the same layout as a MapCache, a .mapdata file and a .crc32 file named by the key of the map, so
+    a cache opened on the directory uses them rather than generating them again.
+    The largest maps are started first, so no worker is left with a large map at the end while the rest are idle.
+
+    :param directory: The directory to save the maps in.
+    :param sizes: The width and height of each maze, the map is 3 times larger.
+    :param seeds: The seeds to generate each size with.
+    :param vertical_bias: Passed to the maze generator.
+    :param horizontal_bias: Passed to the maze generator.
+    :param starting_position: Passed to the maze generator.
+    :param num_workers: The number of processes, if None one per CPU.
+    :param chunk_size: The number of maps each process generates per task, if None chosen from the number of maps.
+    :param skip_existing: If True, maps already saved in the directory are not generated again.
+    :return: Each map, in the order they finish.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    all_parameters: list[MapParameters] = sorted(
+        ((width, height, vertical_bias, horizontal_bias, starting_position, seed)
+         for width, height in sizes for seed in seeds),
+        key=lambda parameters: parameters[0] * parameters[1], reverse=True
+    )
+
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+
+    if chunk_size is None:
+        # Enough tasks per worker to balance the load, while sending small maps in batches
+        chunk_size = max(1, min(64, len(all_parameters) // (num_workers * 8)))
+
+    executor = concurrent.futures.ProcessPoolExecutor(num_workers)
+
+    try:
+        futures = [
+            executor.submit(_generate_and_save, directory, all_parameters[start:start + chunk_size], skip_existing)
+            for start in range(0, len(all_parameters), chunk_size)
+        ]
+
+        for future in concurrent.futures.as_completed(futures):
+            yield from future.result()
+
+    finally:
+        # Not waiting for maps that will never be used if the caller stops early
+        executor.shutdown(cancel_futures=True)
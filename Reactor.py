@@ -0,0 +1,118 @@
+import selectors
+import socket
+import threading
+from typing import Callable
+
+from Utils import *
+
+
+class Reactor:
+    """
+    A single threaded event loop that watches many sockets at once.
+
+    Each registered socket is paired with a callback that is called from the reactor thread when the socket becomes
+    readable.
+    Used in place of a thread per client, so the cost of a client is a selector entry rather than a thread stack.
+    """
+
+    def __init__(self):
+        self.selector: selectors.BaseSelector = selectors.DefaultSelector()
+        """The selector used to wait on every registered socket, epoll on Linux."""
+
+        self.modifier_lock: threading.Lock = threading.Lock()
+        """A lock that must be acquired before registering or unregistering sockets with self.selector."""
+
+        self.reactor_stop_event: WakeableEvent = WakeableEvent()
+        self.reactor_thread: threading.Thread | None = None
+
+        # Registering the stop event wakes the selector as soon as the reactor is told to stop
+        self.selector.register(self.reactor_stop_event, selectors.EVENT_READ, None)
+
+    def register(self, soc: socket.socket, callback: Callable[[socket.socket], None]) -> None:
+        """
+        Registers the given socket, the callback is called with the socket each time it becomes readable.
+
+        :param soc: The socket to watch.
+        :param callback: The function to call from the reactor thread when the socket is readable.
+        """
+
+        with self.modifier_lock:
+            self.selector.register(soc, selectors.EVENT_READ, callback)
+
+    def unregister(self, soc: socket.socket) -> None:
+        """
+        Stops watching the given socket if it is registered.
+        Must be called before the socket is closed.
+
+        :param soc: The socket to stop watching.
+        """
+
+        with self.modifier_lock:
+            try:
+                self.selector.unregister(soc)
+            except (KeyError, ValueError):
+                pass
+
+    def _is_registered(self, key: selectors.SelectorKey) -> bool:
+        """
+        Determines if the given key is still registered.
+        A callback may unregister a socket that is also ready in the same round of events.
+
+        :param key: The key to look for.
+        :return: True if the key is still registered, otherwise False.
+        """
+
+        try:
+            return self.selector.get_key(key.fileobj) is key
+        except (KeyError, ValueError):
+            return False
+
+    def _reactor(self) -> None:
+        """
+        Waits for registered sockets to become readable and calls their callbacks.
+        """
+
+        Logger.log("Thread started")
+
+        while not self.reactor_stop_event.is_set():
+            events = self.selector.select()
+
+            for key, _ in events:
+                if key.data is None or not self._is_registered(key):
+                    continue
+
+                key.data(key.fileobj)
+
+        Logger.log("Thread terminating")
+
+    def start(self) -> None:
+        if self.reactor_thread is not None:
+            return
+
+        Logger.log("Starting reactor thread")
+
+        self.reactor_stop_event.clear()
+
+        self.reactor_thread = threading.Thread(
+            target=self._reactor
+        )
+        self.reactor_thread.start()
+
+    def stop(self) -> None:
+        if self.reactor_thread is None:
+            return
+
+        Logger.log("Stopping reactor thread")
+
+        self.reactor_stop_event.set()
+        self.reactor_thread.join()
+        self.reactor_thread = None
+
+    def close(self) -> None:
+        """
+        Stops the reactor and releases the selector.
+        """
+
+        self.stop()
+        self.selector.close()
+        self.reactor_stop_event.close()
@@ -1,99 +1,107 @@
 import socket
-import struct
 import threading
 from ipaddress import IPv4Address
 
 import select
 
 from ClientHandlerManager import ClientHandlerManager
+from HandshakeStage import HandshakeStage
+from Reactor import Reactor
 from Utils import *
 
 
-def accept_new_clients(soc: socket.socket, stop_event: threading.Event,
-                       client_handler_manager: ClientHandlerManager) -> None:
-    next_client_id = 1
-
+def accept_new_clients(soc: socket.socket, stop_event: WakeableEvent,
+                       handshake_stage: HandshakeStage) -> None:
     Logger.log("Thread started")
 
-    while not stop_event.is_set():
-        readable, _, _ = select.select([soc], [], [], 0.1)
-
-        if not readable:
-            continue
-
-        client_socket, client_address = soc.accept()
-        Logger.log(f"Client under address {client_address[0]}:{client_address[1]} requested connection")
-
-        Logger.log("Reading indicator int from socket")
-        try:
-            indicator_int = IndicatorInt.read_from_socket(client_socket)
-        except struct.error:
-            Logger.log("Error unpacking struct, closing socket")
-            client_socket.close()
-            continue
-
-        if indicator_int != ClientMessageInfo.NEW_CONNECTION_REQUEST.value:
-            Logger.log(f"Incorrect indicator int {indicator_int}, closing socket")
-            client_socket.close()
-            continue
-
-        Logger.log("Correct indicator int")
+    while True:
+        select.select([soc, stop_event], [], [])
 
-        Logger.log(f"Sending client id {next_client_id} to client")
-        try:
-            client_socket.sendall(
-                ServerMessageInfo.CLIENT_ID.create_bytes(next_client_id)
-            )
-        except OSError as e:
-            Logger.log(f"Received error '{e}'")
+        if stop_event.is_set():
+            break
 
-        client_handler_manager.handle_client(next_client_id, client_socket, client_address)
+        num_accepted = handshake_stage.accept_all(soc)
+        Logger.log(f"Accepted {num_accepted} new client(s)")
 
-        next_client_id += 1
 
-        Logger.log("Adding notify task")
+def main(ip: IPv4Address, port: int, use_reactor: bool = False, max_move_distance: int | None = None) -> None:
+    """
+    Runs the server until SIGINT or SIGTERM is received.
 
+    :param ip: The ip to bind to.
+    :param port: The port to bind to.
+    :param use_reactor:
+        If True, a single reactor thread drives the listening socket and every client socket.
+        Otherwise, a thread is used for accepting clients and for each client.
+    :param max_move_distance:
+        The furthest a player may move along either axis in a tick, if None there is no limit.
+        Only checked in games started with a map.
+    """
 
-def main(ip: IPv4Address, port: int) -> None:
     Logger.log(f"Binding socket to {ip}:{port}")
     soc = socket.socket()
     soc.bind((str(ip), port))
 
     Logger.log("Listening for client connections")
-    soc.listen()
+    soc.listen(socket.SOMAXCONN)
+    soc.setblocking(False)
+
+    reactor: Reactor | None = None
+    if use_reactor:
+        Logger.log("Starting reactor")
+        reactor = Reactor()
+        reactor.start()
 
     # Setting up the client handler manager
-    client_handler_manager = ClientHandlerManager()
+    client_handler_manager = ClientHandlerManager(reactor, max_move_distance=max_move_distance)
     client_handler_manager.start()
 
-    # Setting up the accept new clients thread
+    # Setting up the handshake stage
+    handshake_stage = HandshakeStage(client_handler_manager)
+    handshake_stage.start()
+
+    accept_new_clients_stop_event: WakeableEvent = WakeableEvent()
+    accept_new_clients_thread: threading.Thread | None = None
 
-    accept_new_clients_stop_event: threading.Event = threading.Event()
+    if reactor is not None:
+        # Accepting new clients from the reactor thread
+        reactor.register(soc, handshake_stage.accept_all)
 
-    accept_new_clients_thread = threading.Thread(
-        target=accept_new_clients,
-        args=(soc, accept_new_clients_stop_event, client_handler_manager)
-    )
-    accept_new_clients_thread.start()
+    else:
+        # Setting up the accept new clients thread
+        accept_new_clients_thread = threading.Thread(
+            target=accept_new_clients,
+            args=(soc, accept_new_clients_stop_event, handshake_stage)
+        )
+        accept_new_clients_thread.start()
 
-    try:
-        while True:
-            pass
-    except KeyboardInterrupt:
-        pass
+    wait_for_shutdown_signal()
 
     # Cleanup
-    Logger.log("Setting accept new clients stop event")
-    accept_new_clients_stop_event.set()
-    Logger.log("Joining accept new clients thread")
-    accept_new_clients_thread.join()
+    if accept_new_clients_thread is not None:
+        Logger.log("Setting accept new clients stop event")
+        accept_new_clients_stop_event.set()
+        Logger.log("Joining accept new clients thread")
+        accept_new_clients_thread.join()
+        accept_new_clients_stop_event.close()
+
+    else:
+        Logger.log("Unregistering server socket from reactor")
+        reactor.unregister(soc)
 
     Logger.log("Closing server socket")
     soc.close()
 
+    Logger.log("Shutting down handshake stage")
+    handshake_stage.shutdown()
+
     Logger.log("Shutting down client handler manager")
     client_handler_manager.shutdown()
 
+    if reactor is not None:
+        Logger.log("Closing reactor")
+        reactor.close()
+
     Logger.log("All done")
 
 
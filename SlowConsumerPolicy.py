@@ -0,0 +1,13 @@
+from enum import Enum, auto
+
+
+class SlowConsumerPolicy(Enum):
+    """
+    What a Broadcaster does with a client whose outbound queue grows past the high water mark.
+    """
+
+    DISCONNECT = auto()
+    """The client is disconnected."""
+
+    DROP_OLDEST = auto()
+    """The oldest queued messages not yet started are dropped, the client only receives the most recent messages."""
@@ -0,0 +1,221 @@
+import itertools
+import math
+from typing import Iterable
+
+
+class SpatialHash:
+    """
+    Finds the players near a position without checking every player, for example those within tagging range.
+
+    Players are kept in buckets of cell_size by cell_size map cells, by default the size of a maze node.
+    A query only looks at the buckets it overlaps, so its cost depends on the players nearby rather than all of them.
+    Positions are updated incrementally, a player only moving bucket when it crosses into another.
+    """
+
+    def __init__(self, cell_size: int = 3):
+        """
+        :param cell_size: The width and height of each bucket, in map cells.
+        """
+
+        self.cell_size: int = cell_size
+
+        self.bucket_to_ids: dict[tuple[int, int], set[int]] = {}
+        """A dictionary of the coordinates of each bucket holding any players to the ids of those players."""
+
+        self.id_to_position: dict[int, tuple[int, int]] = {}
+
+        self.id_to_bucket: dict[int, tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.id_to_position)
+
+    def update(self, client_id: int, x: int, y: int) -> None:
+        """
+        Adds the player, or moves it if already added.
+
+        :param client_id: The id of the player.
+        :param x: The x position of the player.
+        :param y: The y position of the player.
+        """
+
+        bucket = (x // self.cell_size, y // self.cell_size)
+        old_bucket = self.id_to_bucket.get(client_id)
+
+        self.id_to_position[client_id] = (x, y)
+
+        if bucket == old_bucket:
+            return
+
+        if old_bucket is not None:
+            self._remove_from_bucket(client_id, old_bucket)
+
+        self.id_to_bucket[client_id] = bucket
+        self.bucket_to_ids.setdefault(bucket, set()).add(client_id)
+
+    def remove(self, client_id: int) -> None:
+        """
+        Removes the player, if added.
+
+        :param client_id: The id of the player.
+        """
+
+        bucket = self.id_to_bucket.pop(client_id, None)
+
+        if bucket is None:
+            return
+
+        del self.id_to_position[client_id]
+        self._remove_from_bucket(client_id, bucket)
+
+    def _remove_from_bucket(self, client_id: int, bucket: tuple[int, int]) -> None:
+        client_ids = self.bucket_to_ids[bucket]
+        client_ids.discard(client_id)
+
+        if not client_ids:
+            del self.bucket_to_ids[bucket]
+
+    def clear(self) -> None:
+        self.bucket_to_ids.clear()
+        self.id_to_position.clear()
+        self.id_to_bucket.clear()
+
+    def within_radius(self, x: int, y: int, radius: float) -> list[int]:
+        """
+        :param x: The x position to search around.
+        :param y: The y position to search around.
+        :param radius: The furthest a player can be from the position, inclusive.
+        :return: The ids of the players within the radius of the position.
+        """
+
+        radius_squared = radius * radius
+        bucket_x_1, bucket_x_2 = int((x - radius) // self.cell_size), int((x + radius) // self.cell_size)
+        bucket_y_1, bucket_y_2 = int((y - radius) // self.cell_size), int((y + radius) // self.cell_size)
+
+        found_ids = []
+
+        # Looking up only the buckets overlapping the search, unless there are fewer occupied buckets than that
+        if (bucket_x_2 - bucket_x_1 + 1) * (bucket_y_2 - bucket_y_1 + 1) > len(self.bucket_to_ids):
+            all_client_ids = (
+                client_ids for (bucket_x, bucket_y), client_ids in self.bucket_to_ids.items()
+                if bucket_x_1 <= bucket_x <= bucket_x_2 and bucket_y_1 <= bucket_y <= bucket_y_2
+            )
+        else:
+            all_client_ids = (
+                self.bucket_to_ids[bucket]
+                for bucket in itertools.product(range(bucket_x_1, bucket_x_2 + 1), range(bucket_y_1, bucket_y_2 + 1))
+                if bucket in self.bucket_to_ids
+            )
+
+        for client_ids in all_client_ids:
+            for client_id in client_ids:
+                other_x, other_y = self.id_to_position[client_id]
+
+                if (other_x - x) ** 2 + (other_y - y) ** 2 <= radius_squared:
+                    found_ids.append(client_id)
+
+        return found_ids
+
+    def nearest(self, x: int, y: int, excluded_id: int | None = None,
+                max_radius: float | None = None) -> tuple[int, float] | None:
+        """
+        Searches the buckets in rings of increasing size around the position, until no unsearched bucket could hold a
+        nearer player.
+
+        :param x: The x position to search around.
+        :param y: The y position to search around.
+        :param excluded_id: A player to ignore, such as the player searching.
+        :param max_radius: The furthest a player can be from the position, if None there is no limit.
+        :return: The id of the nearest player and its distance, None if there is none.
+        """
+
+        best_id = None
+        best_distance_squared = math.inf if max_radius is None else max_radius * max_radius
+
+        def consider(client_ids: Iterable[int]) -> None:
+            nonlocal best_id, best_distance_squared
+
+            for client_id in client_ids:
+                if client_id == excluded_id:
+                    continue
+
+                other_x, other_y = self.id_to_position[client_id]
+                distance_squared = (other_x - x) ** 2 + (other_y - y) ** 2
+
+                if distance_squared < best_distance_squared or (
+                        distance_squared == best_distance_squared and (best_id is None or client_id < best_id)
+                ):
+                    best_id = client_id
+                    best_distance_squared = distance_squared
+
+        centre_x, centre_y = x // self.cell_size, y // self.cell_size
+
+        for ring in itertools.count():
+            # Every bucket in this ring and beyond is at least this far away
+            ring_distance = max(ring - 1, 0) * self.cell_size
+            if ring_distance * ring_distance > best_distance_squared:
+                break
+
+            # Once the rings searched so far hold more buckets than there are players, checking every player is quicker
+            if (2 * ring + 1) ** 2 > len(self.id_to_position):
+                consider(self.id_to_position)
+                break
+
+            if not ring:
+                consider(self.bucket_to_ids.get((centre_x, centre_y), ()))
+                continue
+
+            for bucket in itertools.chain(
+                    ((bucket_x, centre_y - ring) for bucket_x in range(centre_x - ring, centre_x + ring + 1)),
+                    ((bucket_x, centre_y + ring) for bucket_x in range(centre_x - ring, centre_x + ring + 1)),
+                    ((centre_x - ring, bucket_y) for bucket_y in range(centre_y - ring + 1, centre_y + ring)),
+                    ((centre_x + ring, bucket_y) for bucket_y in range(centre_y - ring + 1, centre_y + ring))
+            ):
+                client_ids = self.bucket_to_ids.get(bucket)
+                if client_ids is not None:
+                    consider(client_ids)
+
+        if best_id is None:
+            return None
+
+        return best_id, math.sqrt(best_distance_squared)
+
+    def pairs_within(self, radius: float) -> list[tuple[int, int]]:
+        """
+        Finds every pair of players within the radius of each other, checking each bucket only against its neighbours.
+
+        :param radius: The furthest players can be from each other, inclusive.
+        :return: Each pair of player ids, once, in no particular order.
+        """
+
+        radius_squared = radius * radius
+        reach = math.ceil(radius / self.cell_size)
+
+        # Looking forward only, so each pair of buckets is checked once
+        offsets = [
+            (offset_x, offset_y)
+            for offset_x in range(-reach, reach + 1) for offset_y in range(-reach, reach + 1)
+            if (offset_x, offset_y) > (0, 0)
+        ]
+
+        pairs = []
+
+        for (bucket_x, bucket_y), client_ids in self.bucket_to_ids.items():
+            positions = [(client_id, self.id_to_position[client_id]) for client_id in client_ids]
+
+            for (id_1, (x_1, y_1)), (id_2, (x_2, y_2)) in itertools.combinations(positions, 2):
+                if (x_2 - x_1) ** 2 + (y_2 - y_1) ** 2 <= radius_squared:
+                    pairs.append((id_1, id_2))
+
+            for offset_x, offset_y in offsets:
+                other_ids = self.bucket_to_ids.get((bucket_x + offset_x, bucket_y + offset_y))
+                if other_ids is None:
+                    continue
+
+                for id_2 in other_ids:
+                    x_2, y_2 = self.id_to_position[id_2]
+
+                    for id_1, (x_1, y_1) in positions:
+                        if (x_2 - x_1) ** 2 + (y_2 - y_1) ** 2 <= radius_squared:
+                            pairs.append((id_1, id_2))
+
+        return pairs
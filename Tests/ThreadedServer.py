@@ -0,0 +1,55 @@
+import socket
+import threading
+
+import Server
+from ClientHandlerManager import ClientHandlerManager
+from HandshakeStage import HandshakeStage
+from Utils import *
+
+
+class ThreadedServer:
+    """
+    Runs the threaded server on a free local port for the duration of a test, as Server.main does.
+    """
+
+    def __init__(self, **client_handler_manager_kwargs):
+        self.client_handler_manager_kwargs: dict = client_handler_manager_kwargs
+
+        self.socket: socket.socket | None = None
+        self.port: int = 0
+
+        self.client_handler_manager: ClientHandlerManager | None = None
+        self.handshake_stage: HandshakeStage | None = None
+
+        self.accept_new_clients_stop_event: WakeableEvent = WakeableEvent()
+        self.accept_new_clients_thread: threading.Thread | None = None
+
+    def __enter__(self):
+        self.socket = socket.socket()
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.listen(socket.SOMAXCONN)
+        self.socket.setblocking(False)
+        self.port = self.socket.getsockname()[1]
+
+        self.client_handler_manager = ClientHandlerManager(**self.client_handler_manager_kwargs)
+        self.client_handler_manager.start()
+
+        self.handshake_stage = HandshakeStage(self.client_handler_manager)
+        self.handshake_stage.start()
+
+        self.accept_new_clients_thread = threading.Thread(
+            target=Server.accept_new_clients,
+            args=(self.socket, self.accept_new_clients_stop_event, self.handshake_stage)
+        )
+        self.accept_new_clients_thread.start()
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.accept_new_clients_stop_event.set()
+        self.accept_new_clients_thread.join()
+        self.accept_new_clients_stop_event.close()
+
+        self.socket.close()
+        self.handshake_stage.shutdown()
+        self.client_handler_manager.shutdown()
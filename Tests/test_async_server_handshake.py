@@ -0,0 +1,87 @@
+import asyncio
+import itertools
+import threading
+import unittest
+from functools import partial
+
+import AsyncServer
+import Client
+from AsyncClientHandlerManager import AsyncClientHandlerManager
+from Utils import *
+
+from .wait_until import wait_until
+
+
+class TestAsyncServerHandshake(unittest.TestCase):
+    def _connect_to_async_server(self, requested_features: Features) -> tuple:
+        """
+        Runs the asyncio server as AsyncServer.main does, connects the threaded client to it and waits for the client
+        to be sent the list of client ids.
+
+        :return: The result of Client.connect and the client id list received.
+        """
+
+        async def run() -> tuple:
+            client_handler_manager = AsyncClientHandlerManager()
+            client_handler_manager.start()
+
+            server = await asyncio.start_server(
+                partial(
+                    AsyncServer.accept_new_clients,
+                    client_ids=itertools.count(1), client_handler_manager=client_handler_manager
+                ),
+                "127.0.0.1", 0
+            )
+            port = server.sockets[0].getsockname()[1]
+
+            result = await asyncio.to_thread(Client.connect, "127.0.0.1", port, requested_features)
+            client_id_list = []
+
+            if result is not None:
+                soc, client_id, features = result
+
+                Client.client_id_list = []
+                stop_event = WakeableEvent()
+                update_thread = threading.Thread(
+                    target=Client.server_update_handler, args=(soc, stop_event, features)
+                )
+                update_thread.start()
+
+                await asyncio.to_thread(wait_until, lambda: Client.client_id_list == [client_id])
+                client_id_list = list(Client.client_id_list)
+
+                stop_event.set()
+                await asyncio.to_thread(update_thread.join)
+                stop_event.close()
+                soc.close()
+
+            server.close()
+            await server.wait_closed()
+            await client_handler_manager.shutdown()
+
+            return result, client_id_list
+
+        return asyncio.run(run())
+
+    def test_client_requesting_features_is_accepted_without_any(self):
+        result, client_id_list = self._connect_to_async_server(
+            Features.SNAPSHOT_DELTA | Features.INT16_RELATIVE_POSITIONS | Features.COMPRESSED_MAP_DATA
+            | Features.CLIENT_ID_DELTAS
+        )
+
+        self.assertIsNotNone(result)
+        _, client_id, features = result
+        self.assertEqual(Features.NONE, features)
+        self.assertEqual([client_id], client_id_list)
+
+    def test_client_requesting_no_features_is_accepted(self):
+        result, client_id_list = self._connect_to_async_server(Features.NONE)
+
+        self.assertIsNotNone(result)
+        _, client_id, features = result
+        self.assertEqual(Features.NONE, features)
+        self.assertEqual([client_id], client_id_list)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import socket
+import unittest
+
+from Broadcaster import Broadcaster
+from SlowConsumerPolicy import SlowConsumerPolicy
+
+
+class TestBroadcaster(unittest.TestCase):
+    high_water_mark: int = 1024
+
+    def _send_stream_then_message(self, slow_consumer_policy: SlowConsumerPolicy) -> None:
+        """
+        Streams a chunk far larger than the high water mark to a client that is not reading, so most of it is left
+        in flight, then broadcasts a small message, which must still be queued and sent after the chunk.
+        """
+
+        sending_socket, receiving_socket = socket.socketpair()
+        sending_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        sending_socket.setblocking(False)
+
+        broadcaster = Broadcaster(self.high_water_mark, slow_consumer_policy)
+
+        try:
+            broadcaster.add_client(1, sending_socket)
+
+            chunk = bytes(range(256)) * 4096
+            message = b"message" * 10
+
+            broadcaster.send_stream(1, [chunk])
+            outbound_queue = broadcaster.client_id_to_queue[1]
+            self.assertGreater(outbound_queue.num_stream_bytes, self.high_water_mark)
+            self.assertEqual(0, outbound_queue.num_bytes)
+
+            broadcaster.broadcast(message)
+            self.assertFalse(outbound_queue.has_failed)
+            self.assertEqual(0, outbound_queue.num_dropped)
+            self.assertEqual(len(message), outbound_queue.num_bytes)
+            self.assertEqual(
+                outbound_queue.num_stream_bytes + len(message), broadcaster.queue_depths()[1]
+            )
+
+            # Reading everything, with the flusher sending the rest once the socket becomes writable
+            broadcaster.start()
+            received = bytearray()
+            receiving_socket.settimeout(5)
+            while len(received) < len(chunk) + len(message):
+                received += receiving_socket.recv(1024 * 1024)
+
+            self.assertEqual(chunk + message, received)
+
+        finally:
+            broadcaster.remove_client(1)
+            broadcaster.close()
+            sending_socket.close()
+            receiving_socket.close()
+
+    def test_stream_chunk_does_not_disconnect(self):
+        self._send_stream_then_message(SlowConsumerPolicy.DISCONNECT)
+
+    def test_stream_chunk_does_not_drop_messages(self):
+        self._send_stream_then_message(SlowConsumerPolicy.DROP_OLDEST)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import unittest
+
+import AsyncClient
+import Client
+from Utils import *
+
+from .ThreadedServer import ThreadedServer
+from .wait_until import wait_until
+
+
+class TestClientIdUpdates(unittest.TestCase):
+    def test_async_client_is_sent_full_lists_by_threaded_server(self):
+        """An AsyncClient does not request features, so must only ever be sent CONNECTED_CLIENT_IDS_HEADER."""
+
+        with ThreadedServer() as server:
+            async def run() -> tuple[list[int], list[int], bool]:
+                reader, writer, client_id = await AsyncClient.connect("127.0.0.1", server.port)
+                update_task = asyncio.create_task(AsyncClient.server_update_handler(reader))
+
+                # Another client joining, then leaving, would be sent as deltas to a client that accepted them
+                other_soc, other_client_id, _ = await asyncio.to_thread(
+                    Client.connect, "127.0.0.1", server.port, Features.CLIENT_ID_DELTAS
+                )
+                await asyncio.to_thread(
+                    wait_until, lambda: AsyncClient.client_id_list == [client_id, other_client_id]
+                )
+                list_after_join = list(AsyncClient.client_id_list)
+
+                other_soc.sendall(ClientMessageInfo.WILL_DISCONNECT.create_bytes())
+                await asyncio.to_thread(wait_until, lambda: AsyncClient.client_id_list == [client_id])
+                list_after_leave = list(AsyncClient.client_id_list)
+                other_soc.close()
+
+                is_still_connected = not update_task.done()
+
+                update_task.cancel()
+                writer.close()
+
+                return [client_id, other_client_id, client_id], list_after_join + list_after_leave, is_still_connected
+
+            expected, received, is_still_connected = asyncio.run(run())
+
+        self.assertEqual(expected, received)
+        self.assertTrue(is_still_connected)
+
+    def test_client_accepting_deltas_is_sent_deltas(self):
+        with ThreadedServer() as server:
+            soc, client_id, features = Client.connect("127.0.0.1", server.port, Features.CLIENT_ID_DELTAS)
+            self.assertIn(Features.CLIENT_ID_DELTAS, features)
+
+            Client.client_id_list = []
+            stop_event = WakeableEvent()
+            update_thread = threading.Thread(target=Client.server_update_handler, args=(soc, stop_event, features))
+            update_thread.start()
+
+            try:
+                self.assertTrue(wait_until(lambda: Client.client_id_list == [client_id]))
+                num_bytes_saved = server.client_handler_manager.num_bytes_saved
+
+                other_soc, other_client_id, _ = Client.connect("127.0.0.1", server.port)
+                self.assertTrue(wait_until(lambda: Client.client_id_list == [client_id, other_client_id]))
+                self.assertGreater(server.client_handler_manager.num_bytes_saved, num_bytes_saved)
+
+                other_soc.sendall(ClientMessageInfo.WILL_DISCONNECT.create_bytes())
+                other_soc.close()
+                self.assertTrue(wait_until(lambda: Client.client_id_list == [client_id]))
+
+            finally:
+                stop_event.set()
+                update_thread.join()
+                stop_event.close()
+                soc.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
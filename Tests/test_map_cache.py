@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from MapGenerator import MapCache
+
+from .wait_until import wait_until
+
+
+class TestMapCache(unittest.TestCase):
+    def test_prewarmer_continues_after_failed_map(self):
+        logged = []
+        map_cache = MapCache(log=logged.append)
+        map_cache.start()
+
+        try:
+            map_cache.prewarm(1, 0, 0)
+            map_cache.prewarm(1, 5, 5)
+
+            self.assertTrue(wait_until(lambda: map_cache.stats.num_misses == 1))
+            self.assertTrue(map_cache.prewarmer_thread.is_alive())
+            self.assertTrue(any("caused error" in message for message in logged))
+
+            # The map pre-warmed after the failure is already in memory
+            map_cache.get(5, 5, seed=0)
+            self.assertEqual(1, map_cache.stats.num_memory_hits)
+
+        finally:
+            map_cache.stop()
+
+    def test_map_failing_to_save_is_still_returned(self):
+        directory = tempfile.mkdtemp()
+        logged = []
+
+        try:
+            map_cache = MapCache(directory, log=logged.append)
+
+            # Removing the directory so every write fails
+            shutil.rmtree(directory)
+
+            cached_map = map_cache.get(5, 5, seed=0)
+            self.assertEqual(cached_map.map_data.crc32(), cached_map.crc32)
+            self.assertEqual(0, map_cache.num_bytes_on_disk)
+            self.assertTrue(any("only keeping it in memory" in message for message in logged))
+
+            self.assertIs(cached_map, map_cache.get(5, 5, seed=0))
+            self.assertEqual(1, map_cache.stats.num_memory_hits)
+
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def test_stats_count_every_get_from_many_threads(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            map_cache = MapCache(directory, log=lambda message: None)
+            num_threads = 8
+            num_seeds = 20
+
+            def get_maps(first_seed: int) -> None:
+                for seed in range(num_seeds):
+                    map_cache.get(4, 4, seed=first_seed + seed)
+
+            threads = [threading.Thread(target=get_maps, args=(index * num_seeds,)) for index in range(num_threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(num_threads * num_seeds, map_cache.stats.num_misses)
+            self.assertEqual(2 * num_threads * num_seeds, len(os.listdir(directory)))
+
+            # A fresh cache on the same directory finds every map on disk
+            reopened_map_cache = MapCache(directory, log=lambda message: None)
+            for seed in range(num_threads * num_seeds):
+                reopened_map_cache.get(4, 4, seed=seed)
+            self.assertEqual(num_threads * num_seeds, reopened_map_cache.stats.num_disk_hits)
+
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import Client
+from MapGenerator import MapCache
+from Utils import *
+
+from .ThreadedServer import ThreadedServer
+from .wait_until import wait_until
+
+
+class TestMovementValidation(unittest.TestCase):
+    def test_server_max_move_distance_reaches_game_ticker(self):
+        cached_map = MapCache(log=lambda message: None).get(10, 10, seed=3)
+        movement_validator = cached_map.movement_validator
+
+        # A move along an open row, legal against the walls but longer than the limit
+        y = 1
+        x_1 = next(x for x in range(movement_validator.width) if movement_validator.is_legal_move(x, y, x + 4, y))
+        x_2 = x_1 + 4
+
+        with ThreadedServer(max_move_distance=3) as server:
+            game_ticker = server.client_handler_manager.game_ticker
+            self.assertEqual(3, game_ticker.max_move_distance)
+
+            soc, client_id, _ = Client.connect("127.0.0.1", server.port)
+
+            try:
+                self.assertTrue(wait_until(lambda: client_id in server.client_handler_manager.client_id_to_handler))
+                server.client_handler_manager.start_game(cached_map)
+
+                soc.sendall(ClientMessageInfo.POSITION_AND_STATE.create_bytes(0, x_1, y))
+                self.assertTrue(wait_until(lambda: game_ticker.player_id_to_position_and_state[client_id] == (0, x_1, y)))
+
+                soc.sendall(ClientMessageInfo.POSITION_AND_STATE.create_bytes(0, x_2, y))
+                self.assertTrue(wait_until(lambda: game_ticker.stats.num_rejected_moves == 1))
+                self.assertEqual((0, x_1, y), game_ticker.player_id_to_position_and_state[client_id])
+
+                soc.sendall(ClientMessageInfo.POSITION_AND_STATE.create_bytes(0, x_1 + 3, y))
+                self.assertTrue(
+                    wait_until(lambda: game_ticker.player_id_to_position_and_state[client_id] == (0, x_1 + 3, y))
+                )
+
+            finally:
+                server.client_handler_manager.end_game()
+                soc.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+import time
+
+
+def wait_until(condition, timeout: float = 5) -> bool:
+    """
+    Polls the condition until it is true, for waiting on other threads in tests.
+
+    :param condition: Called with no arguments, returns a truthy value once done waiting.
+    :param timeout: The number of seconds to wait for.
+    :return: True if the condition became true before the timeout.
+    """
+
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
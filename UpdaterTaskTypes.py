@@ -3,3 +3,9 @@ from enum import Enum, auto
 
 class UpdaterTaskTypes(Enum):
     NUM_CLIENTS_CHANGED = auto()
+
+    MAP_CHECKSUM_RECEIVED = auto()
+    """Data is the id of the client and the checksum of the map data it received."""
+
+    STOP = auto()
+    """A sentinel task used to wake the updater so that it stops."""
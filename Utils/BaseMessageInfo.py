@@ -1,8 +1,34 @@
+import array
+import asyncio
 import struct
+import sys
 from enum import Enum
+from typing import Iterable
 
 from .Constants import _ENDIANNESS
 
+_NEEDS_BYTESWAP = (sys.byteorder == "little") != (_ENDIANNESS == "<")
+"""True if the native byte order of arrays differs from the byte order of messages."""
+
+
+def _find_array_typecode(format_char: str) -> str:
+    """
+    Finds the array typecode with the same signedness and size as the given struct format character.
+
+    :param format_char: A single struct integer format character, for example "I".
+    :return: The array typecode.
+    :raises ValueError: If there is no matching typecode.
+    """
+
+    size_in_bytes = struct.calcsize(_ENDIANNESS + format_char)
+    candidates = "bhilq" if format_char.islower() else "BHILQ"
+
+    for typecode in candidates:
+        if array.array(typecode).itemsize == size_in_bytes:
+            return typecode
+
+    raise ValueError(f"No array typecode matching format character '{format_char}'")
+
 
 class BaseMessageInfo(Enum):
     def __new__(cls, value: object, *args, **kwargs):
@@ -10,12 +36,16 @@ class BaseMessageInfo(Enum):
         obj._value_ = value
         return obj
 
-    def __init__(self, _, format_string: str):
+    def __init__(self, _, format_string: str, array_format_string: str = ""):
         """
         :param format_string:
             The format string for the message, not including the message indicator byte.
             Example, for an unsigned then signed int, "Ii".
             This should NOT include the endianness.
+        :param array_format_string:
+            The format character of each element of a variable length array following the message, if any.
+            The number of elements is the last value of the message.
+            This should NOT include the endianness.
         """
 
         self.format_string: str = _ENDIANNESS + format_string
@@ -27,12 +57,27 @@ class BaseMessageInfo(Enum):
         self.format_string_with_indicator: str = _ENDIANNESS + "B" + format_string
         """The format string used when creating the message."""
 
-        self.size_in_bytes: int = struct.calcsize(self.format_string)
+        self.struct: struct.Struct = struct.Struct(self.format_string)
+        """The precompiled form of self.format_string."""
+
+        self.struct_with_indicator: struct.Struct = struct.Struct(self.format_string_with_indicator)
+        """The precompiled form of self.format_string_with_indicator."""
+
+        self.size_in_bytes: int = self.struct.size
         """
         The size of the expected bytes object not including the indicator.
         Intended to be used to read the rest of the bytes from the socket after the indicator has been consumed.
         """
 
+        self.array_format_string: str = _ENDIANNESS + array_format_string if array_format_string else ""
+        """The format string of each element of the variable length array following the message, if any."""
+
+        self.array_item_size_in_bytes: int = struct.calcsize(self.array_format_string) if array_format_string else 0
+        """The size of each element of the variable length array, 0 if the message has no array."""
+
+        self.array_typecode: str = _find_array_typecode(array_format_string) if array_format_string else ""
+        """The typecode used to hold the variable length array in an array.array, if any."""
+
     def create_bytes(self, *args) -> bytes:
         """
         Creates a bytes object with the format string using the supplied arguments.
@@ -43,4 +88,70 @@ class BaseMessageInfo(Enum):
 
         # A format string always starts with the message indicator byte ("B" unsigned char)
         # This byte is stored in the _value_ property, hence why it is included here
-        return struct.pack(self.format_string_with_indicator, self._value_, *args)
+        return self.struct_with_indicator.pack(self._value_, *args)
+
+    def create_bytes_with_array(self, array_values: Iterable[int], *args) -> bytes:
+        """
+        Creates a bytes object for a message followed by a variable length array.
+        The length of the array is appended to the supplied arguments.
+
+        :param array_values: The elements of the array.
+        :param args: The arguments used to create the message, not including the length of the array.
+        :return: The bytes object.
+        """
+
+        array_bytes = array.array(self.array_typecode, array_values)
+        if _NEEDS_BYTESWAP:
+            array_bytes.byteswap()
+
+        return self.struct_with_indicator.pack(self._value_, *args, len(array_bytes)) + array_bytes.tobytes()
+
+    def pack_into(self, buffer, offset: int, *args) -> int:
+        """
+        Writes the message, including the indicator, into a caller provided buffer.
+
+        :param buffer: A writable buffer, for example a bytearray.
+        :param offset: The index in the buffer to write at.
+        :param args: The arguments used to create the message.
+        :return: The index in the buffer after the message.
+        """
+
+        self.struct_with_indicator.pack_into(buffer, offset, self._value_, *args)
+        return offset + self.struct_with_indicator.size
+
+    def unpack(self, buffer, offset: int = 0) -> tuple:
+        """
+        Unpacks the message from a buffer, after the indicator.
+
+        :param buffer: The buffer holding the message.
+        :param offset: The index in the buffer of the first byte after the indicator.
+        :return: The unpacked values of the message.
+        :raises struct.error: If the buffer is too small.
+        """
+
+        return self.struct.unpack_from(buffer, offset)
+
+    def unpack_array(self, buffer) -> array.array:
+        """
+        Unpacks the variable length array following the message in a single copy.
+
+        :param buffer: The buffer holding only the array.
+        :return: The elements of the array.
+        """
+
+        array_values = array.array(self.array_typecode, buffer)
+        if _NEEDS_BYTESWAP:
+            array_values.byteswap()
+
+        return array_values
+
+    async def read_from_stream(self, reader: asyncio.StreamReader) -> tuple:
+        """
+        Reads the rest of this message from the stream, after the indicator has been consumed, and unpacks it.
+
+        :param reader: The stream to read from.
+        :return: The unpacked values of the message.
+        :raises asyncio.IncompleteReadError: If the stream ends before the whole message is read.
+        """
+
+        return self.struct.unpack(await reader.readexactly(self.size_in_bytes))
@@ -5,3 +5,12 @@ class ClientMessageInfo(BaseMessageInfo):
     # Connecting or disconnecting from a server (0x1?)
     NEW_CONNECTION_REQUEST = 0x11, ""
     WILL_DISCONNECT = 0x12, ""
+    NEW_CONNECTION_REQUEST_WITH_FEATURES = 0x13, "I"  # The features the client would like to use
+
+    # In game messages (0x3?)
+    POSITION_AND_STATE = 0x31, "Bii"  # The state, x position and y position of the client sending it
+    SNAPSHOT_ACK = 0x32, "I"  # The tick of the latest snapshot received
+
+    # Transferring map data (0x4?)
+    # The specification numbers this 0x03, moved into its own group with the server map messages, see ServerMessageInfo
+    MAP_CHECKSUM = 0x41, "I"  # The CRC32 of the map data received, not including the width and height
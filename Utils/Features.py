@@ -0,0 +1,28 @@
+from enum import IntFlag
+
+
+class Features(IntFlag):
+    """
+    Optional parts of the protocol a client can request during the handshake.
+    The server replies with the features it accepted, anything not accepted falls back to the specification.
+    """
+
+    NONE = 0
+
+    SNAPSHOT_DELTA = 0x01
+    """
+    Position and state data is sent as SNAPSHOT messages holding only the records changed since the last snapshot
+    the client acknowledged.
+    """
+
+    INT16_RELATIVE_POSITIONS = 0x02
+    """Snapshot positions may be sent as 16 bit offsets from the acknowledged snapshot, requires SNAPSHOT_DELTA."""
+
+    COMPRESSED_MAP_DATA = 0x04
+    """Maps are sent as COMPRESSED_MAP_DATA messages, holding the map data compressed with zlib."""
+
+    CLIENT_ID_DELTAS = 0x08
+    """
+    Once the client has the list of client ids, it may be sent CLIENT_CONNECTED and CLIENT_DISCONNECTED messages
+    instead of the full list.
+    """
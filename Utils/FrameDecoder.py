@@ -0,0 +1,213 @@
+import socket
+from typing import Iterator
+
+from .BaseMessageInfo import BaseMessageInfo
+
+
+class Frame:
+    """
+    A single complete message decoded by a FrameDecoder.
+    """
+
+    def __init__(self, message_info: BaseMessageInfo, values: tuple, array_bytes: bytes = b""):
+        self.message_info: BaseMessageInfo = message_info
+        """The type of the message."""
+
+        self.values: tuple = values
+        """The unpacked values of the message, not including the indicator."""
+
+        self.array_bytes: bytes = array_bytes
+        """The raw bytes of the variable length array following the message, empty if the message has none."""
+
+
+class FrameDecoder:
+    """
+    Reads messages from a socket in large chunks and splits them into complete frames.
+
+    A single recv reads as many bytes as are available into a reusable buffer, so many messages cost one system call.
+    Short reads are handled by keeping any incomplete message in the buffer until the rest arrives.
+    """
+
+    def __init__(self, message_infos: type[BaseMessageInfo], capacity: int = 65536):
+        """
+        :param message_infos: The enum of the messages expected, for example ServerMessageInfo.
+        :param capacity: The initial size of the buffer, grows if a single message is larger.
+        """
+
+        self.indicator_to_message_info: dict[int, BaseMessageInfo] = {
+            message_info.value: message_info for message_info in message_infos
+        }
+
+        self._buffer: bytearray = bytearray(capacity)
+        self._view: memoryview = memoryview(self._buffer)
+
+        self._start: int = 0
+        """The index of the first byte not yet decoded."""
+        self._end: int = 0
+        """The index after the last byte received."""
+
+        self.num_recv_calls: int = 0
+        """The number of times the socket has been read from."""
+
+    @property
+    def num_buffered_bytes(self) -> int:
+        """The number of bytes received but not yet decoded."""
+
+        return self._end - self._start
+
+    def _make_space(self) -> None:
+        """
+        Ensures there is free space at the end of the buffer.
+        Moves any undecoded bytes to the start of the buffer, growing it if it is full of a single incomplete message.
+        """
+
+        if self._start == self._end:
+            self._start = self._end = 0
+
+        if self._end < len(self._buffer):
+            return
+
+        num_buffered_bytes = self.num_buffered_bytes
+
+        if self._start == 0:
+            self._view.release()
+            self._buffer.extend(bytes(len(self._buffer)))
+            self._view = memoryview(self._buffer)
+            return
+
+        self._buffer[:num_buffered_bytes] = self._view[self._start:self._end]
+        self._start = 0
+        self._end = num_buffered_bytes
+
+    def fill(self, soc: socket.socket) -> int:
+        """
+        Reads as many bytes as are available from the socket, with a single call to `soc.recv_into()`.
+
+        :param soc: The socket to read from.
+        :return: The number of bytes read, 0 if the socket is non-blocking and had nothing to read.
+        :raises OSError: If the socket has been closed by the other end.
+        """
+
+        self._make_space()
+
+        self.num_recv_calls += 1
+        try:
+            num_received = soc.recv_into(self._view[self._end:])
+        except BlockingIOError:
+            return 0
+
+        if not num_received:
+            raise OSError("Unable to read data from socket")
+
+        self._end += num_received
+        return num_received
+
+    def feed(self, data: bytes) -> None:
+        """
+        Adds bytes received by other means to the buffer.
+
+        :param data: The bytes to add.
+        """
+
+        view = memoryview(data)
+        while view:
+            self._make_space()
+
+            num_copied = min(len(view), len(self._buffer) - self._end)
+            self._buffer[self._end:self._end + num_copied] = view[:num_copied]
+            self._end += num_copied
+            view = view[num_copied:]
+
+    def next_frame(self) -> Frame | None:
+        """
+        Decodes the next complete message in the buffer.
+
+        :return: The frame, None if the buffer does not yet hold a complete message.
+        :raises ValueError: If the next message has an unknown indicator, the stream cannot be decoded any further.
+        """
+
+        if self._start == self._end:
+            return None
+
+        indicator_int = self._buffer[self._start]
+        message_info = self.indicator_to_message_info.get(indicator_int)
+
+        if message_info is None:
+            raise ValueError(f"Unknown indicator int {hex(indicator_int)}")
+
+        values_start = self._start + 1
+        values_end = values_start + message_info.size_in_bytes
+
+        if values_end > self._end:
+            return None
+
+        values = message_info.unpack(self._buffer, values_start)
+
+        if not message_info.array_item_size_in_bytes:
+            self._start = values_end
+            return Frame(message_info, values)
+
+        array_end = values_end + values[-1] * message_info.array_item_size_in_bytes
+
+        if array_end > self._end:
+            return None
+
+        self._start = array_end
+        return Frame(message_info, values, bytes(self._view[values_end:array_end]))
+
+    def next_bytes(self, num_bytes: int) -> bytes | None:
+        """
+        Takes a fixed number of bytes from the buffer without decoding them as a message.
+        Used for data sent without a message indicator, such as the position and state data.
+
+        :param num_bytes: The number of bytes to take.
+        :return: The bytes, None if the buffer does not yet hold enough bytes.
+        """
+
+        if self.num_buffered_bytes < num_bytes:
+            return None
+
+        data = bytes(self._view[self._start:self._start + num_bytes])
+        self._start += num_bytes
+        return data
+
+    def take_bytes(self, max_bytes: int) -> bytes:
+        """
+        Takes as many bytes as are buffered, up to a limit, without decoding them as a message.
+        Used to process a large message as it arrives rather than once it has all been received.
+
+        :param max_bytes: The maximum number of bytes to take.
+        :return: The bytes, empty if nothing is buffered.
+        """
+
+        num_bytes = min(max_bytes, self.num_buffered_bytes)
+
+        data = bytes(self._view[self._start:self._start + num_bytes])
+        self._start += num_bytes
+        return data
+
+    def frames(self) -> Iterator[Frame]:
+        """
+        Decodes every complete message in the buffer.
+
+        :return: An iterator of the frames.
+        :raises ValueError: If a message has an unknown indicator.
+        """
+
+        while (frame := self.next_frame()) is not None:
+            yield frame
+
+    def read_frame(self, soc: socket.socket) -> Frame:
+        """
+        Blocks until a complete message has been read from the socket.
+
+        :param soc: A blocking socket to read from.
+        :return: The frame.
+        :raises OSError: If the socket has been closed by the other end.
+        :raises ValueError: If a message has an unknown indicator.
+        """
+
+        while (frame := self.next_frame()) is None:
+            self.fill(soc)
+
+        return frame
@@ -1,7 +1,9 @@
+import asyncio
 import socket
 import struct
 
 from .Constants import _ENDIANNESS
+from .read_n_bytes_from_soc import read_n_bytes_from_soc
 
 
 class IndicatorInt:
@@ -10,7 +12,8 @@ class IndicatorInt:
     """
 
     format_string = f"{_ENDIANNESS}B"
-    size_in_bytes = struct.calcsize(format_string)
+    struct = struct.Struct(format_string)
+    size_in_bytes = struct.size
 
     @classmethod
     def read_from_socket(cls, soc: socket.socket) -> int:
@@ -20,10 +23,25 @@ class IndicatorInt:
         :param soc: The socket to read from.
         :return: The indicator int.
         :raises TimeoutError:
-        :raises struct.error:
+        :raises OSError: If the socket has been closed by the other end.
         """
 
-        indicator_bytes = soc.recv(cls.size_in_bytes)
-        indicator_int, = struct.unpack(cls.format_string, indicator_bytes)
+        indicator_bytes = read_n_bytes_from_soc(soc, cls.size_in_bytes)
+        indicator_int, = cls.struct.unpack(indicator_bytes)
+
+        return indicator_int
+
+    @classmethod
+    async def read_from_stream(cls, reader: asyncio.StreamReader) -> int:
+        """
+        Reads the amount required for an indicator int from the stream and converts it into an int.
+
+        :param reader: The stream to read from.
+        :return: The indicator int.
+        :raises asyncio.IncompleteReadError: If the stream ends before the indicator is read.
+        """
+
+        indicator_bytes = await reader.readexactly(cls.size_in_bytes)
+        indicator_int, = cls.struct.unpack(indicator_bytes)
 
         return indicator_int
@@ -0,0 +1,54 @@
+import struct
+
+from .Constants import _ENDIANNESS
+
+
+class PositionAndState:
+    """
+    A special class for the in game position and state data, which has no message indicator.
+    The data for every client is sent together, one record after another.
+    """
+
+    format_string = f"{_ENDIANNESS}IBii"
+    """Client id, client state, x position, y position."""
+    struct = struct.Struct(format_string)
+    size_in_bytes = struct.size
+
+    @classmethod
+    def pack_into(cls, buffer, offset: int, client_id: int, state: int, x: int, y: int) -> int:
+        """
+        Writes the record for a single client into a caller provided buffer.
+
+        :param buffer: A writable buffer, for example a bytearray.
+        :param offset: The index in the buffer to write at.
+        :param client_id: The id of the client.
+        :param state: The state of the client.
+        :param x: The x position of the client.
+        :param y: The y position of the client.
+        :return: The index in the buffer after the record.
+        """
+
+        cls.struct.pack_into(buffer, offset, client_id, state, x, y)
+        return offset + cls.size_in_bytes
+
+    @classmethod
+    def unpack_all(cls, buffer) -> list[tuple[int, int, int, int]]:
+        """
+        Unpacks the record of every client.
+
+        :param buffer: The buffer holding only the records, its length must be a multiple of the size of one record.
+        :return: The client id, state, x and y of each record.
+        """
+
+        return list(cls.struct.iter_unpack(buffer))
+
+    @staticmethod
+    def is_end_game(buffer) -> bool:
+        """
+        The end of a game is indicated by sending the same number of bytes as the records, with all zeroes.
+
+        :param buffer: The buffer holding only the records.
+        :return: True if the buffer marks the end of the game.
+        """
+
+        return not any(buffer)
@@ -4,6 +4,28 @@ from .BaseMessageInfo import BaseMessageInfo
 class ServerMessageInfo(BaseMessageInfo):
     # Handling client connections and disconnections (0x1?)
     CLIENT_ID = 0x11, "I"
+    ACCEPTED_FEATURES = 0x12, "I"  # The features accepted, only sent after CLIENT_ID if features were requested
 
     # Updating client information (0x02?)
-    CONNECTED_CLIENT_IDS_HEADER = 0x21, "I"  # The number of connected clients followed by all the client id numbers
+    CONNECTED_CLIENT_IDS_HEADER = 0x21, "I", "I"  # The number of connected clients followed by all the client id numbers
+    CLIENT_CONNECTED = 0x24, "I"  # The id of a client that has connected since the last update
+    CLIENT_DISCONNECTED = 0x25, "I"  # The id of a client that has disconnected since the last update
+
+    # In game messages (0x3?)
+    # The tick, the tick of the baseline snapshot (0 if none), the encoding, then the number of bytes of records
+    # A tick of 0 ends the game
+    SNAPSHOT = 0x31, "IIBI", "B"
+
+    # Transferring map data (0x4?)
+    # The specification numbers these 0x11 to 0x13, but this server numbers its messages by group, as with CLIENT_ID
+    # (0x01 in the specification), and 0x11 and 0x12 are already taken by CLIENT_ID and ACCEPTED_FEATURES
+    # The formats are as in the specification, only the indicators differ
+    MAP_DATA = 0x41, "II"  # The width and height, followed by every row of the map padded to a whole number of bytes
+    MAP_CHECKSUM_CORRECT = 0x42, ""
+    MAP_CHECKSUM_INCORRECT = 0x43, ""  # The map data is sent again
+    # The width, height and number of compressed bytes, followed by the map data as in MAP_DATA compressed with zlib
+    # The checksum is of the uncompressed map data
+    COMPRESSED_MAP_DATA = 0x44, "III"
+
+    # Misc (0xF?)
+    START_GAME = 0xF0, ""  # Followed only by position and state data, or snapshots, until the game ends
@@ -0,0 +1,117 @@
+import struct
+
+from .Constants import _ENDIANNESS
+from .PositionAndState import PositionAndState
+from .SnapshotEncoding import SnapshotEncoding
+
+_INT16_MIN = -(1 << 15)
+_INT16_MAX = (1 << 15) - 1
+
+
+class SnapshotCodec:
+    """
+    Encodes a snapshot of every player as only the records that changed since a baseline snapshot.
+
+    A snapshot is a dictionary of client ids to their state, x and y position.
+    The baseline is a snapshot both ends already have, the empty dictionary if there is none.
+    """
+
+    history_length = 64
+    """The number of recent snapshots each end keeps to be used as a baseline."""
+
+    full_struct = PositionAndState.struct
+    int16_relative_struct = struct.Struct(f"{_ENDIANNESS}IBhh")
+    """Client id, client state, x offset, y offset."""
+
+    @classmethod
+    def encode(cls, snapshot: dict[int, tuple[int, int, int]], baseline: dict[int, tuple[int, int, int]],
+               allow_int16_relative: bool = False) -> tuple[SnapshotEncoding, bytes]:
+        """
+        Encodes the records of the snapshot that differ from the baseline.
+
+        :param snapshot: The snapshot to encode.
+        :param baseline: The snapshot the receiver will apply the changes to.
+        :param allow_int16_relative:
+            If True, positions are sent as offsets from the baseline whenever every changed record allows it.
+        :return: The encoding used and the encoded records.
+        """
+
+        changed = [
+            (client_id, position_and_state) for client_id, position_and_state in snapshot.items()
+            if baseline.get(client_id) != position_and_state
+        ]
+
+        if allow_int16_relative:
+            payload = cls._encode_int16_relative(changed, baseline)
+            if payload is not None:
+                return SnapshotEncoding.INT16_RELATIVE, payload
+
+        record_struct = cls.full_struct
+        payload = bytearray(record_struct.size * len(changed))
+
+        offset = 0
+        for client_id, (state, x, y) in changed:
+            record_struct.pack_into(payload, offset, client_id, state, x, y)
+            offset += record_struct.size
+
+        return SnapshotEncoding.FULL, bytes(payload)
+
+    @classmethod
+    def _encode_int16_relative(cls, changed: list[tuple[int, tuple[int, int, int]]],
+                               baseline: dict[int, tuple[int, int, int]]) -> bytes | None:
+        """
+        :return: The encoded records, None if a record is not in the baseline or has moved too far to encode.
+        """
+
+        record_struct = cls.int16_relative_struct
+        payload = bytearray(record_struct.size * len(changed))
+
+        offset = 0
+        for client_id, (state, x, y) in changed:
+            baseline_position_and_state = baseline.get(client_id)
+            if baseline_position_and_state is None:
+                return None
+
+            _, baseline_x, baseline_y = baseline_position_and_state
+            dx = x - baseline_x
+            dy = y - baseline_y
+
+            if not (_INT16_MIN <= dx <= _INT16_MAX and _INT16_MIN <= dy <= _INT16_MAX):
+                return None
+
+            record_struct.pack_into(payload, offset, client_id, state, dx, dy)
+            offset += record_struct.size
+
+        return bytes(payload)
+
+    @classmethod
+    def decode(cls, payload, encoding: SnapshotEncoding,
+               baseline: dict[int, tuple[int, int, int]]) -> dict[int, tuple[int, int, int]]:
+        """
+        Applies the encoded records to the baseline.
+
+        :param payload: The encoded records.
+        :param encoding: The encoding of the records.
+        :param baseline: The snapshot the records were encoded against, it is not modified.
+        :return: The new snapshot.
+        :raises ValueError: If the encoding is unknown or a relative record is not in the baseline.
+        """
+
+        snapshot = dict(baseline)
+
+        if encoding == SnapshotEncoding.FULL:
+            for client_id, state, x, y in cls.full_struct.iter_unpack(payload):
+                snapshot[client_id] = (state, x, y)
+
+        elif encoding == SnapshotEncoding.INT16_RELATIVE:
+            for client_id, state, dx, dy in cls.int16_relative_struct.iter_unpack(payload):
+                if client_id not in baseline:
+                    raise ValueError(f"Relative record for client id {client_id} missing from the baseline")
+
+                _, baseline_x, baseline_y = baseline[client_id]
+                snapshot[client_id] = (state, baseline_x + dx, baseline_y + dy)
+
+        else:
+            raise ValueError(f"Unknown snapshot encoding {encoding}")
+
+        return snapshot
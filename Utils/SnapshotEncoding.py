@@ -0,0 +1,13 @@
+from enum import IntEnum
+
+
+class SnapshotEncoding(IntEnum):
+    """
+    How the records in a SNAPSHOT message are encoded.
+    """
+
+    FULL = 0
+    """Each record is the same as the position and state data, 13 bytes."""
+
+    INT16_RELATIVE = 1
+    """Each record holds the position as 16 bit offsets from the record in the baseline snapshot, 9 bytes."""
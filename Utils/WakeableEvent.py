@@ -0,0 +1,83 @@
+import socket
+import threading
+
+
+class WakeableEvent:
+    """
+    A threading.Event that can also be waited on by select and selectors.
+
+    Setting the event writes to an internal socket pair, so a thread blocked in select without a timeout is woken
+    immediately rather than having to poll the event.
+    """
+
+    def __init__(self):
+        self._event: threading.Event = threading.Event()
+
+        self._lock: threading.Lock = threading.Lock()
+        """A lock that must be acquired before setting or clearing the event."""
+
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+
+    def fileno(self) -> int:
+        """
+        The file descriptor that becomes readable once the event is set.
+        Allows the event to be passed directly to select and selectors.
+
+        :return: The file descriptor.
+        """
+
+        return self._reader.fileno()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def set(self) -> None:
+        """
+        Sets the event, waking any thread waiting on it.
+        """
+
+        with self._lock:
+            if self._event.is_set():
+                return
+
+            self._event.set()
+
+            try:
+                self._writer.send(b"\0")
+            except OSError:
+                # The socket pair is closed or its buffer is full, either way there is nobody left to wake
+                pass
+
+    def clear(self) -> None:
+        """
+        Clears the event, so that it no longer wakes select.
+        """
+
+        with self._lock:
+            self._event.clear()
+
+            try:
+                while self._reader.recv(64):
+                    pass
+            except OSError:
+                pass
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until the event is set or the timeout expires.
+
+        :param timeout: The number of seconds to wait for, None to wait forever.
+        :return: True if the event is set, otherwise False.
+        """
+
+        return self._event.wait(timeout)
+
+    def close(self) -> None:
+        """
+        Closes the internal socket pair.
+        """
+
+        self._reader.close()
+        self._writer.close()
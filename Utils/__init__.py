@@ -1,6 +1,13 @@
 from .ClientMessageInfo import ClientMessageInfo
+from .Features import Features
+from .FrameDecoder import Frame, FrameDecoder
 from .IndicatorInt import IndicatorInt
 from .Logger import Logger
+from .PositionAndState import PositionAndState
 from .ServerMessageInfo import ServerMessageInfo
+from .SnapshotCodec import SnapshotCodec
+from .SnapshotEncoding import SnapshotEncoding
+from .WakeableEvent import WakeableEvent
 from .get_my_ip import get_my_ip
 from .read_n_bytes_from_soc import read_n_bytes_from_soc
+from .wait_for_shutdown_signal import wait_for_shutdown_signal
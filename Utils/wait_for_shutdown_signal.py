@@ -0,0 +1,43 @@
+import select
+import signal
+import socket
+
+
+def wait_for_shutdown_signal() -> None:
+    """
+    Blocks the calling thread until SIGINT or SIGTERM is received, without using any CPU while waiting.
+
+    Uses the self-pipe trick, signal.set_wakeup_fd writes each received signal number to a socket pair that is waited
+    on with select.
+    Must be called from the main thread.
+    The previous signal handlers are restored before returning.
+    """
+
+    shutdown_signals = (signal.SIGINT, signal.SIGTERM)
+
+    reader, writer = socket.socketpair()
+    writer.setblocking(False)
+
+    # The handlers do nothing, they replace the default ones so that the signals only wake the select below
+    previous_handlers = {
+        signum: signal.signal(signum, lambda _signum, _frame: None) for signum in shutdown_signals
+    }
+    previous_wakeup_fd = signal.set_wakeup_fd(writer.fileno(), warn_on_full_buffer=False)
+
+    try:
+        while True:
+            select.select([reader], [], [])
+
+            received_signals = reader.recv(64)
+
+            if any(signum in received_signals for signum in shutdown_signals):
+                return
+
+    finally:
+        signal.set_wakeup_fd(previous_wakeup_fd)
+
+        for signum, previous_handler in previous_handlers.items():
+            signal.signal(signum, previous_handler)
+
+        reader.close()
+        writer.close()